@@ -0,0 +1,116 @@
+# Copyright (C) 2020 Zurich Instruments
+#
+# This software may be modified and distributed under the terms
+# of the MIT license. See the LICENSE file for details.
+"""Benchmark of the creation of the DAQ Module results.
+
+Compares the time and the peak memory of two ways to turn the data read
+from the DAQ Module into results, once for reading a single signal and
+once for reading all signals:
+
+* legacy: the eager `DAQResult` before it was made lazy, one result
+  with its time axis for every signal
+* lazy: `DAQModule._get_result_from_dict(...)` with the lazy results
+
+The arrays that simulate the data returned by the API are allocated
+before the measurement starts, only the memory allocated on top of them
+is reported.
+
+Usage:
+
+    python benchmarks/daq_result.py --signals 100 --rows 1000 --cols 1000
+"""
+
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+
+from zhinst.toolkit.control.drivers.base.daq import DAQModule
+
+
+class LegacyDAQResult:
+    """The implementation of `DAQResult` before it was made lazy."""
+
+    def __init__(self, path, result_dict, clk_rate=60e6):
+        self._path = path
+        self._clk_rate = clk_rate
+        self._is_fft = "fft" in self._path
+        self._result_dict = result_dict
+        self._header = self._result_dict.get("header", {})
+        self._value = self._result_dict.get("value")
+        self._time = None
+        self._frequencies = None
+        if not self._is_fft:
+            self._time = self._claculate_time()
+
+    def _claculate_time(self):
+        timestamp = self._result_dict["timestamp"]
+        return (timestamp[0] - timestamp[0][0]) / self._clk_rate
+
+
+class Parent:
+    serial = "dev1234"
+
+    def _get_streamingnodes(self):
+        return {}
+
+
+def measure(func):
+    """Runs a function and returns the time in seconds and the peak of
+    the memory allocated while it ran in MB."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--signals", type=int, default=100)
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--cols", type=int, default=1000)
+    args = parser.parse_args()
+
+    signals = [f"/dev1234/demods/0/sample.r{i}.avg" for i in range(args.signals)]
+    shape = (args.rows, args.cols)
+    timestamp = np.arange(args.rows * args.cols, dtype=np.uint64).reshape(shape)
+    data = {
+        signal: [
+            {
+                "header": {"gridcoldelta": np.array([1.0])},
+                "value": np.full(shape, i, dtype=float),
+                "timestamp": timestamp,
+            }
+        ]
+        for i, signal in enumerate(signals)
+    }
+    daq = DAQModule(Parent())
+    daq._signals = signals
+
+    def legacy(read):
+        results = {s: LegacyDAQResult(s, data[s][0]) for s in signals}
+        return [(results[s]._value, results[s]._time) for s in read]
+
+    def lazy(read):
+        daq._get_result_from_dict(data)
+        return [(daq.results[s].value, daq.results[s].time) for s in read]
+
+    print(
+        f"{args.signals} signals with {args.rows} x {args.cols} grids "
+        f"({sum(d[0]['value'].nbytes for d in data.values()) / 1e6:.0f} MB "
+        f"of values)"
+    )
+    print(f"{'method':<10}{'read':<8}{'time [s]':>10}{'peak memory [MB]':>20}")
+    for name, func in [("legacy", legacy), ("lazy", lazy)]:
+        for read, label in [(signals[:1], "one"), (signals, "all")]:
+            elapsed, peak = measure(lambda: func(read))
+            print(f"{name:<10}{label:<8}{elapsed:>10.4f}{peak:>20.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+# Copyright (C) 2020 Zurich Instruments
+#
+# This software may be modified and distributed under the terms
+# of the MIT license. See the LICENSE file for details.
+"""Benchmark of the scaling and interleaving of queued waveforms.
+
+Compares the time and the peak memory of three ways to calculate the
+data of a waveform queue:
+
+* legacy: the float64 implementation of `Waveform` before the int16
+  rewrite, one waveform after the other
+* per waveform: accessing `Waveform.data` of every waveform
+* packed: `pack_waveforms(...)` for the whole queue
+
+Usage:
+
+    python benchmarks/waveform_packing.py --waveforms 1000 --samples 100000
+"""
+
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+
+from zhinst.toolkit.helpers import Waveform, pack_waveforms
+
+
+def legacy_interleave(waveform, x1, x2):
+    """The implementation of `Waveform._interleave_waveforms` before
+    the data was written to an int16 buffer directly."""
+    if len(x1) == 0:
+        x1 = np.zeros(1)
+    if len(x2) == 0:
+        x2 = np.zeros(1)
+    m1, m2 = np.max(np.abs(x1)), np.max(np.abs(x2))
+    data = np.zeros((2, waveform.buffer_length))
+    data[0, : len(x1)] = x1 / m1 if m1 >= 1 else x1
+    data[1, : len(x2)] = x2 / m2 if m2 >= 1 else x2
+    return (data.reshape((-2,), order="F") * (2 ** 15 - 1)).astype("int16")
+
+
+def measure(func):
+    """Runs a function and returns the time in seconds and the peak of
+    the memory allocated while it ran in MB."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--waveforms", type=int, default=1000)
+    parser.add_argument("--samples", type=int, default=100000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    waves = [
+        (rng.uniform(-2, 2, args.samples), rng.uniform(-0.5, 0.5, args.samples))
+        for _ in range(args.waveforms)
+    ]
+    queue = [Waveform(w1, w2) for w1, w2 in waves]
+    results = {}
+
+    def legacy():
+        return [legacy_interleave(w, *w._waves) for w in queue]
+
+    def per_waveform():
+        for w in queue:
+            w._data = None
+        return [w.data for w in queue]
+
+    def packed():
+        for w in queue:
+            w._data = None
+        return pack_waveforms(queue)
+
+    for name, func in [
+        ("legacy", legacy),
+        ("per waveform", per_waveform),
+        ("packed", packed),
+    ]:
+        results[name] = measure(func)
+
+    reference = legacy()
+    packed()
+    assert all(np.array_equal(w.data, r) for w, r in zip(queue, reference))
+
+    output_size = 4 * args.samples * args.waveforms / 1e6
+    print(
+        f"{args.waveforms} waveforms with {args.samples} samples per channel "
+        f"({output_size:.1f} MB of int16 data)"
+    )
+    print(f"{'method':<14}{'time [s]':>10}{'peak memory [MB]':>20}")
+    for name, (elapsed, peak) in results.items():
+        print(f"{name:<14}{elapsed:>10.3f}{peak:>20.1f}")
+
+
+if __name__ == "__main__":
+    main()
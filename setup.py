@@ -52,6 +52,7 @@ setuptools.setup(
     use_scm_version={"write_to": "src/zhinst/toolkit/_version.py"},
     setup_requires=["setuptools_scm"],
     install_requires=requirements,
+    extras_require={"hdf5": ["h5py"], "zarr": ["zarr"]},
     include_package_data=True,
     python_requires=">=3.6",
     zip_safe=False,
@@ -0,0 +1,198 @@
+# Copyright (C) 2020 Zurich Instruments
+#
+# This software may be modified and distributed under the terms
+# of the MIT license. See the LICENSE file for details.
+"""Zurich Instruments Toolkit (zhinst-toolkit) asyncio Support.
+
+This module implements the helpers behind the asynchronous methods of
+the toolkit (`aget(...)`, `aset(...)`, `acompile()`, `await_done()`,
+`ameasure()`, ...). Blocking calls to the data server are run on a
+bounded thread pool so they never block the event loop, and waiting is
+done with `asyncio.sleep(...)` or with the values pushed by the
+:class:`SubscriptionManager`. A single event loop can drive many
+instruments at the same time.
+
+    >>> async def main():
+    ...     await asyncio.gather(hd1.awgs[0].acompile(), hd2.awgs[0].acompile())
+    ...     await asyncio.gather(hd1.aset("sigouts/0/on", 1), hd2.aget("sigouts/0/on"))
+    >>> asyncio.run(main())
+"""
+
+import asyncio
+import functools
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict
+
+from zhinst.toolkit.control.waiting import WaitResult
+
+MAX_WORKERS = 16
+
+_executor = None
+_max_workers = MAX_WORKERS
+_executor_lock = threading.Lock()
+_locks = weakref.WeakKeyDictionary()
+
+
+def set_max_workers(max_workers: int) -> None:
+    """Sets the number of threads used for blocking calls.
+
+    The running thread pool is shut down once all submitted calls are
+    done and a new one with the given size is created on the next call.
+
+    Arguments:
+        max_workers (int): Maximum number of blocking calls that run at
+            the same time (default: 16).
+
+    """
+    global _executor, _max_workers
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False)
+        _executor = None
+        _max_workers = max_workers
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Returns the thread pool used for blocking calls."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=_max_workers, thread_name_prefix="zhinst-toolkit-aio"
+            )
+        return _executor
+
+
+async def run_blocking(func: Callable, *args, **kwargs):
+    """Runs a blocking function on the thread pool.
+
+    Arguments:
+        func (Callable): The blocking function, it is called with the
+            remaining arguments and keyword arguments.
+
+    Returns:
+        The value returned from the function.
+
+    """
+    loop = asyncio.get_event_loop()
+    return await loop.run_in_executor(
+        get_executor(), functools.partial(func, *args, **kwargs)
+    )
+
+
+def lock_for(owner) -> asyncio.Lock:
+    """Returns an :class:`asyncio.Lock` for an object.
+
+    Used to serialise coroutines that share a stateful object, e.g.
+    the AWG module of a data server connection. The lock belongs to the
+    running event loop.
+
+    Arguments:
+        owner: The object to be locked.
+
+    Returns:
+        The same lock for every call with the same object in the same
+        event loop.
+
+    """
+    loop = asyncio.get_event_loop()
+    locks = _locks.setdefault(loop, {})
+    if id(owner) not in locks:
+        locks[id(owner)] = asyncio.Lock()
+    return locks[id(owner)]
+
+
+async def poll_until(
+    condition: Callable,
+    timeout: float = None,
+    initial_interval: float = 0.001,
+    max_interval: float = 0.1,
+    factor: float = 2,
+) -> WaitResult:
+    """Asynchronous version of :func:`waiting.poll_until`.
+
+    The blocking condition is evaluated on the thread pool and the
+    interval between two evaluations is awaited with
+    `asyncio.sleep(...)`.
+
+    Arguments:
+        condition (Callable): A blocking function without arguments that
+            returns `True` if the condition is fulfilled.
+        timeout (float): Maximum time in seconds to wait. If `None`,
+            the coroutine waits until the condition is fulfilled
+            (default: None).
+        initial_interval (float): Time in seconds between the first two
+            evaluations (default: 0.001).
+        max_interval (float): Maximum time in seconds between two
+            evaluations (default: 0.1).
+        factor (float): Factor the interval grows with after every
+            evaluation (default: 2).
+
+    Returns:
+        A :class:`WaitResult` with the outcome of the wait.
+
+    """
+    start_time = time.monotonic()
+    interval = min(initial_interval, max_interval)
+    polls = 0
+    while True:
+        polls += 1
+        if await run_blocking(condition):
+            return WaitResult(True, time.monotonic() - start_time, polls)
+        elapsed = time.monotonic() - start_time
+        if timeout is not None:
+            if elapsed >= timeout:
+                return WaitResult(False, elapsed, polls)
+            await asyncio.sleep(min(interval, timeout - elapsed))
+        else:
+            await asyncio.sleep(interval)
+        interval = min(interval * factor, max_interval)
+
+
+async def wait_all(subscriptions, conditions: Dict, timeout: float = 10) -> WaitResult:
+    """Waits until watched nodes fulfill their conditions.
+
+    The coroutine is woken up by the :class:`SubscriptionManager`
+    whenever new values are pushed by the data server, no thread of the
+    pool is occupied while waiting.
+
+    Arguments:
+        subscriptions (:class:`SubscriptionManager`): The manager that
+            watches all nodes of the conditions.
+        conditions (dict): A dictionary with full node paths as keys
+            and predicate functions as values.
+        timeout (float): Maximum time in seconds to wait (default: 10).
+
+    Returns:
+        A :class:`WaitResult` with the outcome of the wait.
+
+    """
+    loop = asyncio.get_event_loop()
+    updated = asyncio.Event()
+
+    def listener():
+        try:
+            loop.call_soon_threadsafe(updated.set)
+        except RuntimeError:
+            # The event loop is already closed
+            pass
+
+    start_time = time.monotonic()
+    subscriptions.add_listener(listener)
+    try:
+        while True:
+            if subscriptions.wait_all(conditions, timeout=0):
+                return WaitResult(True, time.monotonic() - start_time)
+            remaining = timeout - (time.monotonic() - start_time)
+            if remaining <= 0:
+                return WaitResult(False, time.monotonic() - start_time)
+            try:
+                await asyncio.wait_for(updated.wait(), remaining)
+            except asyncio.TimeoutError:
+                pass
+            updated.clear()
+    finally:
+        subscriptions.remove_listener(listener)
@@ -4,14 +4,56 @@
 # of the MIT license. See the LICENSE file for details.
 
 import json
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
 
+import attr
+import numpy as np
+
+from zhinst.toolkit.control import aio
 from zhinst.toolkit.control.parsers import Parse
+from zhinst.toolkit.control.node_value_cache import NodeValueCache
+from zhinst.toolkit.control.subscription_manager import SubscriptionManager
+from zhinst.toolkit.control.waiting import WaitResult, as_predicate, poll_until
 from zhinst.toolkit.interface import DeviceTypes, LoggerModule
 import zhinst.ziPython as zi
 
 _logger = LoggerModule(__name__)
 
 
+@attr.s(frozen=True)
+class VectorTransfer:
+    """The outcome of a bulk transfer of vectors with `set_vector(...)`.
+
+    Attributes:
+        chunks (list): A tuple with the number of bytes and the time in
+            seconds for every `daq.set(...)` call of the transfer.
+        nbytes (int): Total number of bytes sent.
+        elapsed (float): Total time in seconds of all calls.
+        throughput (float): Average throughput in MB/s.
+
+    """
+
+    chunks = attr.ib(factory=list)
+
+    @property
+    def nbytes(self):
+        return sum(nbytes for nbytes, _ in self.chunks)
+
+    @property
+    def elapsed(self):
+        return sum(elapsed for _, elapsed in self.chunks)
+
+    @property
+    def throughput(self):
+        if self.elapsed == 0:
+            return float("inf") if self.nbytes else 0.0
+        return self.nbytes / self.elapsed / 1e6
+
+
 class ZIConnection:
     """Connection to a Zurich Instruments data server object.
 
@@ -21,22 +63,39 @@ class ZIConnection:
     implements the `daq.awgModule` module as well as DAQ module and
     Sweeper Module connections.
 
+    Every device gets its own DAQ Module and Sweeper Module from
+    `daq_module_for(...)` and `sweeper_module_for(...)`. The modules are
+    never switched between devices, so several lock-ins on the same
+    connection can measure at the same time.
+
+    Calls to the data server session are serialised with a lock so that
+    a connection can be shared by the threads that run the blocking
+    calls of the asynchronous methods (see :mod:`aio`).
+
     Arguments:
         connection_details: Part of the instrument config.
 
     Attributes:
         connection_details (ZIAPI)
         daq (zi.ziDAQServer): data server object from zhinst.ziPython
+        vector_chunk_size (int): Maximum number of bytes sent with a
+            single call by `set_vector(...)` (default: 64 MB).
 
     Properties:
         established (bool): A flag showing if a connection has been
             established.
         awg_module (AWGModuleConnection)
-        daq_module (DAQModuleConnection)
-        sweeper_module (SweeperModuleConnection)
+        awg_module_pool (AWGModulePool)
+        daq_module (DAQModuleConnection): the DAQ Module that is shared
+            by all devices
+        sweeper_module (SweeperModuleConnection): the Sweeper Module
+            that is shared by all devices
+        subscriptions (SubscriptionManager)
 
     """
 
+    VECTOR_CHUNK_SIZE = 64 * 2 ** 20
+
     def __init__(self, connection_details):
         self._connection_details = connection_details
         self._daq = None
@@ -45,6 +104,11 @@ class ZIConnection:
         self._daq_module = None
         self._sweeper_module = None
         self._device_type = None
+        self._subscriptions = None
+        self._awg_module_pool = None
+        self._device_modules = {}
+        self._lock = threading.RLock()
+        self.vector_chunk_size = self.VECTOR_CHUNK_SIZE
 
     def connect(self):
         """Established a connection to the data server.
@@ -77,6 +141,7 @@ class ZIConnection:
                 f"{self._connection_details.port} "
                 f"api version: {self._connection_details.api}"
             )
+            self._close_modules()
             self._awg_module = AWGModuleConnection(self._daq)
             self._scope_module = ScopeModuleConnection(self._daq)
             self._daq_module = DAQModuleConnection(self._daq)
@@ -88,6 +153,22 @@ class ZIConnection:
                 _logger.ExceptionTypes.ToolkitConnectionError,
             )
 
+    def _close_modules(self) -> None:
+        """Finishes and clears the modules created for a previous data
+        server session, they are created again on demand."""
+        with self._lock:
+            modules = list(self._device_modules.values())
+            self._device_modules = {}
+            pool, self._awg_module_pool = self._awg_module_pool, None
+        if pool is not None:
+            modules += pool.close()
+        for module in modules:
+            try:
+                module.finish()
+                module.clear()
+            except RuntimeError as e:
+                _logger.warning(f"Could not clear a module of the old session: {e}")
+
     @property
     def established(self):
         return self._daq is not None
@@ -116,28 +197,30 @@ class ZIConnection:
                 "interface [1gbe or usb]",
                 _logger.ExceptionTypes.ToolkitConnectionError,
             )
-        self._daq.connectDevice(serial, interface)
-        print(
-            f"Successfully connected to device {serial.upper()} "
-            f"on interface {interface.upper()}"
-        )
-        # Update device type
-        self._device_type = self._daq.getString(f"/{serial}/features/devtype")
-        # Check if device has AWG functionality and update the AWG module
-        device_awg_nodes = self._daq.listNodes(f"{serial}/awgs")
-        if device_awg_nodes:
-            self._awg_module.update(device=serial, index=0)
-        # Check if the device has Scope functionality
-        device_scope_nodes = self._daq.listNodes(f"{serial}/scope")
-        if device_scope_nodes:
-            # Check if device is UHF or MF and update the scope module
-            if self._device_type.startswith(("UHF", "MF")):
-                self._scope_module.update_device(device=serial)
+        with self._lock:
+            self._daq.connectDevice(serial, interface)
+            print(
+                f"Successfully connected to device {serial.upper()} "
+                f"on interface {interface.upper()}"
+            )
+            # Update device type
+            self._device_type = self._daq.getString(f"/{serial}/features/devtype")
+            # Check if device has AWG functionality and update the AWG module
+            device_awg_nodes = self._daq.listNodes(f"{serial}/awgs")
+            if device_awg_nodes:
+                self._awg_module.update(device=serial, index=0)
+            # Check if the device has Scope functionality
+            device_scope_nodes = self._daq.listNodes(f"{serial}/scope")
+            if device_scope_nodes:
+                # Check if device is UHF or MF and update the scope module
+                if self._device_type.startswith(("UHF", "MF")):
+                    self._scope_module.update_device(device=serial)
 
     def set(self, *args):
         """Wrapper around the `zi.ziDAQServer.set()` method of the API.
 
-        Passes all arguments to the underlying method.
+        Passes all arguments to the underlying method. The pushed values
+        of watched nodes are invalidated.
 
         Raises:
             ToolkitConnectionError: If the connection is not yet
@@ -149,7 +232,12 @@ class ZIConnection:
                 "The connection is not yet established.",
                 _logger.ExceptionTypes.ToolkitConnectionError,
             )
-        self._daq.set(*args)
+        with self._lock:
+            self._daq.set(*args)
+        if isinstance(args[0], str):
+            self._invalidate([args[0]])
+        else:
+            self._invalidate([node for node, _ in args[0]])
 
     def sync_set(self, *args):
         """Call one of the three `zi.ziDAQServer.syncSet...(...)` commands
@@ -171,21 +259,43 @@ class ZIConnection:
                 "The connection is not yet established.",
                 _logger.ExceptionTypes.ToolkitConnectionError,
             )
-        if isinstance(args[1], int):
-            return self._daq.syncSetInt(*args)
-        elif isinstance(args[1], float):
-            return self._daq.syncSetDouble(*args)
-        elif isinstance(args[1], str):
-            return self._daq.syncSetString(*args)
+        value = None
+        with self._lock:
+            if isinstance(args[1], int):
+                value = self._daq.syncSetInt(*args)
+            elif isinstance(args[1], float):
+                value = self._daq.syncSetDouble(*args)
+            elif isinstance(args[1], str):
+                value = self._daq.syncSetString(*args)
+        self._invalidate([args[0]])
+        return value
+
+    def set_vector(self, settings, chunk_size: int = None) -> "VectorTransfer":
+        """Sets the values of vector nodes.
+
+        Numeric vectors are sent in bulk with `daq.set(...)`, a single
+        call transfers the vectors of many nodes. The vectors are split
+        into several calls of at most *chunk_size* bytes, a vector that
+        is larger than the chunk size is sent on its own. Strings (e.g.
+        command tables) are set one by one with `daq.setVector(...)`.
+
+        Lists are converted to numpy arrays. Vectors of type int16,
+        float and complex are sent with their dtype, booleans are sent
+        as uint8 and float16 as float32.
 
-    def set_vector(self, *args):
-        """Wrapper around the `zi.ziDAQServer.setVector()` method of the API.
-
-        Passes all arguments to the underlying method.
+        Arguments:
+            settings (list): A list of node / vector pairs.
+            chunk_size (int): Maximum number of bytes sent with a single
+                `daq.set(...)` call (default: `vector_chunk_size`).
 
         Raises:
             ToolkitConnectionError: If the connection is not yet
                 established
+            TypeError: If a vector has an unsupported dtype.
+
+        Returns:
+            A :class:`VectorTransfer` with the size and the throughput
+            of the transfer.
 
         """
         if not self.established:
@@ -193,8 +303,60 @@ class ZIConnection:
                 "The connection is not yet established.",
                 _logger.ExceptionTypes.ToolkitConnectionError,
             )
-        for setting in args[0]:
-            self._daq.setVector(setting[0], setting[1])
+        if chunk_size is None:
+            chunk_size = self.vector_chunk_size
+        strings = []
+        chunks = [[]]
+        chunk_bytes = 0
+        for node, value in settings:
+            if isinstance(value, (str, bytes)):
+                strings.append((node, value))
+                continue
+            vector = self._vector(node, value)
+            if chunks[-1] and chunk_bytes + vector.nbytes > chunk_size:
+                chunks.append([])
+                chunk_bytes = 0
+            chunks[-1].append((node, vector))
+            chunk_bytes += vector.nbytes
+        transfers = []
+        with self._lock:
+            for node, value in strings:
+                self._daq.setVector(node, value)
+            for chunk in chunks:
+                if not chunk:
+                    continue
+                start_time = time.perf_counter()
+                self._daq.set(chunk)
+                transfers.append(
+                    (
+                        sum(vector.nbytes for _, vector in chunk),
+                        time.perf_counter() - start_time,
+                    )
+                )
+        self._invalidate([node for node, _ in settings])
+        return VectorTransfer(transfers)
+
+    def _invalidate(self, nodes):
+        """Invalidates the pushed values of nodes that were set."""
+        if self._subscriptions is not None:
+            self._subscriptions.invalidate(nodes)
+
+    @staticmethod
+    def _vector(node, value):
+        """Converts a value to a contiguous numpy array of a dtype
+        supported by `daq.set(...)`."""
+        vector = np.ascontiguousarray(value)
+        if vector.dtype == np.bool_:
+            vector = vector.astype(np.uint8)
+        elif vector.dtype == np.float16:
+            vector = vector.astype(np.float32)
+        if vector.dtype.kind not in "iufc":
+            _logger.error(
+                f"The vector for the node {node} has the unsupported dtype "
+                f"{vector.dtype}!",
+                _logger.ExceptionTypes.TypeError,
+            )
+        return vector.ravel()
 
     def sync(self):
         """Wrapper around the `zi.ziDAQServer.sync()` method of the API.
@@ -209,12 +371,16 @@ class ZIConnection:
                 "The connection is not yet established.",
                 _logger.ExceptionTypes.ToolkitConnectionError,
             )
-        self._daq.sync()
+        with self._lock:
+            self._daq.sync()
 
     def get(self, *args, **kwargs):
         """Wrapper around the `zi.ziDAQServer.get(...)` method of the API.
 
         Passes all arguments and keyword arguments to the underlying method.
+        Nodes watched by the :class:`SubscriptionManager` are served from
+        their latest pushed values instead, unless they were set after
+        the last value was pushed.
 
         Raises:
             ToolkitConnectionError: If the connection is not yet
@@ -229,7 +395,123 @@ class ZIConnection:
                 "The connection is not yet established.",
                 _logger.ExceptionTypes.ToolkitConnectionError,
             )
-        return self._daq.get(*args, **kwargs)
+        if self._subscriptions is not None and args:
+            # Serve watched nodes from the values pushed by the data server
+            data = self._subscriptions.get(args[0])
+            if data is not None:
+                return data
+        with self._lock:
+            return self._daq.get(*args, **kwargs)
+
+    def wait_for(
+        self,
+        conditions: dict,
+        timeout: float = 10,
+        initial_interval: float = 0.001,
+        max_interval: float = 0.1,
+    ) -> WaitResult:
+        """Waits until several nodes fulfill their conditions.
+
+        If all nodes are watched by the :class:`SubscriptionManager`,
+        the wait blocks until the data server pushes values that
+        fulfill all conditions. Otherwise all nodes are requested with
+        a single `daq.get(...)` call per poll and the interval between
+        two polls grows exponentially from *initial_interval* up to
+        *max_interval*.
+
+        Arguments:
+            conditions (dict): A dictionary with full node paths as keys
+                and either a predicate function that is called with the
+                value of the node or the expected value as values.
+            timeout (float): Maximum time in seconds to wait
+                (default: 10).
+            initial_interval (float): Time in seconds between the first
+                two polls (default: 0.001).
+            max_interval (float): Maximum time in seconds between two
+                polls (default: 0.1).
+
+        Raises:
+            ToolkitConnectionError: If the connection is not yet
+                established or no data is returned for the nodes.
+
+        Returns:
+            A :class:`WaitResult` with the outcome of the wait.
+
+        """
+        if not self.established:
+            _logger.error(
+                "The connection is not yet established.",
+                _logger.ExceptionTypes.ToolkitConnectionError,
+            )
+        predicates = {k.lower(): as_predicate(v) for k, v in conditions.items()}
+        if self._all_watched(predicates):
+            start_time = time.monotonic()
+            success = self._subscriptions.wait_all(predicates, timeout=timeout)
+            return WaitResult(success, time.monotonic() - start_time)
+        return poll_until(
+            lambda: self._fulfilled(predicates),
+            timeout=timeout,
+            initial_interval=initial_interval,
+            max_interval=max_interval,
+        )
+
+    async def await_for(
+        self,
+        conditions: dict,
+        timeout: float = 10,
+        initial_interval: float = 0.001,
+        max_interval: float = 0.1,
+    ) -> WaitResult:
+        """Asynchronous version of `wait_for(...)`.
+
+        Waits on watched nodes are woken up by the values pushed by the
+        data server. Otherwise the nodes are polled on the thread pool
+        of :mod:`aio` and the interval between two polls is awaited
+        with `asyncio.sleep(...)`.
+
+        Raises:
+            ToolkitConnectionError: If the connection is not yet
+                established or no data is returned for the nodes.
+
+        Returns:
+            A :class:`WaitResult` with the outcome of the wait.
+
+        """
+        if not self.established:
+            _logger.error(
+                "The connection is not yet established.",
+                _logger.ExceptionTypes.ToolkitConnectionError,
+            )
+        predicates = {k.lower(): as_predicate(v) for k, v in conditions.items()}
+        if self._all_watched(predicates):
+            return await aio.wait_all(self._subscriptions, predicates, timeout=timeout)
+        return await aio.poll_until(
+            lambda: self._fulfilled(predicates),
+            timeout=timeout,
+            initial_interval=initial_interval,
+            max_interval=max_interval,
+        )
+
+    def _all_watched(self, predicates) -> bool:
+        return self._subscriptions is not None and all(
+            self._subscriptions.is_watched(node) for node in predicates
+        )
+
+    def _fulfilled(self, predicates) -> bool:
+        """Gets all nodes with a single request and checks the predicates."""
+        data = self.get(", ".join(predicates.keys()), settingsonly=False, flat=True)
+        if not data:
+            _logger.error(
+                "No data returned... does the node exist?",
+                _logger.ExceptionTypes.ToolkitConnectionError,
+            )
+        values = {
+            k.lower(): SubscriptionManager._last_value(v) for k, v in data.items()
+        }
+        return all(
+            node in values and predicate(values[node])
+            for node, predicate in predicates.items()
+        )
 
     def get_sample(self, *args, **kwargs):
         """Wrapper around the `daq.getSample(...)` method of the API.
@@ -250,7 +532,8 @@ class ZIConnection:
                 "The connection is not yet established.",
                 _logger.ExceptionTypes.ToolkitConnectionError,
             )
-        return self._daq.getSample(*args, **kwargs)
+        with self._lock:
+            return self._daq.getSample(*args, **kwargs)
 
     def list_nodes(self, *args, **kwargs):
         """Wrapper around the `daq.listNodesJSON(...)` method of the API.
@@ -271,7 +554,8 @@ class ZIConnection:
                 "The connection is not yet established.",
                 _logger.ExceptionTypes.ToolkitConnectionError,
             )
-        return self._daq.listNodesJSON(*args, **kwargs)
+        with self._lock:
+            return self._daq.listNodesJSON(*args, **kwargs)
 
     @property
     def daq(self):
@@ -283,10 +567,107 @@ class ZIConnection:
         else:
             return self._daq
 
+    @property
+    def subscriptions(self):
+        """The :class:`SubscriptionManager` of the connection.
+
+        It is created on first access and opens its own data server
+        session when the first node is watched.
+
+        """
+        if not self.established:
+            _logger.error(
+                "The connection is not yet established.",
+                _logger.ExceptionTypes.ToolkitConnectionError,
+            )
+        if self._subscriptions is None:
+            self._subscriptions = SubscriptionManager(self._connection_details)
+        return self._subscriptions
+
     @property
     def awg_module(self):
         return self._awg_module
 
+    @property
+    def awg_module_pool(self):
+        """The :class:`AWGModulePool` of the connection.
+
+        It is created on first access. The awgModules of the pool are
+        separate from the shared `awg_module` and are used to compile
+        several AWG Cores in parallel (see `compile_all(...)`). The pool
+        is created again after a reconnect with `connect()`.
+
+        """
+        if not self.established:
+            _logger.error(
+                "The connection is not yet established.",
+                _logger.ExceptionTypes.ToolkitConnectionError,
+            )
+        if self._awg_module_pool is None:
+            self._awg_module_pool = AWGModulePool(self._new_awg_module)
+        return self._awg_module_pool
+
+    def _new_awg_module(self):
+        with self._lock:
+            return AWGModuleConnection(self._daq)
+
+    def daq_module_for(self, device: str) -> "DAQModuleConnection":
+        """Returns the DAQ Module of a device.
+
+        The module is created on the first call for a device and is
+        returned for every following call until the connection is
+        established again with `connect()`. It is separate from the
+        shared `daq_module` and only ever addresses this device.
+
+        Arguments:
+            device (str): The serial number of the device.
+
+        Raises:
+            ToolkitConnectionError: If the connection is not yet
+                established.
+
+        Returns:
+            The :class:`DAQModuleConnection` of the device.
+
+        """
+        return self._device_module(DAQModuleConnection, device)
+
+    def sweeper_module_for(self, device: str) -> "SweeperModuleConnection":
+        """Returns the Sweeper Module of a device.
+
+        The module is created on the first call for a device and is
+        returned for every following call until the connection is
+        established again with `connect()`. It is separate from the
+        shared `sweeper_module` and only ever addresses this device.
+
+        Arguments:
+            device (str): The serial number of the device.
+
+        Raises:
+            ToolkitConnectionError: If the connection is not yet
+                established.
+
+        Returns:
+            The :class:`SweeperModuleConnection` of the device.
+
+        """
+        return self._device_module(SweeperModuleConnection, device)
+
+    def _device_module(self, module_type, device: str):
+        if not self.established:
+            _logger.error(
+                "The connection is not yet established.",
+                _logger.ExceptionTypes.ToolkitConnectionError,
+            )
+        key = (module_type.__name__, device.lower())
+        with self._lock:
+            module = self._device_modules.get(key)
+            if module is None:
+                module = module_type(self._daq)
+                module.update_device(device)
+                self._device_modules[key] = module
+            return module
+
     @property
     def scope_module(self):
         return self._scope_module
@@ -343,6 +724,51 @@ class AWGModuleConnection:
         self.update(**kwargs)
         return self._awgModule.getString(*args)
 
+    def finish(self):
+        self._awgModule.finish()
+
+    def clear(self):
+        self._awgModule.clear()
+
+    def read_elf(self) -> bytes:
+        """Reads the ELF file written by the last compilation.
+
+        Returns:
+            The content of the ELF file or `None` if it is not found.
+
+        """
+        path = self._elf_path(self.get_string("elf/file"))
+        try:
+            with open(path, "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def upload_elf(self, data: bytes, filename: str) -> None:
+        """Uploads an ELF file without compiling a program.
+
+        The ELF file is written to the ELF directory of the module and
+        its upload to the selected AWG is started.
+
+        Arguments:
+            data (bytes): The content of the ELF file.
+            filename (str): Name of the file in the ELF directory.
+
+        """
+        path = self._elf_path(filename)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(data)
+        self._awgModule.set("elf/file", filename)
+        self._awgModule.set("elf/upload", 1)
+
+    def elf_upload_done(self) -> bool:
+        return self._awgModule.getInt("elf/upload") == 0
+
+    def _elf_path(self, filename: str) -> str:
+        directory = self._awgModule.getString("directory")
+        return os.path.join(directory, "awg", "elf", filename)
+
     def update(self, **kwargs):
         if "device" in kwargs.keys():
             self._update_device(kwargs["device"])
@@ -369,6 +795,115 @@ class AWGModuleConnection:
         return self._device
 
 
+class AWGModulePool:
+    """A pool of awgModules for concurrent compilations.
+
+    A single awgModule can only compile the program of one AWG Core at
+    a time. The pool hands out a separate :class:`AWGModuleConnection`
+    to every concurrent compilation. The awgModules are created on
+    demand up to the size of the pool and are reused afterwards. If all
+    of them are in use, `acquire()` blocks until one is released.
+
+        >>> pool = connection.awg_module_pool
+        >>> with pool.module() as module:
+        ...     module.update(device="dev8030", index=1)
+        ...     module.set("compiler/sourcestring", seqc)
+
+    Arguments:
+        factory (Callable): A function without arguments that creates a
+            new :class:`AWGModuleConnection`.
+        size (int): Maximum number of awgModules in the pool
+            (default: 4).
+
+    Properties:
+        size (int): Maximum number of awgModules in the pool.
+        created (int): Number of awgModules created so far.
+
+    """
+
+    def __init__(self, factory, size: int = 4) -> None:
+        if size < 1:
+            _logger.error(
+                "The size of the awgModule pool must be at least 1.",
+                _logger.ExceptionTypes.ValueError,
+            )
+        self._factory = factory
+        self._size = size
+        self._created = 0
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> AWGModuleConnection:
+        """Takes an awgModule from the pool.
+
+        Returns:
+            An idle :class:`AWGModuleConnection`, a new one if none is
+            idle and the pool is not full yet.
+
+        """
+        while True:
+            try:
+                return self._idle.get_nowait()
+            except queue.Empty:
+                pass
+            with self._lock:
+                create = self._created < self._size
+                if create:
+                    self._created += 1
+            if create:
+                try:
+                    return self._factory()
+                except Exception:
+                    with self._lock:
+                        self._created -= 1
+                    raise
+            try:
+                return self._idle.get(timeout=0.1)
+            except queue.Empty:
+                # Check again in case the creation of a module failed
+                continue
+
+    def release(self, module: AWGModuleConnection) -> None:
+        """Returns an awgModule taken with `acquire()` to the pool.
+
+        Arguments:
+            module (AWGModuleConnection): The awgModule to be returned.
+
+        """
+        self._idle.put(module)
+
+    def close(self) -> list:
+        """Removes the idle awgModules from the pool.
+
+        Returns:
+            The list of the removed :class:`AWGModuleConnection` s.
+
+        """
+        modules = []
+        while True:
+            try:
+                modules.append(self._idle.get_nowait())
+            except queue.Empty:
+                return modules
+
+    @contextmanager
+    def module(self):
+        """Context manager that acquires and releases an awgModule."""
+        module = self.acquire()
+        try:
+            yield module
+        finally:
+            self.release(module)
+
+    @property
+    def size(self):
+        return self._size
+
+    @property
+    def created(self):
+        return self._created
+
+
 class ScopeModuleConnection:
     """Connection to a Scope Module.
 
@@ -589,6 +1124,10 @@ class DeviceConnection(object):
             data server is established.
         is_connected (bool): A flag that shows if the instrument is
             connected to the data server.
+        in_batch (bool): A flag that shows if set commands are currently
+            buffered instead of being sent to the data server.
+        cache (NodeValueCache): The cache for the values of the setting
+            nodes of the device.
 
     """
 
@@ -599,6 +1138,10 @@ class DeviceConnection(object):
         self._discovery = discovery
         self._is_established = False
         self._is_connected = False
+        self._batch_snapshots = []
+        self._batch_settings = {}
+        self._batch_sync = False
+        self._cache = NodeValueCache(self._node_dict)
 
     def setup(self, connection: ZIConnection = None):
         """Establishes the connection to the data server.
@@ -675,6 +1218,9 @@ class DeviceConnection(object):
         and the data server will be performed automatically using
         `daq.sync()` in :mod:`zhinst.ziPython`.
 
+        Inside a batch (see `begin_batch()`) the settings are only
+        buffered and nothing is returned.
+
         Arguments:
             sync (bool): A flag that specifies if a synchronisation
                 should be performed between the device and the data
@@ -694,15 +1240,26 @@ class DeviceConnection(object):
         # If just a single node/value pair is provided
         if len(args) == 2:
             settings = self._commands_to_node([(args[0], args[1])])
+            if self.in_batch:
+                self._buffer(settings, sync=sync)
+                return
             # Check if synchronisation is enabled
             if sync:
                 # Return the value returned by API
-                return self._connection.sync_set(*settings[0])
+                value = self._connection.sync_set(*settings[0])
+                self._cache.invalidate(settings[0][0])
+                self._cache.update(settings[0][0], value)
+                return value
             else:
+                self._invalidate_cache(settings)
                 self._connection.set(settings)
         # If a list of node/value tuples is provided
         elif len(args) == 1:
             settings = self._commands_to_node(args[0])
+            if self.in_batch:
+                self._buffer(settings, sync=sync)
+                return
+            self._invalidate_cache(settings)
             self._connection.set(settings)
             if sync:
                 self.sync()
@@ -717,13 +1274,18 @@ class DeviceConnection(object):
 
         Parses the input arguments to either set a single node/vector
         pair or a list of node/vector tuples. Eventually wraps around
-        the daq.setVector(...) of the API.
+        `ZIConnection.set_vector(...)`, which sends numeric vectors in
+        bulk with `daq.set(...)`.
 
         Raises:
             TypeError: If is the input arguments are invalid.
             ToolkitConnectionError: If the device is not connected to
                 the Data Server
 
+        Returns:
+            The :class:`VectorTransfer` of the bulk transfer or `None`
+            if the vectors are buffered in a batch.
+
         """
         settings = []
         if len(args) == 2:
@@ -736,7 +1298,109 @@ class DeviceConnection(object):
                 _logger.ExceptionTypes.TypeError,
             )
         settings = self._commands_to_node(settings)
-        self._connection.set_vector(settings)
+        if self.in_batch:
+            self._buffer(settings, vector=True)
+            return None
+        self._invalidate_cache(settings)
+        return self._connection.set_vector(settings)
+
+    def begin_batch(self):
+        """Starts buffering all set commands of the device.
+
+        Until the matching `end_batch()` is called, all calls of
+        `set(...)` and `set_vector(...)` are buffered instead of being
+        sent to the data server. Batches can be nested, only the
+        outermost batch sends the buffered settings.
+
+        """
+        self._batch_snapshots.append((dict(self._batch_settings), self._batch_sync))
+
+    def end_batch(self, sync=False, discard=False):
+        """Ends buffering of set commands.
+
+        If the outermost batch is ended, all buffered settings are
+        sent to the data server with a single `daq.set(...)` call. The
+        buffered vectors are sent with `ZIConnection.set_vector(...)`,
+        which normalises their data type and splits them into chunks.
+        Repeated writes to the same node are de-duplicated and only the
+        last value is set. A single global synchronisation is performed
+        afterwards if requested by any of the buffered set commands or
+        by the *sync* flag.
+
+        Arguments:
+            sync (bool): A flag that specifies if a synchronisation
+                should be performed between the device and the data
+                server after sending the settings (default: False).
+            discard (bool): A flag that specifies if the settings
+                buffered since the matching `begin_batch()` are dropped
+                instead of being sent. The settings of enclosing batches
+                are kept (default: False).
+
+        Raises:
+            ToolkitConnectionError: If no batch was started or the
+                device is not connected to the Data Server
+
+        """
+        if not self.in_batch:
+            _logger.error(
+                "No batch of set commands was started.",
+                _logger.ExceptionTypes.ToolkitConnectionError,
+            )
+        snapshot = self._batch_snapshots.pop()
+        if discard:
+            self._batch_settings, self._batch_sync = snapshot
+            return
+        self._batch_sync = self._batch_sync or sync
+        if self.in_batch:
+            return
+        buffered, self._batch_settings = self._batch_settings, {}
+        sync, self._batch_sync = self._batch_sync, False
+        settings = []
+        vector_settings = []
+        for node, (value, vector) in buffered.items():
+            if vector:
+                vector_settings.append((node, value))
+            else:
+                settings.append((node, value))
+        self._invalidate_cache(settings + vector_settings)
+        if settings:
+            self._connection.set(settings)
+        if vector_settings:
+            self._connection.set_vector(vector_settings)
+        if sync and buffered:
+            self.sync()
+
+    def buffered_value(self, command: str, default=None):
+        """Returns the value buffered for a node in the current batch.
+
+        Arguments:
+            command (str): The node path, with or without the serial of
+                the device.
+            default: The value returned if the node is not buffered
+                (default: None).
+
+        Returns:
+            The last value set for the node inside the batch or the
+            default value.
+
+        """
+        value, _ = self._batch_settings.get(
+            self.command_to_node(command), (default, False)
+        )
+        return value
+
+    def _buffer(self, settings, sync=False, vector=False):
+        """Adds node/value pairs to the buffer of the current batch.
+
+        A node that is already buffered is moved to the end of the
+        buffer so the order of the buffered settings follows the order
+        of the last writes.
+
+        """
+        for node, value in settings:
+            self._batch_settings.pop(node, None)
+            self._batch_settings[node] = (value, vector)
+        self._batch_sync = self._batch_sync or sync
 
     def sync(self):
         """Perform a global synchronisation between the device and the
@@ -783,6 +1447,12 @@ class DeviceConnection(object):
                 node_string = ", ".join([p for p in paths])
             elif isinstance(command, str):
                 node_string = self.command_to_node(command)
+                found, value = self._cache.get(node_string)
+                if found:
+                    if valueonly:
+                        return value
+                    key = node_string.replace(f"/{self._normalized_serial}/", "")
+                    return {key: value}
             else:
                 _logger.error(
                     "Invalid argument! It must be either a node path string or "
@@ -791,6 +1461,7 @@ class DeviceConnection(object):
                 )
             if (
                 self._device.device_type in [DeviceTypes.UHFLI, DeviceTypes.MFLI]
+                and isinstance(command, str)
                 and "sample" in command.lower()
             ):
                 data = self._connection.get_sample(node_string)
@@ -798,6 +1469,11 @@ class DeviceConnection(object):
             else:
                 data = self._connection.get(node_string, settingsonly=False, flat=True)
             data = self._get_value_from_dict(data)
+            if self._cache.enabled:
+                for key, value in data.items():
+                    if not key.startswith("/"):
+                        key = f"/{self._normalized_serial}/{key}"
+                    self._cache.update(key, value)
             if valueonly:
                 if len(data) > 1:
                     return [v for v in data.values()]
@@ -811,6 +1487,64 @@ class DeviceConnection(object):
                 _logger.ExceptionTypes.ToolkitConnectionError,
             )
 
+    def wait_for(self, conditions: dict, **kwargs):
+        """Waits until several nodes of the device fulfill their conditions.
+
+        Adds the device serial in front of every node and passes the
+        conditions to the `wait_for(...)` method of the
+        :class:`ZIConnection`. The conditions are evaluated with the
+        values returned from the data server, the value cache is not
+        used.
+
+        Arguments:
+            conditions (dict): A dictionary with node strings as keys
+                and either a predicate function or the expected value
+                as values.
+
+        Keyword Arguments:
+            timeout, initial_interval, max_interval: Passed on to
+                `ZIConnection.wait_for(...)`.
+
+        Raises:
+            ToolkitConnectionError: If the device is not connected to
+                the Data Server
+
+        Returns:
+            A :class:`WaitResult` with the outcome of the wait.
+
+        """
+        conditions = {self.command_to_node(k): v for k, v in conditions.items()}
+        return self.connection.wait_for(conditions, **kwargs)
+
+    async def aget(self, command, valueonly=True):
+        """Asynchronous version of `get(...)`.
+
+        The request is run on the thread pool of :mod:`aio`.
+
+        """
+        return await aio.run_blocking(self.get, command, valueonly=valueonly)
+
+    async def aset(self, *args, sync=False):
+        """Asynchronous version of `set(...)`.
+
+        The request is run on the thread pool of :mod:`aio`.
+
+        """
+        return await aio.run_blocking(self.set, *args, sync=sync)
+
+    async def aset_vector(self, *args):
+        """Asynchronous version of `set_vector(...)`.
+
+        The request is run on the thread pool of :mod:`aio`.
+
+        """
+        return await aio.run_blocking(self.set_vector, *args)
+
+    async def await_for(self, conditions: dict, **kwargs):
+        """Asynchronous version of `wait_for(...)`."""
+        conditions = {self.command_to_node(k): v for k, v in conditions.items()}
+        return await self.connection.await_for(conditions, **kwargs)
+
     def get_nodetree(self, prefix: str, **kwargs):
         """Gets the entire nodetree of the connected device.
 
@@ -831,6 +1565,16 @@ class DeviceConnection(object):
         """
         return json.loads(self._connection.list_nodes(prefix, **kwargs))
 
+    def _node_dict(self, node):
+        """Gets the node dictionary of a device node for the cache."""
+        return self._device._get_node_dict_resolver().node_dict(node)
+
+    def _invalidate_cache(self, settings):
+        """Removes the nodes of node/value pairs from the cache."""
+        if self._cache.enabled:
+            for node, _ in settings:
+                self._cache.invalidate(node)
+
     def _get_value_from_dict(self, data):
         """Retrieves the parameter value from the returned dict of the API.
 
@@ -997,3 +1741,11 @@ class DeviceConnection(object):
     @property
     def is_connected(self):
         return self._is_connected
+
+    @property
+    def cache(self):
+        return self._cache
+
+    @property
+    def in_batch(self):
+        return bool(self._batch_snapshots)
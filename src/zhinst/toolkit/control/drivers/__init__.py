@@ -7,7 +7,7 @@
 This package is a collection of high level controllers for Zurich
 Instruments devices.
 """
-from .base import BaseInstrument
+from .base import BaseInstrument, CompileReport, compile_all
 from .hdawg import HDAWG
 from .uhfqa import UHFQA
 from .uhfli import UHFLI
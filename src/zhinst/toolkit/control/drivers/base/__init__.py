@@ -1,4 +1,4 @@
-from .awg import AWGCore
+from .awg import AWGCore, CompileReport, compile_all
 from .scope import Scope
 from .shf_qachannel import SHFQAChannel
 from .shf_generator import SHFGenerator
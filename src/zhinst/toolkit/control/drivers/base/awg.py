@@ -5,18 +5,54 @@
 
 import numpy as np
 import time
-from typing import List, Union
-import re
-
-from zhinst.toolkit.helpers import SequenceProgram, Waveform, SequenceType, TriggerMode
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Union
+
+import attr
+
+from zhinst.toolkit.helpers import (
+    SequenceProgram,
+    Waveform,
+    SequenceType,
+    TriggerMode,
+    pack_waveforms,
+)
 from .base import BaseInstrument
+from .compiler import CompileReport, SequencerCompiler
 from zhinst.toolkit.interface import LoggerModule
 from ...parsers import Parse
 
 _logger = LoggerModule(__name__)
 
 
-class AWGCore:
+@attr.s(frozen=True)
+class UploadReport:
+    """The outcome of uploading the waveform queue of an AWG Core.
+
+    Attributes:
+        uploaded (int): Number of waveforms sent to the device.
+        skipped (int): Number of unchanged waveforms that were not sent.
+        uploaded_bytes (int): Size in bytes of the waveform data sent.
+        skipped_bytes (int): Size in bytes of the unchanged waveform
+            data that was not sent.
+        elapsed (float): Time in seconds spent uploading.
+        shared (int): Number of waveforms that were not sent because
+            they share a placeholder with an identical waveform.
+        shared_bytes (int): Size in bytes of the waveform data that was
+            not sent because it shares a placeholder.
+
+    """
+
+    uploaded = attr.ib(type=int)
+    skipped = attr.ib(type=int)
+    uploaded_bytes = attr.ib(type=int)
+    skipped_bytes = attr.ib(type=int)
+    elapsed = attr.ib(type=float)
+    shared = attr.ib(type=int, default=0)
+    shared_bytes = attr.ib(type=int, default=0)
+
+
+class AWGCore(SequencerCompiler):
     """Implements an AWG Core representation.
 
     The :class:`AWGCore` class implements basic functionality of the AWG
@@ -99,12 +135,21 @@ class AWGCore:
         self._parent = parent
         self._index = index
         self._module = None
+        self._loaded_program = None
+        self._uploaded_waveforms = {}
         self._waveforms = []
+        self._wave_indices = None
         self._program = SequenceProgram()
         self.set_sequence_params(target=self._parent.device_type)
 
     def _setup(self):
         self._module = self._parent._controller.connection.awg_module
+        self._reset_uploads()
+
+    def _reset_uploads(self) -> None:
+        """Forgets the waveforms uploaded to the AWG Core, e.g. after
+        a factory reset, so that the next upload sends all of them."""
+        self._uploaded_waveforms = {}
 
     def _init_awg_params(self):
         """Initialize parameters associated with device AWG nodes.
@@ -163,7 +208,8 @@ class AWGCore:
 
         """
         if value is None:
-            output_states = (self.output1(), self.output2())
+            values = self._parent.get_many([self.output1, self.output2])
+            output_states = (values[self.output1], values[self.output2])
             return Parse.get_on_off_tuple_list(output_states, 2)
         else:
             output_states = Parse.set_on_off_tuple_list(value, 2)
@@ -198,7 +244,7 @@ class AWGCore:
         Arguments:
             timeout (float): The maximum waiting time in seconds for the
                 AWG Core (default: 10).
-            sleep_time (float): Time in seconds to wait between
+            sleep_time (float): Maximum time in seconds to wait between
                 requesting AWG state
 
         Raises:
@@ -211,78 +257,92 @@ class AWGCore:
                 "The AWG is running in continuous mode, it will never be finished.",
                 _logger.ExceptionTypes.ToolkitError,
             )
-        start_time = time.time()
-        while self.is_running and start_time + timeout >= time.time():
-            time.sleep(sleep_time)
-        if self.is_running and start_time + timeout < time.time():
+        if not self._parent.wait_for(
+            {self._enable: False}, timeout=timeout, max_interval=sleep_time
+        ):
             _logger.error(
                 "AWG Core timed out!",
                 _logger.ExceptionTypes.TimeoutError,
             )
 
-    def compile(self) -> None:
-        """Compiles the current SequenceProgram on the AWG Core.
+    async def await_done(self, timeout: float = 10, sleep_time: float = 0.005) -> None:
+        """Asynchronous version of `wait_done(...)`.
+
+            >>> await asyncio.gather(hd.awgs[0].await_done(), hd.awgs[1].await_done())
 
         Raises:
-            ToolkitConnectionError: If the AWG Core has not been set up
-                yet
-            ToolkitError: if the compilation has failed or the ELF
-                upload is not successful.
-            TimeoutError: if the program upload is not completed before
-                timeout.
+            ToolkitError: If the AWG is running in continuous mode.
+            TimeoutError: If the AWG is not finished before the timeout.
 
         """
+        if not await self.single.aget():
+            _logger.error(
+                "The AWG is running in continuous mode, it will never be finished.",
+                _logger.ExceptionTypes.ToolkitError,
+            )
+        if not await self._parent.await_for(
+            {self._enable: False}, timeout=timeout, max_interval=sleep_time
+        ):
+            _logger.error(
+                "AWG Core timed out!",
+                _logger.ExceptionTypes.TimeoutError,
+            )
+
+    def _check_module(self) -> None:
         if self._module is None:
             _logger.error(
                 "This AWG is not connected to an awgModule!",
                 _logger.ExceptionTypes.ToolkitConnectionError,
             )
-        self._module.update(device=self._parent.serial)
-        self._module.update(index=self._index)
+
+    def _instrument(self) -> BaseInstrument:
+        return self._parent
+
+    def _elf_checksum_node(self) -> str:
+        return f"awgs/{self._index}/elf/checksum"
+
+    def _sequencer_program(self) -> str:
+        """Returns the sequencer program to be compiled."""
         if self._program.sequence_type == SequenceType.SIMPLE:
             buffer_lengths = [w.buffer_length for w in self._waveforms]
             delays = [w.delay for w in self._waveforms]
-            self.set_sequence_params(buffer_lengths=buffer_lengths, delay_times=delays)
-        seqc_program = self._program.get_seqc()
-        self._module.set("compiler/sourcestring", seqc_program)
-        compiler_status = self._module.get_int("compiler/status")
-        while compiler_status == -1:
-            time.sleep(0.1)
-            compiler_status = self._module.get_int("compiler/status")
-        statusstring = self._module.get_string("compiler/statusstring")
-        if compiler_status == 1:
-            _logger.error(
-                f"Please check the sequencer code for {self.name}:\n"
-                f"{self._seqc_error(statusstring)}"
-                f"Compiler status string:\n{statusstring}\n",
-                _logger.ExceptionTypes.ToolkitError,
-            )
-        elif compiler_status == 2:
-            _logger.warning(
-                f"Please check the sequencer code for {self.name}:\n"
-                f"{self._seqc_error(statusstring)}"
-                f"Compiler status string:\n{statusstring}\n",
+            params = self.sequence_params["sequence_parameters"]
+            self._wave_indices = None
+            if params["share_placeholders"]:
+                self._wave_indices = self._shared_wave_indices()
+            self.set_sequence_params(
+                buffer_lengths=buffer_lengths,
+                delay_times=delays,
+                wave_indices=self._wave_indices,
             )
-        elif compiler_status == 0:
-            _logger.info(f"{self.name}: Compilation successful")
-        tik = time.time()
-        while (self._module.get_double("progress") < 1.0) and (
-            self._module.get_int("/elf/status") != 1
+        return self._program.get_seqc()
+
+    def _shared_wave_indices(self) -> List[int]:
+        """Assigns the same placeholder index to identical waveforms."""
+        indices = {}
+        return [indices.setdefault(w.checksum, len(indices)) for w in self._waveforms]
+
+    def _upload_slots(self) -> Dict[int, Waveform]:
+        """Maps the placeholder indices of the compiled program to the
+        waveforms uploaded to them."""
+        indices = self._wave_indices
+        if (
+            self._program.sequence_type != SequenceType.SIMPLE
+            or indices is None
+            or len(indices) != len(self._waveforms)
         ):
-            time.sleep(0.1)
-            if time.time() - tik >= 100:  # 100s timeout
+            indices = range(len(self._waveforms))
+        slots = {}
+        for i, (index, w) in enumerate(zip(indices, self._waveforms)):
+            if slots.setdefault(index, w).checksum != w.checksum:
                 _logger.error(
-                    f"{self.name}: Program upload timed out!",
-                    _logger.ExceptionTypes.TimeoutError,
+                    f"The waveform {i} shares a placeholder with another "
+                    f"waveform in the compiled sequence program but is no "
+                    f"longer identical to it, the program needs to be compiled "
+                    f"again!",
+                    _logger.ExceptionTypes.ToolkitError,
                 )
-        elf_status = self._module.get_int("/elf/status")
-        if elf_status == 0:
-            _logger.info(f"{self.name}: Sequencer status: ELF file uploaded!")
-        else:
-            _logger.error(
-                f"{self.name}: Sequencer status: ELF upload failed!",
-                _logger.ExceptionTypes.ToolkitError,
-            )
+        return slots
 
     def reset_queue(self) -> None:
         """Resets the waveform queue to an empty list."""
@@ -290,8 +350,8 @@ class AWGCore:
 
     def queue_waveform(
         self,
-        wave1: Union[List, np.array],
-        wave2: Union[List, np.array],
+        wave1: Union[List, np.array, str],
+        wave2: Union[List, np.array, str],
         delay: float = 0,
     ) -> None:
         """Queues up a waveform to the *AWG Core*.
@@ -305,13 +365,25 @@ class AWGCore:
         individual waveform with respect to the time origin of the
         period.
 
+        Very long waveforms can be given as a memory map (`np.memmap`)
+        or as the path to a `.npy` file or to a raw file of int16
+        samples. The file is memory mapped and only read chunk by chunk
+        while the samples are scaled into the upload buffer.
+
+        In a *'Simple'* sequence with `share_placeholders=True`,
+        identical waveforms share a single placeholder.
+
+            >>> awg.queue_waveform("long_wave.npy", np.memmap("iq.bin", dtype="int16"))
+
         Arguments:
             wave1 (array like): A list or array of samples in the
                 waveform to be queued for channel 1. An empty list '[]'
-                will upload zeros of the minimum waveform length.
+                will upload zeros of the minimum waveform length. A
+                memory map or a file path is accepted as well.
             wave2 (array like): A list or array of samples in the
                 waveform to be queued for channel 2. An empty list '[]'
-                will upload zeros of the minimum waveform length.
+                will upload zeros of the minimum waveform length. A
+                memory map or a file path is accepted as well.
             delay (float): An individual delay for the queued sequence
                 with respect to the time origin. Positive values shift
                 the start of the waveform forwards in time. (default: 0)
@@ -368,30 +440,93 @@ class AWGCore:
             )
         self._waveforms[i].replace_data(wave1, wave2, delay=delay)
 
-    def upload_waveforms(self) -> None:
+    def upload_waveforms(self, force: bool = False) -> UploadReport:
         """Uploads all waveforms in the queue to the AWG Core.
 
         This method only works as expected if the Sequence Program is in
         'Simple' or 'Custom' modes and has been compiled beforehand.
         See :func:`compile_and_upload_waveforms(...)`.
+
+        Only waveforms that changed since they were last uploaded are
+        sent to the device. All waveforms are sent again after the
+        sequence program was compiled. Identical waveforms in a
+        *'Simple'* sequence with `share_placeholders=True` share a
+        placeholder and are uploaded once.
+
+        The waveforms are looked up in the `waveform_library` of the
+        instrument first, only the data of new and distinct waveforms is
+        calculated and packed. Identical waveforms share their data.
+
+        Arguments:
+            force (bool): A flag that specifies if all waveforms are
+                uploaded even if they did not change (default: False).
+
+        Raises:
+            ToolkitError: If waveforms that share a placeholder in the
+                compiled sequence program are no longer identical.
+
+        Returns:
+            An :class:`UploadReport` with the number and size of the
+            uploaded and skipped waveforms.
+
         """
-        waveform_data = [w.data for w in self._waveforms]
-        nodes = [
-            f"awgs/{self._index}/waveform/waves/{i}" for i in range(len(waveform_data))
+        self._parent._check_connected()
+        library = self._parent.waveform_library
+        distinct = {}
+        for w in self._waveforms:
+            if not library.find(w):
+                distinct.setdefault(w.checksum, w)
+        pack_waveforms(list(distinct.values()))
+        for w in self._waveforms:
+            library.add(w)
+        slots = self._upload_slots()
+        changed = [
+            (i, w)
+            for i, w in slots.items()
+            if force or self._uploaded_waveforms.get(i) != w.checksum
         ]
+        nodes = [f"awgs/{self._index}/waveform/waves/{i}" for i, _ in changed]
+        waveform_data = [w.data for _, w in changed]
         tok = time.time()
-        self._parent._set(zip(nodes, waveform_data))
+        if changed:
+            self._parent._set_vector(zip(nodes, waveform_data))
         tik = time.time()
-        print(f"Upload of {len(waveform_data)} waveforms took {tik - tok:.5} s")
-
-    def compile_and_upload_waveforms(self) -> None:
+        for i, w in changed:
+            self._uploaded_waveforms[i] = w.checksum
+        uploaded_bytes = sum(data.nbytes for data in waveform_data)
+        slot_bytes = sum(w.data.nbytes for w in slots.values())
+        total_bytes = sum(w.data.nbytes for w in self._waveforms)
+        report = UploadReport(
+            uploaded=len(changed),
+            skipped=len(slots) - len(changed),
+            uploaded_bytes=uploaded_bytes,
+            skipped_bytes=slot_bytes - uploaded_bytes,
+            elapsed=tik - tok,
+            shared=len(self._waveforms) - len(slots),
+            shared_bytes=total_bytes - slot_bytes,
+        )
+        print(
+            f"Upload of {report.uploaded} waveforms took {report.elapsed:.5} s, "
+            f"{report.skipped} unchanged waveforms ({report.skipped_bytes} bytes) "
+            f"skipped"
+        )
+        return report
+
+    def compile_and_upload_waveforms(self, force: bool = False) -> None:
         """Compiles the Sequence Program and uploads the queued waveforms.
 
         Simply combines the two methods to make sure the sequence is compiled
-        before the waveform queue is uplaoded.
+        before the waveform queue is uplaoded. If the sequencer program
+        did not change, only the waveforms are uploaded.
+
+        Arguments:
+            force (bool): A flag that specifies if the program and the
+                waveforms are uploaded even if they did not change
+                (default: False).
+
         """
-        self.compile()
-        self.upload_waveforms()
+        self.compile(force=force)
+        self.upload_waveforms(force=force)
 
     def set_sequence_params(self, **kwargs) -> None:
         """Sets the parameters of the *Sequence Program*.
@@ -457,24 +592,81 @@ class AWGCore:
                     _logger.ExceptionTypes.ToolkitError,
                 )
 
-    def _seqc_error(self, statusstring):
-        """Extract the relevant lines from seqc program in case of error.
 
-        This method extracts the line number from the compiler status
-        and then finds the relevant lines in the seqc program to guide
-        the user. It works both for errors and warnings.
-        """
-        seqc_error = "\n"
-        seqc = self._program.get_seqc().splitlines()
-        pattern = "line: (.*?)\):"
-        num_error_line = int(re.search(pattern, statusstring).group(1))
-        start_line = max(0, num_error_line - 4)
-        stop_line = min(len(seqc), num_error_line + 1)
-        number_width = len(str(stop_line + 1))
-        for i, line in enumerate(seqc[start_line:stop_line], start=start_line):
-            if i + 1 == num_error_line:
-                seqc_error += f"-> {i + 1: >{number_width}}   {line.strip()}\n"
-            else:
-                seqc_error += f"   {i + 1: >{number_width}}   {line.strip()}\n"
-        seqc_error += "\n"
-        return seqc_error
+def compile_all(
+    cores: List, max_workers: int = None, force: bool = False
+) -> Dict[str, CompileReport]:
+    """Compiles the programs of several AWG Cores in parallel.
+
+    Each concurrent compilation takes its own awgModule from the
+    :class:`AWGModulePool` of the data server connection of the AWG
+    Core, so the compilations and ELF uploads of e.g. the four cores of
+    an HDAWG and the AWG of a UHFQA overlap instead of running one
+    after the other on the shared awgModule. A core that fails to
+    compile does not abort the others, it is reported.
+
+        >>> reports = tk.compile_all([*hdawg.awgs, uhfqa.awg])
+        >>> reports["hdawg-awg-0"].compile_time, reports["hdawg-awg-0"].upload_time
+        (0.412, 0.087)
+
+    Arguments:
+        cores (list): The AWG Cores (:class:`AWGCore` or
+            :class:`SHFGenerator`) to be compiled.
+        max_workers (int): Maximum number of cores that are compiled at
+            the same time, additionally limited by the size of the
+            :class:`AWGModulePool` (default: number of cores).
+        force (bool): A flag that specifies if the programs are
+            compiled and uploaded even if they are already loaded on
+            the AWG Cores (default: False).
+
+    Raises:
+        ToolkitConnectionError: If an AWG Core has not been set up yet
+        ToolkitError: If an AWG Core is passed more than once
+
+    Returns:
+        A dictionary with the names of the AWG Cores as keys and a
+        :class:`CompileReport` for every core as values.
+
+    """
+    for core in cores:
+        core._check_module()
+    names = [core.name for core in cores]
+    if len(set(names)) != len(names):
+        _logger.error(
+            "Every AWG Core can only be passed once to `compile_all(...)`!",
+            _logger.ExceptionTypes.ToolkitError,
+        )
+    if not cores:
+        return {}
+    with ThreadPoolExecutor(
+        max_workers=max(1, max_workers or len(cores)),
+        thread_name_prefix="zhinst-toolkit-compile",
+    ) as executor:
+        futures = [executor.submit(_compile_from_pool, core, force) for core in cores]
+    reports = {}
+    for core, future in zip(cores, futures):
+        report = future.result()
+        reports[core.name] = report
+        if report.skipped:
+            _logger.info(f"{report.name}: Program unchanged, compilation skipped")
+        elif report.success:
+            _logger.info(
+                f"{report.name}: Compiled in {report.compile_time:.2f} s, "
+                f"uploaded in {report.upload_time:.2f} s."
+            )
+        else:
+            _logger.warning(f"Failed to compile {report.name}: {report.error}")
+    return reports
+
+
+def _compile_from_pool(core, force: bool) -> CompileReport:
+    with core._module_pool().module() as module:
+        try:
+            return core._compile(module, force=force)
+        except Exception as e:
+            try:
+                status = module.get_int("compiler/status")
+                statusstring = module.get_string("compiler/statusstring")
+            except Exception:
+                status, statusstring = None, ""
+            return CompileReport(core.name, None, None, status, statusstring, e)
@@ -10,12 +10,17 @@ our Python API ziPython and forms the basis for instrument drivers used
 in QCoDeS and Labber.
 """
 
-from typing import Dict
-import time
+from contextlib import contextmanager
+from typing import Dict, List
 import zhinst.ziPython as zi
 
+from zhinst.toolkit.control import aio
 from zhinst.toolkit.control.connection import DeviceConnection, ZIConnection
-from zhinst.toolkit.control.node_tree import NodeTree
+from zhinst.toolkit.control.elf_cache import ELFCache
+from zhinst.toolkit.control.node_tree import NodeTree, NodeDictResolver
+from zhinst.toolkit.control.node_tree_cache import NodeTreeCache
+from zhinst.toolkit.control.waiting import WaitResult, as_predicate
+from zhinst.toolkit.helpers import WaveformLibrary
 from zhinst.toolkit.interface import InstrumentConfiguration, DeviceTypes, LoggerModule
 from zhinst.toolkit.control.node_tree import Parameter
 from zhinst.toolkit.control.parsers import Parse
@@ -53,6 +58,34 @@ class BaseInstrument:
             The serial number can be found on instrument back panel.
         discovery: An instance of ziDiscovery to lookup the device
 
+    Keyword Arguments:
+        nodetree_cache (str or :class:`NodeTreeCache`): A directory or
+            a :class:`NodeTreeCache` used to persist the parsed nodetree
+            on disk. On a reconnect the nodetree is then loaded from
+            the cache instead of being retrieved from the device as
+            long as the device type, firmware, FPGA revision and
+            options did not change (default: None).
+        lazy_nodetree (bool): A flag that specifies if the
+            :class:`Nodes` and :class:`Parameters` of the
+            :class:`NodeTree` are only created when they are accessed
+            for the first time (default: False).
+        cache (bool): A flag that specifies if the values of setting
+            nodes are cached in memory and served from the cache
+            instead of being read from the data server again. The
+            cache is available as the `cache` attribute of the
+            instrument (default: False).
+        elf_cache (str or :class:`ELFCache`): A directory or an
+            :class:`ELFCache` used to store the ELF files compiled for
+            the AWG Cores of the instrument. A program that was compiled
+            before for the same device type, AWG Core, firmware and
+            options is uploaded from the cache without compiling it
+            again (default: None).
+        waveform_library (:class:`WaveformLibrary`): The library that
+            holds the data of the waveforms queued on the AWG Cores of
+            the instrument. Identical waveforms share their data. The
+            devices of a :class:`MultiDeviceConnection` share one
+            library (default: a new :class:`WaveformLibrary`).
+
     Attributes:
         nodetree (:class:`zhinst.toolkit.control.node_tree.NodeTree`):
             A :class:`Nodetree` object contains a data structure that
@@ -96,6 +129,18 @@ class BaseInstrument:
             self, discovery if discovery is not None else zi.ziDiscovery()
         )
         self._nodetree = None
+        self._nodetree_cache = kwargs.get("nodetree_cache", None)
+        if isinstance(self._nodetree_cache, str):
+            self._nodetree_cache = NodeTreeCache(self._nodetree_cache)
+        self._lazy_nodetree = kwargs.get("lazy_nodetree", False)
+        self._node_dict_resolver = None
+        self._controller.cache.enabled = kwargs.get("cache", False)
+        self._elf_cache = kwargs.get("elf_cache", None)
+        if isinstance(self._elf_cache, str):
+            self._elf_cache = ELFCache(self._elf_cache)
+        self._waveform_library = kwargs.get("waveform_library", None)
+        if self._waveform_library is None:
+            self._waveform_library = WaveformLibrary()
         self._options = None
 
     def setup(self, connection: ZIConnection = None) -> None:
@@ -131,8 +176,13 @@ class BaseInstrument:
 
         """
         self._controller.connect_device()
+        self._node_dict_resolver = None
+        self._controller.cache.clear()
         if nodetree:
-            self._nodetree = NodeTree(self)
+            self._nodetree = NodeTree(
+                self, cache=self._nodetree_cache, lazy=self._lazy_nodetree
+            )
+            self._node_dict_resolver = NodeDictResolver(self._nodetree.nodetree_dict)
         self._options = self._get("/features/options").split("\n")
         self._init_params()
         self._init_settings()
@@ -146,6 +196,7 @@ class BaseInstrument:
                 server after loading the factory preset (default: True).
         """
         self._set(f"/system/preset/load", 1, sync=sync)
+        self._controller.cache.clear()
         _logger.info(f"Factory preset is loaded to device {self.serial.upper()}.")
 
     def _check_ref_clock(
@@ -159,7 +210,7 @@ class BaseInstrument:
                 (default: True)
             timeout (int): Maximum time in seconds the program waits
                 when `blocking` is set to `True` (default: 30).
-            sleep_time (int): Time in seconds to wait between
+            sleep_time (int): Maximum time in seconds to wait between
                 requesting the reference clock status (default: 1)
 
         Raises:
@@ -167,13 +218,12 @@ class BaseInstrument:
                 clock.
 
         """
-        start_time = time.time()
-        while (
-            blocking
-            and start_time + timeout >= time.time()
-            and self.ref_clock_status() != "locked"
-        ):
-            time.sleep(sleep_time)
+        if blocking:
+            self.wait_for(
+                {self.ref_clock_status: "locked"},
+                timeout=timeout,
+                max_interval=sleep_time,
+            )
         if (
             self.ref_clock_actual() != self.ref_clock()
             or self.ref_clock_status() != "locked"
@@ -317,13 +367,82 @@ class BaseInstrument:
             >>> ]
             >>> hdawg._set_vector(settings)
 
+        Numeric vectors of several nodes are transferred in bulk, see
+        :meth:`ZIConnection.set_vector`.
+
         Raises:
             ToolkitError: If called and the device in not yet connected
                 to the data server.
 
+        Returns:
+            A :class:`VectorTransfer` with the size and throughput of
+            the transfer or `None` if the vectors are buffered in a
+            batch.
+
+        """
+        self._check_connected()
+        return self._controller.set_vector(*args)
+
+    @contextmanager
+    def batch(self, sync: bool = False):
+        """Context manager that combines all settings into a single
+        set command.
+
+        All calls of `_set(...)` and `_set_vector(...)` made inside
+        the context, including the ones made by :class:`Parameters` and
+        sub-objects of the instrument, are buffered. On exit they are
+        sent to the data server with a single `daq.set(...)` call
+        followed by at most one global synchronisation. Repeated writes
+        to the same node are de-duplicated, only the last value is set.
+
+            >>> with hdawg.batch():
+            >>>     hdawg.nodetree.sigouts[0].on(1)
+            >>>     hdawg.nodetree.sigouts[0].range(1.5)
+            >>>     hdawg.nodetree.sigouts[1].on(1)
+
+        Note that reading a node inside the context returns the value
+        on the device and not the buffered one, the buffered value is
+        returned by `_get_buffered(...)`. If an exception is
+        raised inside the context, the settings buffered inside it are
+        discarded, the ones of enclosing contexts are kept. Contexts can
+        be nested, only the outermost one sends the settings.
+
+        Arguments:
+            sync (bool): A flag that specifies if a synchronisation
+                should be performed between the device and the data
+                server after sending the settings (default: False).
+
+        Raises:
+            ToolkitConnectionError: If called and the device in not yet
+                connected to the data server.
+
+        """
+        self._check_connected()
+        self._controller.begin_batch()
+        try:
+            yield self
+        except BaseException:
+            self._controller.end_batch(discard=True)
+            raise
+        self._controller.end_batch(sync=sync)
+
+    def _get_buffered(self, command: str):
+        """Getter that prefers the value buffered in a batch.
+
+        Returns the value set for the node inside the current
+        `batch()` if there is one, otherwise the value is read from the
+        device with `_get(...)`.
+
+        Arguments:
+            command (str): The node path.
+
+        Returns:
+            The buffered or the current value of the node.
+
         """
         self._check_connected()
-        self._controller.set_vector(*args)
+        value = self._controller.buffered_value(command)
+        return self._get(command) if value is None else value
 
     def sync(self):
         """Perform a global synchronisation between the device and the
@@ -363,8 +482,8 @@ class BaseInstrument:
                 (default: True).
             timeout (float): Maximum time in seconds the program waits
                 when `blocking` is set to `True` (default: 2).
-            sleep_time (float): Time in seconds to wait between
-                requesting the node value (default: 0.005)
+            sleep_time (float): Maximum time in seconds to wait between
+                requesting the node values (default: 0.005)
 
         Raises:
             ToolkitConnectionError: If called and the device in not yet
@@ -389,19 +508,13 @@ class BaseInstrument:
                 "Invalid number of arguments!",
                 _logger.ExceptionTypes.TypeError,
             )
-        for i, pair in enumerate(pairs):
-            start_time = time.time()
-            while (
-                blocking
-                and start_time + timeout >= time.time()
-                and self._get(pair[0]) != pair[1]
-            ):
-                time.sleep(sleep_time)
-            # Check if the node still does not have the
-            # expected value after timeout
-            if self._get(pair[0]) != pair[1]:
-                return False
-        return True
+        self._check_connected()
+        result = self.wait_for(
+            {node: value for node, value in pairs},
+            timeout=timeout if blocking else 0,
+            max_interval=sleep_time,
+        )
+        return result.success
 
     def _get(self, command: str, valueonly: bool = True):
         """Getter for the instrument.
@@ -451,6 +564,282 @@ class BaseInstrument:
         self._check_connected()
         return self._controller.get(command, valueonly=valueonly)
 
+    async def aget(self, command: str, valueonly: bool = True):
+        """Asynchronous version of `_get(...)`.
+
+        The request is run on a thread pool so the event loop is not
+        blocked (see :mod:`zhinst.toolkit.control.aio`).
+
+            >>> await hdawg.aget("sigouts/0/on")
+            1
+
+        Raises:
+            ToolkitConnectionError: If called and the device is not yet
+                connected to the data server.
+
+        """
+        self._check_connected()
+        return await self._controller.aget(command, valueonly=valueonly)
+
+    async def aset(self, *args, sync: bool = False):
+        """Asynchronous version of `_set(...)`.
+
+            >>> await hdawg.aset("sigouts/0/on", 1)
+            >>> await hdawg.aset([("sigouts/0/on", 1), ("sigouts/1/on", 1)])
+
+        Raises:
+            ToolkitConnectionError: If called and the device is not yet
+                connected to the data server.
+
+        """
+        self._check_connected()
+        return await self._controller.aset(*args, sync=sync)
+
+    async def aset_vector(self, *args):
+        """Asynchronous version of `_set_vector(...)`.
+
+        Raises:
+            ToolkitConnectionError: If called and the device is not yet
+                connected to the data server.
+
+        """
+        self._check_connected()
+        return await self._controller.aset_vector(*args)
+
+    async def aget_many(self, items: List) -> Dict:
+        """Asynchronous version of `get_many(...)`."""
+        self._check_connected()
+        return await aio.run_blocking(self.get_many, items)
+
+    def get_many(self, items: List) -> Dict:
+        """Gets the values of several nodes with a single request.
+
+        The nodes can be given as :class:`Parameters` or as node
+        strings. All of them are retrieved with a single
+        `daq.get(...)` call. The values of :class:`Parameters` are
+        passed through their value mapping and `get` parser, exactly
+        as if the :class:`Parameter` was called.
+
+            >>> uhfqa.get_many([uhfqa.integration_length, "qas/0/result/averages"])
+            {<Parameter>: 4096, 'qas/0/result/averages': 1}
+
+        Wildcards are not supported in the node strings.
+
+        Arguments:
+            items (list): A list of :class:`Parameters` and/or node
+                strings.
+
+        Raises:
+            TypeError: If an item is neither a :class:`Parameter` nor
+                a string.
+            ToolkitError: If a :class:`Parameter` belongs to a
+                different device.
+            ToolkitNodeTreeError: If a :class:`Parameter` is not
+                gettable.
+            ToolkitConnectionError: If called and the device is not yet
+                connected to the data server or no value is returned
+                for a node.
+
+        Returns:
+            A dictionary with the given items as keys and the values
+            as values.
+
+        """
+        paths = []
+        for item in items:
+            if isinstance(item, Parameter):
+                if item._device is not self:
+                    _logger.error(
+                        f"The parameter {item._path} does not belong to the device "
+                        f"{self.name} ({self.serial}).",
+                        _logger.ExceptionTypes.ToolkitError,
+                    )
+                if item._properties is not None and "Read" not in item._properties:
+                    _logger.error(
+                        f"The parameter {item._path} is not gettable!",
+                        _logger.ExceptionTypes.ToolkitNodeTreeError,
+                    )
+                paths.append(item._path)
+            elif isinstance(item, str):
+                paths.append(item)
+            else:
+                _logger.error(
+                    f"Invalid item {item}! It must be either a Parameter or a "
+                    f"node path string.",
+                    _logger.ExceptionTypes.TypeError,
+                )
+        if not paths:
+            return {}
+        values = self._get(paths, valueonly=False)
+        result = {}
+        for item, path in zip(items, paths):
+            key = self._controller.command_to_node(path)
+            key = key.replace(f"/{self._controller.normalized_serial}/", "")
+            if key not in values:
+                _logger.error(
+                    f"No value returned for the node {path}.",
+                    _logger.ExceptionTypes.ToolkitConnectionError,
+                )
+            value = values[key]
+            if isinstance(item, Parameter):
+                value = item._parse_value(value)
+            result[item] = value
+        return result
+
+    def watch(self, *items) -> None:
+        """Keeps the values of nodes up to date in the background.
+
+        The nodes are subscribed on a dedicated data server session of
+        the :class:`SubscriptionManager` of the connection. Getting a
+        watched node is then served from the latest value pushed by the
+        data server instead of a `daq.get(...)` round-trip.
+
+            >>> hdawg.watch(hdawg.awgs[0]._enable, "system/fwrevision")
+
+        Arguments:
+            items: :class:`Parameters` and/or node strings.
+
+        Raises:
+            ToolkitConnectionError: If called and the device is not yet
+                connected to the data server.
+
+        """
+        self._check_connected()
+        self._controller.connection.subscriptions.watch(self._items_to_nodes(items))
+
+    def unwatch(self, *items) -> None:
+        """Stops keeping the values of nodes up to date.
+
+        Arguments:
+            items: :class:`Parameters` and/or node strings. If none are
+                given, all watched nodes of the device are unwatched.
+
+        Raises:
+            ToolkitConnectionError: If called and the device is not yet
+                connected to the data server.
+
+        """
+        self._check_connected()
+        subscriptions = self._controller.connection.subscriptions
+        if items:
+            nodes = self._items_to_nodes(items)
+        else:
+            nodes = [
+                n for n in subscriptions.watched if n.startswith(f"/{self.serial}/")
+            ]
+        subscriptions.unwatch(nodes)
+
+    def wait_for(self, conditions: Dict, timeout: float = 10, **kwargs) -> WaitResult:
+        """Waits until several nodes fulfill their conditions.
+
+        The conditions are given as a dictionary with
+        :class:`Parameters` and/or node strings as keys. The value is
+        either the expected value of the node or a predicate function
+        that is called with the value of the node. The values of
+        :class:`Parameters` are passed through their value mapping and
+        `get` parser first, exactly as if the :class:`Parameter` was
+        called.
+
+            >>> hdawg.wait_for({hdawg.awgs[0]._enable: False}, timeout=5)
+            WaitResult(success=True, elapsed=0.0153, polls=5)
+            >>> hdawg.wait_for({"system/fwlog": lambda v: "ready" in v})
+
+        All conditions are waited on together. If all nodes are watched
+        (see `watch(...)`) the wait is driven by the values pushed by
+        the data server, otherwise the nodes are polled with an
+        exponentially growing interval.
+
+        Arguments:
+            conditions (dict): A dictionary with :class:`Parameters`
+                and/or node strings as keys and expected values or
+                predicate functions as values.
+            timeout (float): Maximum time in seconds to wait
+                (default: 10).
+
+        Keyword Arguments:
+            initial_interval (float): Time in seconds between the first
+                two polls (default: 0.001).
+            max_interval (float): Maximum time in seconds between two
+                polls (default: 0.1).
+
+        Raises:
+            TypeError: If a key is neither a :class:`Parameter` nor a
+                string.
+            ToolkitConnectionError: If called and the device is not yet
+                connected to the data server.
+
+        Returns:
+            A :class:`WaitResult` that evaluates to `True` if all
+            conditions were fulfilled before the timeout.
+
+        """
+        node_conditions = self._node_conditions(conditions)
+        return self._controller.wait_for(node_conditions, timeout=timeout, **kwargs)
+
+    async def await_for(
+        self, conditions: Dict, timeout: float = 10, **kwargs
+    ) -> WaitResult:
+        """Asynchronous version of `wait_for(...)`.
+
+        Waits on watched nodes are woken up by the values pushed by the
+        data server, otherwise the nodes are polled without blocking the
+        event loop.
+
+            >>> await hdawg.await_for({hdawg.awgs[0]._enable: False}, timeout=5)
+
+        Raises:
+            TypeError: If a key is neither a :class:`Parameter` nor a
+                string.
+            ToolkitConnectionError: If called and the device is not yet
+                connected to the data server.
+
+        Returns:
+            A :class:`WaitResult` that evaluates to `True` if all
+            conditions were fulfilled before the timeout.
+
+        """
+        node_conditions = self._node_conditions(conditions)
+        return await self._controller.await_for(
+            node_conditions, timeout=timeout, **kwargs
+        )
+
+    def _node_conditions(self, conditions: Dict) -> Dict:
+        """Converts the conditions of `wait_for(...)` to node paths and
+        predicate functions."""
+        for item in conditions.keys():
+            if not isinstance(item, (Parameter, str)):
+                _logger.error(
+                    f"Invalid item {item}! It must be either a Parameter or a "
+                    f"node path string.",
+                    _logger.ExceptionTypes.TypeError,
+                )
+        self._check_connected()
+        node_conditions = {}
+        for item, expected in conditions.items():
+            predicate = as_predicate(expected)
+            if isinstance(item, Parameter):
+                predicate = self._parameter_predicate(item, predicate)
+            node_conditions[self._items_to_nodes([item])[0]] = predicate
+        return node_conditions
+
+    @staticmethod
+    def _parameter_predicate(parameter: Parameter, predicate):
+        return lambda value: predicate(parameter._parse_value(value))
+
+    def _items_to_nodes(self, items) -> List:
+        nodes = []
+        for item in items:
+            if isinstance(item, Parameter):
+                item = item._path
+            elif not isinstance(item, str):
+                _logger.error(
+                    f"Invalid item {item}! It must be either a Parameter or a "
+                    f"node path string.",
+                    _logger.ExceptionTypes.TypeError,
+                )
+            nodes.append(self._controller.command_to_node(item))
+        return nodes
+
     def _get_nodetree(self, prefix: str, **kwargs) -> Dict:
         """Gets the entire nodetree from the instrument as a dictionary.
 
@@ -477,11 +866,16 @@ class BaseInstrument:
     def _get_node_dict(self, node: str) -> Dict:
         """Gets the dictionary associated with the specified node.
 
-        This method uses `_get_nodetree()` to retrieve the nested
-        dictionary associated with the specified node of the device.
-        Then it extracts the value of the outer dictionary to return the
-        inner dictionary containing the keys: 'Node', 'Description',
-        'Unit', etc.
+        Device nodes are resolved from memory by the
+        :class:`NodeDictResolver` of the instrument. It is built from
+        the :class:`NodeTree` or, if the device was connected without
+        a :class:`NodeTree`, from a single wildcard request of the
+        device nodetree on the first call.
+
+        All other nodes (e.g. '/zi/...' nodes) are retrieved with
+        `_get_nodetree()`. Then the value of the outer dictionary is
+        extracted to return the inner dictionary containing the keys:
+        'Node', 'Description', 'Unit', etc.
 
         Arguments:
             node (str): A string that specifies the node address.
@@ -498,11 +892,29 @@ class BaseInstrument:
         # Add the device serial to the node string if it does not start
         # with '/zi/'.
         device_node = self._controller.command_to_node(node)
+        if not device_node.startswith("/zi/"):
+            node_dict = self._get_node_dict_resolver().resolve(device_node)
+            if node_dict is not None:
+                return node_dict
         self._check_node_exists(device_node)
         nested_dict = self._get_nodetree(device_node)
         inner_dict = list(nested_dict.values())[0]
         return inner_dict
 
+    def _get_node_dict_resolver(self) -> NodeDictResolver:
+        """Gets the :class:`NodeDictResolver` of the instrument.
+
+        If the device was connected without a :class:`NodeTree`, the
+        resolver is built from a single wildcard request of the device
+        nodetree on the first call.
+
+        """
+        if self._node_dict_resolver is None:
+            self._node_dict_resolver = NodeDictResolver(
+                self._get_nodetree(f"/{self.serial}/*")
+            )
+        return self._node_dict_resolver
+
     def _get_streamingnodes(self) -> Dict:
         self._check_connected()
         nodes = self._controller.get_nodetree(f"/{self.serial}/*", streamingonly=True)
@@ -550,6 +962,30 @@ class BaseInstrument:
     def nodetree(self):
         return self._nodetree
 
+    @property
+    def cache(self):
+        return self._controller.cache
+
+    @property
+    def node_dict_resolver(self):
+        return self._node_dict_resolver
+
+    @property
+    def nodetree_cache(self):
+        return self._nodetree_cache
+
+    @property
+    def elf_cache(self):
+        return self._elf_cache
+
+    @property
+    def waveform_library(self):
+        return self._waveform_library
+
+    @waveform_library.setter
+    def waveform_library(self, library: WaveformLibrary):
+        self._waveform_library = library
+
     @property
     def name(self):
         return self._config.instrument.name
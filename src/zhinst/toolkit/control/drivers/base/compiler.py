@@ -0,0 +1,307 @@
+# Copyright (C) 2021 Zurich Instruments
+#
+# This software may be modified and distributed under the terms
+# of the MIT license. See the LICENSE file for details.
+
+import abc
+import time
+import re
+
+import attr
+
+from zhinst.toolkit.interface import LoggerModule
+from ... import aio
+from ...elf_cache import program_hash
+from ...waiting import poll_until
+
+_logger = LoggerModule(__name__)
+
+
+@attr.s(frozen=True)
+class CompileReport:
+    """The outcome of compiling a single AWG Core with `compile_all(...)`.
+
+    Attributes:
+        name (str): The name of the AWG Core.
+        compile_time (float): Time in seconds spent compiling the
+            sequencer program (or looking it up in the ELF cache) or
+            `None` if the compilation failed.
+        upload_time (float): Time in seconds spent uploading the ELF
+            file or `None` if the upload failed.
+        status (int): The compiler status (0: success, 1: error,
+            2: warning) or `None` if it is unknown.
+        statusstring (str): The compiler status string.
+        error (Exception): The exception raised while compiling or
+            uploading or `None` if both were successful.
+        cached (bool): A flag that shows if the ELF file was taken from
+            the ELF cache instead of compiling the program.
+        skipped (bool): A flag that shows if the program was already
+            loaded on the AWG Core and neither compiled nor uploaded.
+        success (bool): A flag that shows if the program was compiled
+            and uploaded successfully.
+
+    """
+
+    name = attr.ib(type=str)
+    compile_time = attr.ib(type=float)
+    upload_time = attr.ib(type=float)
+    status = attr.ib(type=int)
+    statusstring = attr.ib(type=str)
+    error = attr.ib(default=None)
+    cached = attr.ib(type=bool, default=False)
+    skipped = attr.ib(type=bool, default=False)
+
+    @property
+    def success(self):
+        return self.error is None
+
+
+class SequencerCompiler(abc.ABC):
+    """Compiles the sequencer program of an AWG Core and uploads it.
+
+    Implements the compilation with an awgModule, the ELF cache of the
+    instrument and the check if a program is already loaded for the
+    :class:`AWGCore` and the :class:`SHFGenerator`. These classes set
+    the attributes `_index`, `_module`, `_program` and
+    `_loaded_program` and implement the abstract methods.
+
+    """
+
+    def compile(self, force: bool = False) -> None:
+        """Compiles the current SequenceProgram on the AWG Core.
+
+        The compilation is skipped if the sequencer program did not
+        change since it was last uploaded to the AWG Core and the ELF
+        checksum of the device still matches the uploaded program.
+
+        Arguments:
+            force (bool): A flag that specifies if the program is
+                compiled and uploaded even if it did not change
+                (default: False).
+
+        Raises:
+            ToolkitConnectionError: If the AWG Core has not been set up
+                yet
+            ToolkitError: if the compilation has failed or the ELF
+                upload is not successful.
+            TimeoutError: if the program upload is not completed before
+                timeout.
+
+        """
+        self._check_module()
+        self._compile(self._module, force=force)
+
+    async def acompile(self, force: bool = False) -> None:
+        """Asynchronous version of `compile()`.
+
+        The awgModule is shared by all AWG Cores of a data server
+        connection. Compilations with the same awgModule are run one
+        after the other on the thread pool, the event loop is never
+        blocked.
+
+            >>> await asyncio.gather(hd1.awgs[0].acompile(), hd2.awgs[0].acompile())
+
+        Arguments:
+            force (bool): A flag that specifies if the program is
+                compiled and uploaded even if it did not change
+                (default: False).
+
+        Raises:
+            ToolkitConnectionError: If the AWG Core has not been set up
+                yet
+            ToolkitError: if the compilation has failed or the ELF
+                upload is not successful.
+            TimeoutError: if the program upload is not completed before
+                timeout.
+
+        """
+        self._check_module()
+        module = self._module
+        async with aio.lock_for(module):
+            await aio.run_blocking(self._compile, module, force)
+
+    @abc.abstractmethod
+    def _instrument(self):
+        """Returns the instrument of the AWG Core."""
+
+    @abc.abstractmethod
+    def _elf_checksum_node(self) -> str:
+        """Returns the node of the checksum of the loaded ELF file."""
+
+    @abc.abstractmethod
+    def _check_module(self) -> None:
+        """Raises an error if the AWG Core has no awgModule."""
+
+    @abc.abstractmethod
+    def _reset_uploads(self) -> None:
+        """Forgets the waveforms uploaded to the AWG Core."""
+
+    def _module_pool(self):
+        return self._instrument()._controller.connection.awg_module_pool
+
+    def _compile(self, module, force: bool = False) -> CompileReport:
+        """Compiles and uploads the current SequenceProgram with the
+        given awgModule and measures the time of both steps.
+
+        Nothing is done if the program is already loaded on the AWG Core
+        and `force` is `False`. If the ELF file of the program is found
+        in the ELF cache of the device, it is uploaded without compiling
+        the program.
+
+        """
+        start_time = time.perf_counter()
+        seqc = self._sequencer_program()
+        digest = program_hash(seqc)
+        if not force and self._program_loaded(digest):
+            _logger.info(f"{self.name}: Program unchanged, compilation skipped")
+            return CompileReport(self.name, 0.0, 0.0, 0, "", skipped=True)
+        self._loaded_program = None
+        self._reset_uploads()
+        key, elf = self._lookup_elf(seqc)
+        if elf is None:
+            self._start_compilation(module, seqc)
+            poll_until(lambda: self._compilation_done(module), max_interval=0.1)
+            status, statusstring = self._check_compiler_status(module)
+            upload_done = self._upload_done
+        else:
+            self._start_elf_upload(module, key, elf)
+            status, statusstring = 0, ""
+            upload_done = self._elf_upload_done
+        compile_time = time.perf_counter() - start_time
+        uploaded = poll_until(
+            lambda: upload_done(module), timeout=100, max_interval=0.1
+        )
+        self._check_upload(module, uploaded)
+        if key is not None and elf is None:
+            self._store_elf(module, key)
+        self._loaded_program = (digest, self._elf_checksum())
+        upload_time = time.perf_counter() - start_time - compile_time
+        return CompileReport(
+            self.name,
+            compile_time,
+            upload_time,
+            status,
+            statusstring,
+            cached=elf is not None,
+        )
+
+    def _sequencer_program(self) -> str:
+        """Returns the sequencer program to be compiled."""
+        return self._program.get_seqc()
+
+    def _start_compilation(self, module, seqc: str) -> None:
+        """Passes the sequencer program to the awgModule."""
+        module.update(device=self._instrument().serial)
+        module.update(index=self._index)
+        module.set("compiler/sourcestring", seqc)
+
+    def _program_loaded(self, digest: str) -> bool:
+        """Checks if the program with the given hash is loaded on the
+        AWG Core, i.e. it was the last program uploaded by this AWG
+        Core and the ELF checksum of the device did not change since."""
+        if self._loaded_program is None:
+            return False
+        loaded_digest, checksum = self._loaded_program
+        if loaded_digest != digest or checksum is None:
+            # A program that can not be verified is compiled again
+            return False
+        return self._elf_checksum() == checksum
+
+    def _elf_checksum(self):
+        """Returns the checksum of the ELF file loaded on the device or
+        `None` if the device does not provide the node."""
+        try:
+            return self._instrument()._get(self._elf_checksum_node())
+        except _logger.ToolkitConnectionError:
+            return None
+
+    def _lookup_elf(self, seqc: str) -> tuple:
+        """Returns the ELF cache key and the cached ELF file of the
+        sequencer program, both are `None` if the cache is disabled."""
+        instrument = self._instrument()
+        cache = instrument.elf_cache
+        if cache is None:
+            return None, None
+        key = cache.key(instrument, self._index, seqc)
+        return key, cache.load(key)
+
+    def _start_elf_upload(self, module, key: str, elf: bytes) -> None:
+        module.update(device=self._instrument().serial)
+        module.update(index=self._index)
+        module.upload_elf(elf, f"toolkit_{key[:16]}.elf")
+        _logger.info(f"{self.name}: Uploading the cached ELF file")
+
+    def _elf_upload_done(self, module) -> bool:
+        return module.elf_upload_done()
+
+    def _store_elf(self, module, key: str) -> None:
+        elf = module.read_elf()
+        if elf is None:
+            _logger.warning(f"{self.name}: The ELF file could not be cached.")
+            return
+        self._instrument().elf_cache.store(key, elf)
+
+    def _compilation_done(self, module) -> bool:
+        return module.get_int("compiler/status") != -1
+
+    def _check_compiler_status(self, module) -> tuple:
+        compiler_status = module.get_int("compiler/status")
+        statusstring = module.get_string("compiler/statusstring")
+        if compiler_status == 1:
+            _logger.error(
+                f"Please check the sequencer code for {self.name}:\n"
+                f"{self._seqc_error(statusstring)}"
+                f"Compiler status string:\n{statusstring}\n",
+                _logger.ExceptionTypes.ToolkitError,
+            )
+        elif compiler_status == 2:
+            _logger.warning(
+                f"Please check the sequencer code for {self.name}:\n"
+                f"{self._seqc_error(statusstring)}"
+                f"Compiler status string:\n{statusstring}\n",
+            )
+        elif compiler_status == 0:
+            _logger.info(f"{self.name}: Compilation successful")
+        return compiler_status, statusstring
+
+    def _upload_done(self, module) -> bool:
+        return (
+            module.get_double("progress") >= 1.0 or module.get_int("/elf/status") == 1
+        )
+
+    def _check_upload(self, module, uploaded: bool) -> None:
+        if not uploaded:
+            _logger.error(
+                f"{self.name}: Program upload timed out!",
+                _logger.ExceptionTypes.TimeoutError,
+            )
+        elf_status = module.get_int("/elf/status")
+        if elf_status == 0:
+            _logger.info(f"{self.name}: Sequencer status: ELF file uploaded!")
+        else:
+            _logger.error(
+                f"{self.name}: Sequencer status: ELF upload failed!",
+                _logger.ExceptionTypes.ToolkitError,
+            )
+
+    def _seqc_error(self, statusstring):
+        """Extract the relevant lines from seqc program in case of error.
+
+        This method extracts the line number from the compiler status
+        and then finds the relevant lines in the seqc program to guide
+        the user. It works both for errors and warnings.
+        """
+        seqc_error = "\n"
+        seqc = self._program.get_seqc().splitlines()
+        pattern = "line: (.*?)\):"
+        num_error_line = int(re.search(pattern, statusstring).group(1))
+        start_line = max(0, num_error_line - 4)
+        stop_line = min(len(seqc), num_error_line + 1)
+        number_width = len(str(stop_line + 1))
+        for i, line in enumerate(seqc[start_line:stop_line], start=start_line):
+            if i + 1 == num_error_line:
+                seqc_error += f"-> {i + 1: >{number_width}}   {line.strip()}\n"
+            else:
+                seqc_error += f"   {i + 1: >{number_width}}   {line.strip()}\n"
+        seqc_error += "\n"
+        return seqc_error
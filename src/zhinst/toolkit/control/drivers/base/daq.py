@@ -1,9 +1,17 @@
+import asyncio
+import collections
+import collections.abc
 import time
 import numpy as np
-from typing import List, Dict
+from typing import List, Dict, Iterable, Iterator
+
+import attr
 
 from .base import BaseInstrument
+from zhinst.toolkit.control import aio
 from zhinst.toolkit.control.node_tree import Parameter
+from zhinst.toolkit.control.result_sink import ResultSink
+from zhinst.toolkit.control.waiting import poll_until
 from zhinst.toolkit.interface import LoggerModule
 
 _logger = LoggerModule(__name__)
@@ -109,6 +117,14 @@ class DAQModule:
             value:       (10, 511)
             frequency:   (511,)
 
+    Long or endless acquisitions are streamed with `stream(...)`, which
+    reads the data while the measurement is running and yields it chunk
+    by chunk.
+
+        >>> for chunk in mf.daq.stream(max_rows=1000):
+        ...     for result in chunk[signal1]:
+        ...         update_plot(result.time, result.value)
+
     See below for details on
     :class:`zhinst.toolkit.control.drivers.base.daq.DAQResult`.
 
@@ -158,7 +174,9 @@ class DAQModule:
         self._trigger_types = {}
 
     def _setup(self) -> None:
-        self._module = self._parent._controller.connection.daq_module
+        self._module = self._parent._controller.connection.daq_module_for(
+            self._parent.serial
+        )
         # add all parameters from nodetree
         nodetree = self._module.get_nodetree("*")
         for k, v in nodetree.items():
@@ -312,7 +330,9 @@ class DAQModule:
         """Resets the signals list."""
         self._signals = []
 
-    def measure(self, verbose: bool = True, timeout: float = 20) -> None:
+    def measure(
+        self, verbose: bool = True, timeout: float = 20, sink: ResultSink = None
+    ) -> None:
         """Performs the measurement.
 
         Starts a measurement and stores the result in `daq.results`. This
@@ -325,23 +345,18 @@ class DAQModule:
                 the measurement. (default: True)
             timeout (int): The measurement will be stopped after the timeout.
                 The value is given in seconds. (default: 20)
+            sink (:class:`ResultSink`): If given, the grids of all
+                signals are written to the sink. (default: None)
 
         Raises:
             TimeoutError: if the measurement is not completed before
                 timeout.
 
         """
-        self._set("endless", 0)
-        self._set("clearhistory", 1)
-        for path in self.signals:
-            self._module.subscribe(path)
-            if verbose:
-                print(f"subscribed to: {path}")
-        self._module.execute()
+        self._start_measurement(verbose)
         tik = time.time()
         while not self._module.finished():
-            if verbose:
-                print(f"Progress: {(self._module.progress()[0] * 100):.1f}%")
+            self._print_progress(verbose)
             time.sleep(0.5)
             tok = time.time()
             if tok - tik > timeout:
@@ -349,12 +364,308 @@ class DAQModule:
                     f"{self.name}: Measurement timed out!",
                     _logger.ExceptionTypes.TimeoutError,
                 )
+        self._finish_measurement(verbose, sink)
+
+    async def ameasure(
+        self, verbose: bool = True, timeout: float = 20, sink: ResultSink = None
+    ) -> None:
+        """Asynchronous version of `measure(...)`.
+
+        Every device has its own dataAcquisitionModule, the measurements
+        of several devices run at the same time. Measurements with the
+        same module are run one after the other, but the event loop is
+        never blocked.
+
+            >>> await asyncio.gather(mfli.daq.ameasure(), uhfli.daq.ameasure())
+
+        Raises:
+            TimeoutError: if the measurement is not completed before
+                timeout.
+
+        """
+        async with aio.lock_for(self._module):
+            await aio.run_blocking(self._start_measurement, verbose)
+            tik = time.time()
+            while not await aio.run_blocking(self._module.finished):
+                await aio.run_blocking(self._print_progress, verbose)
+                await asyncio.sleep(0.5)
+                tok = time.time()
+                if tok - tik > timeout:
+                    _logger.error(
+                        f"{self.name}: Measurement timed out!",
+                        _logger.ExceptionTypes.TimeoutError,
+                    )
+            await aio.run_blocking(self._finish_measurement, verbose, sink)
+
+    def stream(
+        self,
+        interval: float = 0.5,
+        max_rows: int = None,
+        endless: bool = True,
+        duration: float = None,
+        verbose: bool = False,
+        sink: ResultSink = None,
+    ) -> Iterator[Dict[str, List["DAQResult"]]]:
+        """Streams the measurement while it is running.
+
+        Subscribes to all the paths in `daq.signals`, starts the
+        measurement and reads the acquired data periodically with
+        `read(...)`. Every read yields a dictionary with the signals as
+        keys and a list of :class:`DAQResult` s as values, one for every
+        grid returned by the read. The measurement is finished and the
+        signals are unsubscribed when the measurement is done, when
+        `duration` has passed or when the loop over the stream is left.
+
+            >>> signal = mf.daq.signals_add("demod0", "r")
+            >>> mf.daq.grid_rows(1)
+            >>> for chunk in mf.daq.stream(max_rows=10000):
+            ...     for result in chunk[signal]:
+            ...         print(result.value.mean())
+            ...     if stop_requested():
+            ...         break
+            >>> mf.daq.results[signal].shape
+            (10000, 512)
+
+        The stream applies back-pressure: the next read only happens
+        when the consumer asks for the next chunk, at most every
+        `interval` seconds. In between, the data is buffered by the
+        module, whose buffer is bounded by its `historylength` setting.
+
+        Arguments:
+            interval (float): Minimum time in seconds between two reads
+                (default: 0.5).
+            max_rows (int): If given, the `results` hold a
+                :class:`DAQResult` with the last `max_rows` grid rows of
+                every signal. Older rows are dropped so the memory stays
+                bounded. Otherwise the `results` hold the grids of the
+                last read only (default: None).
+            endless (bool): A flag that specifies if the module keeps
+                acquiring grids until the stream is stopped. If `False`,
+                the stream ends when the configured number of grids is
+                acquired (default: True).
+            duration (float): Time in seconds after which the stream
+                ends. If `None`, the stream runs until the measurement
+                is finished or the loop is left (default: None).
+            verbose (bool): A flag to enable or disable console output
+                (default: False).
+            sink (:class:`ResultSink`): If given, every grid is written
+                to the sink as soon as it is complete. Together with the
+                default `max_rows`, the measurement never builds the
+                full result in memory (default: None).
+
+        Yields:
+            A dictionary with the signal strings as keys and lists of
+            :class:`DAQResult` s with the data of the read as values.
+
+        """
+        buffers = {node: _RowBuffer(max_rows) for node in self.signals if max_rows}
+        writer = _SinkWriter(sink) if sink is not None else None
+        self._results = {}
+        self._start_measurement(verbose, endless=endless)
+        tik = time.time()
+        try:
+            while True:
+                last_read = time.time()
+                finished = self._module.finished()
+                self._print_progress(verbose)
+                chunk = self._read_chunk(buffers, writer)
+                if any(chunk.values()):
+                    yield chunk
+                if finished:
+                    break
+                if duration is not None and time.time() - tik > duration:
+                    break
+                time.sleep(max(0, interval - (time.time() - last_read)))
+        finally:
+            self._module.finish()
+            self._module.unsubscribe("*")
+            if writer is not None:
+                writer.flush()
+            if verbose:
+                print("Finished")
+
+    def _read_chunk(
+        self, buffers: Dict, writer: "_SinkWriter" = None
+    ) -> Dict[str, List["DAQResult"]]:
+        data = self._module.read(flat=True)
+        chunk = {}
+        for node in self.signals:
+            node = node.lower()
+            grids = data.get(node, [])
+            chunk[node] = [
+                DAQResult(node, grid, clk_rate=self._clk_rate) for grid in grids
+            ]
+            if writer is not None:
+                for grid, result in zip(grids, chunk[node]):
+                    writer.write(node, grid, result)
+            if node in buffers:
+                for grid in grids:
+                    buffers[node].append(grid)
+                if grids:
+                    self._results[node] = buffers[node].result(node, self._clk_rate)
+            elif grids:
+                self._results[node] = chunk[node][-1]
+        return chunk
+
+    def measure_series(
+        self, settings: Iterable[Dict], timeout: float = 20, verbose: bool = False
+    ) -> "DAQSeriesResult":
+        """Performs a measurement for every point of a parameter scan.
+
+        The signals are subscribed and the module is configured once for
+        the whole series. For every point only the settings that changed
+        since the previous point are applied, then the acquisition is
+        started with `execute()`, its end is detected with a short,
+        exponentially growing polling interval and the data is read. The
+        values of every signal are collected into a preallocated array
+        with the points along the first axis.
+
+            >>> freqs = np.linspace(1e6, 2e6, 101)
+            >>> series = mf.daq.measure_series(
+            ...     {"oscs/0/freq": f, mf.daq.grid_cols: 512} for f in freqs
+            ... )
+            >>> series.values[signal].shape
+            (101, 10, 512)
+            >>> series.overhead.mean()
+            0.0021
+
+        The device settings of a point are synchronised with the data
+        server before its acquisition is started. The settings of the
+        DAQ Module that change the shape of the grid, e.g.
+        `mf.daq.grid_cols`, must be the same for all points.
+
+        Arguments:
+            settings (iterable): The settings of the points, one dictionary
+                per point. The keys are either node paths of the device or
+                :class:`Parameter` s of the device or the DAQ Module,
+                e.g. `mf.daq.grid_cols`.
+
+        Keyword Arguments:
+            timeout (float): The maximum time in seconds a single point
+                may take (default: 20).
+            verbose (bool): A flag to enable or disable console output
+                (default: False).
+
+        Raises:
+            TimeoutError: if a point is not completed before the timeout.
+            ToolkitError: if the shape of the grids changes between
+                points.
+
+        Returns:
+            A :class:`DAQSeriesResult` with the values of all points and
+            the time spent on every point.
+
+        """
+        points = list(settings)
+        values = {}
+        axes = {}
+        acquisition_times = np.zeros(len(points))
+        overheads = np.zeros(len(points))
+        current = {}
+        self._start_series(verbose)
+        try:
+            for i, point in enumerate(points):
+                start = time.perf_counter()
+                self._apply_changed_settings(point, current)
+                # only the grids of this point are read
+                self._set("clearhistory", 1)
+                self._module.execute()
+                result = poll_until(self._module.finished, timeout=timeout)
+                if not result:
+                    _logger.error(
+                        f"{self._parent.name}: Measurement of point {i} timed out!",
+                        _logger.ExceptionTypes.TimeoutError,
+                    )
+                self._get_result_from_dict(self._module.read(flat=True))
+                for node, daq_result in self._results.items():
+                    if node not in values:
+                        values[node] = np.full(
+                            (len(points),) + daq_result.shape, np.nan
+                        )
+                        axes[node] = (
+                            daq_result.frequency
+                            if daq_result._is_fft
+                            else daq_result.time
+                        )
+                    if values[node].shape[1:] != daq_result.shape:
+                        _logger.error(
+                            f"{self._parent.name}: The grid of {node} has the "
+                            f"shape {daq_result.shape} at point {i} but "
+                            f"{values[node].shape[1:]} before. The grid "
+                            f"settings must be the same for all points.",
+                            _logger.ExceptionTypes.ToolkitError,
+                        )
+                    values[node][i] = daq_result.value
+                acquisition_times[i] = result.elapsed
+                overheads[i] = time.perf_counter() - start - result.elapsed
+                if verbose:
+                    print(f"Point {i + 1} / {len(points)}")
+        finally:
+            self._module.finish()
+            self._module.unsubscribe("*")
+        series = DAQSeriesResult(values, axes, points, acquisition_times, overheads)
+        if verbose:
+            print(
+                f"Finished {len(points)} points, mean overhead per point "
+                f"{series.overhead.mean() * 1e3:.1f} ms"
+            )
+        return series
+
+    def _start_series(self, verbose: bool) -> None:
+        self._set("endless", 0)
+        for path in self.signals:
+            self._module.subscribe(path)
+            if verbose:
+                print(f"subscribed to: {path}")
+
+    def _apply_changed_settings(self, point: Dict, current: Dict) -> None:
+        """Applies the settings of a point that differ from the current
+        ones. The device nodes are set with a single call followed by a
+        global synchronisation, so no data of the point is acquired
+        before its settings took effect."""
+        device_settings = []
+        device_changed = False
+        for key, value in point.items():
+            if key in current and not _differs(current[key], value):
+                continue
+            current[key] = value
+            if isinstance(key, Parameter):
+                key(value)
+                device_changed |= key._device is self._parent
+            else:
+                device_settings.append((key, value))
+        if device_settings:
+            self._parent._set(device_settings, sync=True)
+        elif device_changed:
+            self._parent.sync()
+
+    def _start_measurement(self, verbose: bool, endless: bool = False) -> None:
+        self._set("endless", int(endless))
+        self._set("clearhistory", 1)
+        for path in self.signals:
+            self._module.subscribe(path)
+            if verbose:
+                print(f"subscribed to: {path}")
+        self._module.execute()
+
+    def _print_progress(self, verbose: bool) -> None:
+        if verbose:
+            print(f"Progress: {(self._module.progress()[0] * 100):.1f}%")
+
+    def _finish_measurement(self, verbose: bool, sink: ResultSink = None) -> None:
         if verbose:
             print("Finished")
         result = self._module.read(flat=True)
         self._module.finish()
         self._module.unsubscribe("*")
         self._get_result_from_dict(result)
+        if sink is not None:
+            writer = _SinkWriter(sink)
+            for node in self.signals:
+                node = node.lower()
+                for grid in result[node]:
+                    writer.write(node, grid, DAQResult(node, grid, self._clk_rate))
+            writer.flush()
 
     def _parse_signals(
         self,
@@ -448,7 +759,7 @@ class DAQModule:
         return types[trigger_type]
 
     def _get_result_from_dict(self, result: Dict):
-        self._results = {}
+        grids = {}
         for node in self.signals:
             node = node.lower()
             if node not in result.keys():
@@ -456,9 +767,8 @@ class DAQModule:
                     f"The signal {node} is not in {list(result.keys())}",
                     _logger.ExceptionTypes.ToolkitError,
                 )
-            self._results[node] = DAQResult(
-                node, result[node][0], clk_rate=self._clk_rate
-            )
+            grids[node] = result[node][0]
+        self._results = _LazyResults(grids, self._clk_rate)
 
     def __repr__(self):
         s = super().__repr__()
@@ -480,6 +790,145 @@ class DAQModule:
         return self._results
 
 
+def _differs(old, new) -> bool:
+    try:
+        return bool(old != new)
+    except ValueError:
+        return not np.array_equal(old, new)
+
+
+@attr.s(frozen=True)
+class DAQSeriesResult:
+    """The result of a series of measurements with `measure_series(...)`.
+
+    Attributes:
+        values (dict): A dictionary with the signals as keys and arrays
+            with the values of all points along the first axis.
+        axes (dict): A dictionary with the signals as keys and the time
+            or, for FFT signals, the frequency axis of the first point.
+        settings (list): The settings of all points.
+        acquisition_time (array): The time in seconds from the start of
+            the acquisition of a point until it was finished.
+        overhead (array): The time in seconds spent on every point in
+            addition to the acquisition, i.e. to apply the settings, to
+            detect the end of the acquisition and to read the data.
+
+    """
+
+    values = attr.ib(type=dict)
+    axes = attr.ib(type=dict)
+    settings = attr.ib(type=list)
+    acquisition_time = attr.ib()
+    overhead = attr.ib()
+
+
+def _created_timestamp(grid: Dict) -> int:
+    """Returns the timestamp a grid was created at, it identifies a grid
+    that is read several times while it is filled."""
+    created = grid.get("header", {}).get("createdtimestamp")
+    return None if created is None else int(np.ravel(created)[0])
+
+
+class _SinkWriter:
+    """Writes the grids of a measurement to a :class:`ResultSink`.
+
+    The last grid of a signal is held back until a newer grid arrives or
+    the writer is flushed, since it might still be filled.
+
+    """
+
+    def __init__(self, sink: ResultSink) -> None:
+        self._sink = sink
+        self._pending = {}
+
+    def write(self, node: str, grid: Dict, result: "DAQResult") -> None:
+        created = _created_timestamp(grid)
+        pending = self._pending.pop(node, None)
+        if pending is not None and pending[0] != created:
+            self._write(node, *pending[1:])
+        if created is None:
+            self._write(node, grid, result)
+        else:
+            self._pending[node] = (created, grid, result)
+
+    def flush(self) -> None:
+        for node, (_, grid, result) in self._pending.items():
+            self._write(node, grid, result)
+        self._pending = {}
+        self._sink.flush()
+
+    def _write(self, node: str, grid: Dict, result: "DAQResult") -> None:
+        record = {
+            "value": grid.get("value"),
+            "timestamp": grid.get("timestamp"),
+            "header": grid.get("header", {}),
+        }
+        if result._is_fft:
+            record["frequency"] = result.frequency
+        else:
+            record["time"] = result.time
+        self._sink.append(node, record)
+
+
+class _RowBuffer:
+    """Keeps the last rows of the grids streamed for a single signal.
+
+    A grid that is read again while it is still being filled replaces
+    its previous version. Rows beyond `max_rows` are dropped when the
+    result is built.
+
+    """
+
+    def __init__(self, max_rows: int) -> None:
+        self._max_rows = max_rows
+        self._grids = collections.deque()
+        self._rows = 0
+        self._created = None
+
+    def append(self, grid: Dict) -> None:
+        created = _created_timestamp(grid)
+        if self._grids and created is not None and created == self._created:
+            self._rows -= len(np.atleast_2d(self._grids.pop()["value"]))
+        self._created = created
+        self._grids.append(grid)
+        self._rows += len(np.atleast_2d(grid["value"]))
+        while self._rows - len(np.atleast_2d(self._grids[0]["value"])) >= (
+            self._max_rows
+        ):
+            self._rows -= len(np.atleast_2d(self._grids.popleft()["value"]))
+
+    def result(self, path: str, clk_rate: float) -> "DAQResult":
+        result_dict = {"header": self._grids[-1].get("header", {})}
+        for key in ["value", "timestamp"]:
+            if all(key in grid for grid in self._grids):
+                rows = np.concatenate([np.atleast_2d(g[key]) for g in self._grids])
+                result_dict[key] = rows[-self._max_rows :]
+        return DAQResult(path, result_dict, clk_rate=clk_rate)
+
+
+class _LazyResults(collections.abc.Mapping):
+    """A read-only dictionary that only creates the :class:`DAQResult` of
+    a signal when it is accessed for the first time."""
+
+    def __init__(self, grids: Dict, clk_rate: float) -> None:
+        self._grids = grids
+        self._clk_rate = clk_rate
+        self._results = {}
+
+    def __getitem__(self, node: str) -> "DAQResult":
+        if node not in self._results:
+            self._results[node] = DAQResult(
+                node, self._grids[node], clk_rate=self._clk_rate
+            )
+        return self._results[node]
+
+    def __iter__(self):
+        return iter(self._grids)
+
+    def __len__(self):
+        return len(self._grids)
+
+
 class DAQResult:
     """A wrapper class around the result of a DAQ Module measurement.
 
@@ -507,6 +956,10 @@ class DAQResult:
             ...
         >>> plt.imshow(result.value, extent=[result.time[0], result.time[-1], 0, result.shape[0]])
 
+    The result is lazy: `value` is a read-only view on the array returned
+    by the API and the `time` or `frequency` axis is only calculated when
+    it is accessed for the first time.
+
     Attributes:
         value (array): A 2D numpy array with the measurement result.
         shape (tuple): A tuple with the shape of the acquired data which
@@ -526,19 +979,26 @@ class DAQResult:
 
     """
 
+    __slots__ = (
+        "_path",
+        "_clk_rate",
+        "_is_fft",
+        "_header",
+        "_value",
+        "_timestamp",
+        "_time",
+        "_frequency",
+    )
+
     def __init__(self, path: str, result_dict: Dict, clk_rate: float = 60e6) -> None:
         self._path = path
         self._clk_rate = clk_rate
         self._is_fft = "fft" in self._path
-        self._result_dict = result_dict
-        self._header = self._result_dict.get("header", {})
-        self._value = self._result_dict.get("value")
+        self._header = result_dict.get("header", {})
+        self._value = self._read_only(result_dict.get("value"))
+        self._timestamp = result_dict.get("timestamp")
         self._time = None
-        self._frequencies = None
-        if not self._is_fft:
-            self._time = self._claculate_time()
-        else:
-            self._frequency = self._calculate_freqs()
+        self._frequency = None
 
     @property
     def value(self):
@@ -550,18 +1010,31 @@ class DAQResult:
 
     @property
     def time(self):
+        if self._time is None and not self._is_fft:
+            self._time = self._claculate_time()
         return self._time
 
     @property
     def frequency(self):
+        if self._frequency is None and self._is_fft:
+            self._frequency = self._calculate_freqs()
         return self._frequency
 
     @property
     def shape(self):
         return self._value.shape
 
+    @staticmethod
+    def _read_only(value):
+        """Returns a read-only view on an array without copying it."""
+        if value is None:
+            return None
+        value = np.asarray(value).view()
+        value.flags.writeable = False
+        return value
+
     def _claculate_time(self):
-        timestamp = self._result_dict["timestamp"]
+        timestamp = self._timestamp
         return (timestamp[0] - timestamp[0][0]) / self._clk_rate
 
     def _calculate_freqs(self):
@@ -580,7 +1053,7 @@ class DAQResult:
         s += f"path:        {self._path}\n"
         s += f"value:       {self._value.shape}\n"
         if self._is_fft:
-            s += f"frequency:   {self._frequency.shape}\n"
+            s += f"frequency:   {self.frequency.shape}\n"
         else:
-            s += f"time:        {self._time.shape}\n"
+            s += f"time:        {self.time.shape}\n"
         return s
@@ -3,12 +3,16 @@
 # This software may be modified and distributed under the terms
 # of the MIT license. See the LICENSE file for details.
 
-import numpy as np
 import time
+from typing import Callable, Iterable, Iterator
+
+import numpy as np
 
 from .base import BaseInstrument
 from zhinst.toolkit.interface import LoggerModule
 from ...parsers import Parse
+from ... import aio
+from ...waiting import poll_until
 
 _logger = LoggerModule(__name__)
 
@@ -17,7 +21,8 @@ class Scope:
     """Implements a Scope representation.
 
     The :class:`Scope` class implements basic functionality of
-    the Scope for UHF devices.
+    the Scope for UHF devices. The records of a running Scope can be
+    streamed into a :class:`ScopeBuffer` with `stream(...)`.
 
     """
 
@@ -154,7 +159,7 @@ class Scope:
         Arguments:
             timeout (float): The maximum waiting time in seconds for the
                 Scope (default: 10).
-            sleep_time (float): Time in seconds to wait between
+            sleep_time (float): Maximum time in seconds to wait between
                 requesting the progress and records values
 
         Raises:
@@ -163,25 +168,40 @@ class Scope:
 
         """
         num_records = self.num_records()
-        start_time = time.time()
-        records = 0
-        progress = 0
         # Wait until the Scope Module has received and
         # processed the desired number of records.
-        while (
-            records < num_records or progress < 1.0
-        ) and start_time + timeout >= time.time():
-            time.sleep(sleep_time)
-            records = self._module.records()
-            progress = self._module.progress()
-        if (
-            records < num_records or progress < 1.0
-        ) and start_time + timeout < time.time():
+        if not poll_until(
+            lambda: self._recording_done(num_records),
+            timeout=timeout,
+            max_interval=sleep_time,
+        ):
             _logger.error(
                 "Scope recording timed out!",
                 _logger.ExceptionTypes.TimeoutError,
             )
 
+    async def await_done(self, timeout: float = 10, sleep_time: float = 0.005) -> None:
+        """Asynchronous version of `wait_done(...)`.
+
+        Raises:
+            TimeoutError: If the Scope recording is not done before the
+                timeout.
+
+        """
+        num_records = await aio.run_blocking(self.num_records)
+        if not await aio.poll_until(
+            lambda: self._recording_done(num_records),
+            timeout=timeout,
+            max_interval=sleep_time,
+        ):
+            _logger.error(
+                "Scope recording timed out!",
+                _logger.ExceptionTypes.TimeoutError,
+            )
+
+    def _recording_done(self, num_records: int) -> bool:
+        return self._module.records() >= num_records and self._module.progress() >= 1.0
+
     def read(
         self,
         channel=None,
@@ -201,7 +221,7 @@ class Scope:
                 (default: True).
             timeout (float): The maximum waiting time in seconds for the
                 Scope (default: 10).
-            sleep_time (float): Time in seconds to wait between
+            sleep_time (float): Maximum time in seconds to wait between
                 requesting the progress and records values
 
         Raises:
@@ -235,7 +255,7 @@ class Scope:
             # generate the time base
             scope_time = [[], []]
             for i in range(2):
-                scope_time[i] = np.array(range(0, len(recorded_data[i]))) * dt
+                scope_time[i] = np.arange(len(recorded_data[i])) * dt
             # return the scope data
             if channel is not None:
                 result.append(
@@ -245,6 +265,98 @@ class Scope:
                 result.append({"data": recorded_data, "time": scope_time})
         return result
 
+    def stream(
+        self,
+        n_records: int = 100,
+        callbacks: Iterable[Callable] = None,
+        interval: float = 0.1,
+        duration: float = None,
+    ) -> Iterator["ScopeBuffer"]:
+        """Streams the records of the running Scope.
+
+        Reads the records the Scope Module received since the last read
+        periodically and writes them into a :class:`ScopeBuffer` that
+        holds the last `n_records` records. The buffer is allocated once
+        with the shape of the first record. The Scope is neither
+        stopped nor re-armed, it keeps recording while it is streamed
+        and after the loop over the stream is left. The Scope has to be
+        armed and running, e.g. with `arm_and_run()`.
+
+            >>> uhfli.scope.arm_and_run(num_records=100)
+            >>> for buffer in uhfli.scope.stream(callbacks=[check_record]):
+            ...     plot(buffer.time, buffer.latest[0])
+            ...     if stop_requested():
+            ...         break
+
+        Records are identified by their timestamp, a record that is
+        returned by more than one read is only written once. The module
+        keeps at most `num_records` records, records that are dropped
+        by the module before they are read are lost.
+
+        Arguments:
+            n_records (int): Number of records held by the buffer, older
+                records are overwritten (default: 100).
+            callbacks (list): Functions that are called for every new
+                record with the record as an array of shape
+                `(channels, length)` and its timestamp. The array is a
+                view into the buffer and is overwritten once the buffer
+                wraps around (default: None).
+            interval (float): Minimum time in seconds between two reads
+                (default: 0.1).
+            duration (float): Time in seconds after which the stream
+                ends. If `None`, the stream runs until the loop is left
+                (default: None).
+
+        Raises:
+            ToolkitConnectionError: If the Scope is not connected to a
+                scopeModule.
+
+        Yields:
+            The :class:`ScopeBuffer` after every read with new records.
+
+        """
+        if self._module is None:
+            _logger.error(
+                "This Scope is not connected to a scopeModule!",
+                _logger.ExceptionTypes.ToolkitConnectionError,
+            )
+        callbacks = list(callbacks or [])
+        wave_nodepath = f"/{self._parent.serial}/scopes/0/wave"
+        buffer = None
+        last_timestamp = -1
+        tik = time.time()
+        while True:
+            last_read = time.time()
+            new_records = 0
+            data = self._module.read()
+            for record in data.get(wave_nodepath, []):
+                record = record[0]
+                timestamp = int(record["timestamp"])
+                if timestamp <= last_timestamp:
+                    continue
+                last_timestamp = timestamp
+                wave = np.atleast_2d(record["wave"])
+                if buffer is None:
+                    buffer = ScopeBuffer(
+                        n_records, *wave.shape, record["dt"], dtype=wave.dtype
+                    )
+                if not buffer.fits(wave, record["dt"]):
+                    _logger.warning(
+                        f"Skipped the scope record {timestamp}, its shape "
+                        f"{wave.shape} or its sampling interval {record['dt']} "
+                        f"differs from the first record.",
+                    )
+                    continue
+                index = buffer.append(wave, timestamp)
+                for callback in callbacks:
+                    callback(buffer.data[index], timestamp)
+                new_records += 1
+            if new_records:
+                yield buffer
+            if duration is not None and time.time() - tik > duration:
+                break
+            time.sleep(max(0, interval - (time.time() - last_read)))
+
     def channels(self, value=None):
         """Set all Scope channels simultaneously.
 
@@ -322,3 +434,108 @@ class Scope:
     @property
     def is_running(self):
         return self._enable()
+
+
+class ScopeBuffer:
+    """Implements a ring buffer for the records streamed from the Scope.
+
+    The records are written into a single array of shape
+    `(n_records, channels, length)` that is allocated once. When the
+    buffer is full, the oldest record is overwritten. The time axis is
+    the same for all records and is only calculated once.
+
+    Arguments:
+        n_records (int): Number of records held by the buffer.
+        channels (int): Number of channels of a record.
+        length (int): Number of samples of a record.
+        dt (float): Time in seconds between two samples.
+        dtype: Data type of the samples (default: float).
+
+    Properties:
+        data (np.ndarray): The buffer of shape `(n_records, channels,
+            length)`. The slots are filled in the order the records
+            arrive and wrap around.
+        timestamps (np.ndarray): The timestamps of the records in the
+            slots of `data`, 0 for an empty slot.
+        time (np.ndarray): The time axis of a record in seconds.
+        count (int): Number of records appended so far.
+        size (int): Number of records in the buffer.
+        latest (np.ndarray): The last record appended to the buffer.
+
+    """
+
+    def __init__(
+        self, n_records: int, channels: int, length: int, dt: float, dtype=float
+    ) -> None:
+        if n_records < 1:
+            _logger.error(
+                "The buffer must hold at least one record.",
+                _logger.ExceptionTypes.ValueError,
+            )
+        self._data = np.zeros((n_records, channels, length), dtype=dtype)
+        self._timestamps = np.zeros(n_records, dtype=np.uint64)
+        self._dt = dt
+        self._time = np.arange(length) * dt
+        self._count = 0
+
+    def fits(self, wave: np.ndarray, dt: float) -> bool:
+        """Checks if a record has the shape and sampling interval of the
+        buffer."""
+        return wave.shape == self._data.shape[1:] and dt == self._dt
+
+    def append(self, wave: np.ndarray, timestamp: int) -> int:
+        """Writes a record into the next slot of the buffer.
+
+        Arguments:
+            wave (np.ndarray): The record of shape `(channels, length)`.
+            timestamp (int): The timestamp of the record.
+
+        Returns:
+            The index of the slot in `data`.
+
+        """
+        index = self._count % len(self._data)
+        self._data[index] = wave
+        self._timestamps[index] = timestamp
+        self._count += 1
+        return index
+
+    def records(self) -> np.ndarray:
+        """Returns a copy of the records in the buffer, the oldest first.
+
+        Returns:
+            An array of shape `(size, channels, length)`.
+
+        """
+        return self._data[self._order()]
+
+    def _order(self) -> np.ndarray:
+        n = len(self._data)
+        start = self._count - self.size
+        return (np.arange(self.size) + start) % n
+
+    @property
+    def data(self):
+        return self._data
+
+    @property
+    def timestamps(self):
+        return self._timestamps
+
+    @property
+    def time(self):
+        return self._time
+
+    @property
+    def count(self):
+        return self._count
+
+    @property
+    def size(self):
+        return min(self._count, len(self._data))
+
+    @property
+    def latest(self):
+        if self._count == 0:
+            return None
+        return self._data[(self._count - 1) % len(self._data)]
@@ -6,7 +6,6 @@
 import numpy as np
 import time
 from typing import List, Union
-import re
 
 from zhinst.toolkit.helpers import (
     SequenceProgram,
@@ -15,12 +14,14 @@ from zhinst.toolkit.helpers import (
     TriggerMode,
 )
 from zhinst.toolkit.interface import LoggerModule
+from .awg import UploadReport
+from .compiler import SequencerCompiler
 from .shf_qachannel import SHFQAChannel
 
 _logger = LoggerModule(__name__)
 
 
-class SHFGenerator:
+class SHFGenerator(SequencerCompiler):
     """Implements an SHF Generator representation.
 
     The :class:`SHFGenerator` class implements basic functionality of
@@ -97,12 +98,20 @@ class SHFGenerator:
         self._index = self._parent._index
         self._device = self._parent._parent
         self._module = None
+        self._loaded_program = None
+        self._uploaded_waveforms = {}
         self._waveforms = []
         self._program = SequenceProgram()
         self.set_sequence_params(target=self._device.device_type)
 
     def _setup(self):
         self._module = self._device._controller.connection.awg_module
+        self._reset_uploads()
+
+    def _reset_uploads(self) -> None:
+        """Forgets the waveforms uploaded to the generator, e.g. after
+        a factory reset, so that the next upload sends all of them."""
+        self._uploaded_waveforms = {}
 
     def _init_generator_params(self):
         """Initialize parameters associated with device generators.
@@ -180,7 +189,7 @@ class SHFGenerator:
         Arguments:
             timeout (float): The maximum waiting time in seconds for the
                 generator (default: 10).
-            sleep_time (float): Time in seconds to wait between
+            sleep_time (float): Maximum time in seconds to wait between
                 requesting generator state
 
         Raises:
@@ -196,84 +205,68 @@ class SHFGenerator:
                 "finished.",
                 _logger.ExceptionTypes.ToolkitError,
             )
-        start_time = time.time()
-        while self.is_running and start_time + timeout >= time.time():
-            time.sleep(sleep_time)
-        if self.is_running and start_time + timeout < time.time():
+        if not self._parent.wait_for(
+            {self._enable: False}, timeout=timeout, max_interval=sleep_time
+        ):
             _logger.error(
                 "Generator timed out!",
                 _logger.ExceptionTypes.TimeoutError,
             )
 
-    def compile(self) -> None:
-        """Compile the current SequenceProgram and load it to sequencer.
+    async def await_done(self, timeout: float = 10, sleep_time: float = 0.005) -> None:
+        """Asynchronous version of `wait_done(...)`.
 
         Raises:
-            ToolkitConnectionError: If the AWG Core has not been set up
-                yet
-            ToolkitError: if the compilation has failed or the ELF
-                upload is not successful.
-            TimeoutError: if the program upload is not completed before
+            ToolkitError: If the generator is running in continuous
+                mode.
+            TimeoutError: If the generator is not finished before the
                 timeout.
 
         """
-        if self._module is None:
+        if not await self.single.aget():
             _logger.error(
-                "This Generator is not connected to an awgModule!",
-                _logger.ExceptionTypes.ToolkitConnectionError,
-            )
-        self._module.update(device=self._device.serial)
-        self._module.update(index=self._index)
-        seqc_program = self._program.get_seqc()
-        self._module.set("compiler/sourcestring", seqc_program)
-        compiler_status = self._module.get_int("compiler/status")
-        while compiler_status == -1:
-            time.sleep(0.1)
-            compiler_status = self._module.get_int("compiler/status")
-        statusstring = self._module.get_string("compiler/statusstring")
-        if compiler_status == 1:
-            _logger.error(
-                f"Please check the sequencer code for {self.name}:\n"
-                f"{self._seqc_error(statusstring)}"
-                f"Compiler status string:\n{statusstring}\n",
+                "The generator is running in continuous mode, it will never be "
+                "finished.",
                 _logger.ExceptionTypes.ToolkitError,
             )
-        elif compiler_status == 2:
-            _logger.warning(
-                f"Please check the sequencer code for {self.name}:\n"
-                f"{self._seqc_error(statusstring)}"
-                f"Compiler status string:\n{statusstring}\n",
-            )
-        elif compiler_status == 0:
-            _logger.info(f"{self.name}: Compilation successful")
-        tik = time.time()
-        while (self._module.get_double("progress") < 1.0) and (
-            self._module.get_int("/elf/status") != 1 and self._ready != 1
+        if not await self._parent.await_for(
+            {self._enable: False}, timeout=timeout, max_interval=sleep_time
         ):
-            time.sleep(0.1)
-            if time.time() - tik >= 100:  # 100s timeout
-                _logger.error(
-                    f"{self.name}: Program upload timed out!",
-                    _logger.ExceptionTypes.TimeoutError,
-                )
-        elf_status = self._module.get_int("/elf/status")
-        if elf_status == 0:
-            _logger.info(f"{self.name}: Sequencer status: ELF file uploaded!")
-        else:
             _logger.error(
-                f"{self.name}: Sequencer status: ELF upload failed!",
-                _logger.ExceptionTypes.ToolkitError,
+                "Generator timed out!",
+                _logger.ExceptionTypes.TimeoutError,
             )
 
+    def _check_module(self) -> None:
+        if self._module is None:
+            _logger.error(
+                "This Generator is not connected to an awgModule!",
+                _logger.ExceptionTypes.ToolkitConnectionError,
+            )
+
+    def _instrument(self):
+        return self._device
+
+    def _elf_checksum_node(self) -> str:
+        return f"qachannels/{self._index}/generator/elf/checksum"
+
     def reset_queue(self) -> None:
         """Resets the waveform queue to an empty list."""
         self._waveforms = []
 
-    def queue_waveform(self, wave: Union[List, np.array], delay: float = 0) -> None:
+    def queue_waveform(
+        self, wave: Union[List, np.array, str], delay: float = 0
+    ) -> None:
         """Add a new waveform to the queue.
 
+        Very long waveforms can be given as a memory map (`np.memmap`)
+        or as the path to a `.npy` file or to a raw file of int16
+        samples. The file is memory mapped and only read chunk by chunk
+        while the samples are scaled into the upload buffer.
+
         Arguments:
-            wave (array): The waveform to be queued as a 1D numpy array.
+            wave (array): The waveform to be queued as a 1D numpy array,
+                a memory map or the path to a `.npy` or raw int16 file.
             delay (int): An individual delay in seconds for this waveform
                 w.r.t. the time origin of the sequence. (default: 0)
 
@@ -315,32 +308,77 @@ class SHFGenerator:
             )
         self._waveforms[i].replace_data(wave, delay=delay)
 
-    def upload_waveforms(self) -> None:
+    def upload_waveforms(self, force: bool = False) -> UploadReport:
         """Upload all waveforms in the queue to the Generator.
 
         This method only works as expected if the Sequence Program has
         been compiled beforehand.
         See :func:`compile_and_upload_waveforms(...)`.
+
+        Only waveforms that changed since they were last uploaded are
+        sent to the device. All waveforms are sent again after the
+        sequence program was compiled. The data of the waveforms is
+        kept in the `waveform_library` of the instrument, identical
+        waveforms share their data and their own copies are released.
+
+        Arguments:
+            force (bool): A flag that specifies if all waveforms are
+                uploaded even if they did not change (default: False).
+
+        Returns:
+            An :class:`UploadReport` with the number and size of the
+            uploaded and skipped waveforms.
+
         """
-        waveform_data = [w.data for w in self._waveforms]
+        self._device._check_connected()
+        for w in self._waveforms:
+            self._device.waveform_library.add(w)
+        changed = [
+            (i, w)
+            for i, w in enumerate(self._waveforms)
+            if force or self._uploaded_waveforms.get(i) != w.checksum
+        ]
         nodes = [
-            f"qachannels/{self._index}/generator/waveforms/{i}/wave"
-            for i in range(len(waveform_data))
+            f"qachannels/{self._index}/generator/waveforms/{i}/wave" for i, _ in changed
         ]
+        waveform_data = [w.data for _, w in changed]
         tok = time.time()
-        self._device._set_vector(zip(nodes, waveform_data))
+        if changed:
+            self._device._set_vector(zip(nodes, waveform_data))
         tik = time.time()
-        print(f"Upload of {len(waveform_data)} waveforms took {tik - tok:.5} s")
-
-    def compile_and_upload_waveforms(self) -> None:
+        for i, w in changed:
+            self._uploaded_waveforms[i] = w.checksum
+        uploaded_bytes = sum(data.nbytes for data in waveform_data)
+        total_bytes = sum(w.data.nbytes for w in self._waveforms)
+        report = UploadReport(
+            uploaded=len(changed),
+            skipped=len(self._waveforms) - len(changed),
+            uploaded_bytes=uploaded_bytes,
+            skipped_bytes=total_bytes - uploaded_bytes,
+            elapsed=tik - tok,
+        )
+        print(
+            f"Upload of {report.uploaded} waveforms took {report.elapsed:.5} s, "
+            f"{report.skipped} unchanged waveforms ({report.skipped_bytes} bytes) "
+            f"skipped"
+        )
+        return report
+
+    def compile_and_upload_waveforms(self, force: bool = False) -> None:
         """Compiles the Sequence Program and uploads the queued waveforms.
 
         Simply combines the two methods to make sure the sequence is compiled
-        before the waveform queue is uplaoded.
+        before the waveform queue is uplaoded. If the sequencer program
+        did not change, only the waveforms are uploaded.
+
+        Arguments:
+            force (bool): A flag that specifies if the program and the
+                waveforms are uploaded even if they did not change
+                (default: False).
 
         """
-        self.compile()
-        self.upload_waveforms()
+        self.compile(force=force)
+        self.upload_waveforms(force=force)
 
     def set_sequence_params(self, **kwargs) -> None:
         """Sets the parameters of the Sequence Program.
@@ -405,25 +443,3 @@ class SHFGenerator:
                     f"{[s.value for s in self._device.allowed_trigger_modes]}!",
                     _logger.ExceptionTypes.ToolkitError,
                 )
-
-    def _seqc_error(self, statusstring):
-        """Extract the relevant lines from seqc program in case of error.
-
-        This method extracts the line number from the compiler status
-        and then finds the relevant lines in the seqc program to guide
-        the user. It works both for errors and warnings.
-        """
-        seqc_error = "\n"
-        seqc = self._program.get_seqc().splitlines()
-        pattern = "line: (.*?)\):"
-        num_error_line = int(re.search(pattern, statusstring).group(1))
-        start_line = max(0, num_error_line - 4)
-        stop_line = min(len(seqc), num_error_line + 1)
-        number_width = len(str(stop_line + 1))
-        for i, line in enumerate(seqc[start_line:stop_line], start=start_line):
-            if i + 1 == num_error_line:
-                seqc_error += f"-> {i + 1: >{number_width}}   {line.strip()}\n"
-            else:
-                seqc_error += f"   {i + 1: >{number_width}}   {line.strip()}\n"
-        seqc_error += "\n"
-        return seqc_error
@@ -3,7 +3,6 @@
 # This software may be modified and distributed under the terms
 # of the MIT license. See the LICENSE file for details.
 
-import time
 
 from zhinst.toolkit.interface import LoggerModule
 from .shf_qachannel import SHFQAChannel
@@ -142,7 +141,7 @@ class SHFReadout:
         Arguments:
             timeout (float): The maximum waiting time in seconds for the
                 Readout (default: 10).
-            sleep_time (float): Time in seconds to wait between
+            sleep_time (float): Maximum time in seconds to wait between
                 requesting Readout state
 
         Raises:
@@ -150,10 +149,25 @@ class SHFReadout:
                 before timeout.
 
         """
-        start_time = time.time()
-        while self.is_running and start_time + timeout >= time.time():
-            time.sleep(sleep_time)
-        if self.is_running and start_time + timeout < time.time():
+        if not self._parent.wait_for(
+            {self._enable: False}, timeout=timeout, max_interval=sleep_time
+        ):
+            _logger.error(
+                "Readout timed out!",
+                _logger.ExceptionTypes.TimeoutError,
+            )
+
+    async def await_done(self, timeout: float = 10, sleep_time: float = 0.005) -> None:
+        """Asynchronous version of `wait_done(...)`.
+
+        Raises:
+            TimeoutError: if the readout recording is not completed
+                before timeout.
+
+        """
+        if not await self._parent.await_for(
+            {self._enable: False}, timeout=timeout, max_interval=sleep_time
+        ):
             _logger.error(
                 "Readout timed out!",
                 _logger.ExceptionTypes.TimeoutError,
@@ -178,7 +192,7 @@ class SHFReadout:
                 recording (default: True).
             timeout (float): The maximum waiting time in seconds for the
                 Readout (default: 10).
-            sleep_time (float): Time in seconds to wait between
+            sleep_time (float): Maximum time in seconds to wait between
                 requesting Readout state
 
         Returns:
@@ -4,7 +4,6 @@
 # of the MIT license. See the LICENSE file for details.
 
 import numpy as np
-import time
 
 from .base import BaseInstrument
 from zhinst.toolkit.interface import LoggerModule
@@ -77,7 +76,7 @@ class SHFScope:
         Arguments:
             timeout (int): The maximum waiting time in seconds for the
                 Scope (default: 10).
-            sleep_time (float): Time in seconds to wait between
+            sleep_time (float): Maximum time in seconds to wait between
                 requesting the progress and records values
 
         Raises:
@@ -85,10 +84,25 @@ class SHFScope:
                 timeout.
 
         """
-        start_time = time.time()
-        while self.is_running and start_time + timeout >= time.time():
-            time.sleep(sleep_time)
-        if self.is_running and start_time + timeout < time.time():
+        if not self._parent.wait_for(
+            {self._enable: False}, timeout=timeout, max_interval=sleep_time
+        ):
+            _logger.error(
+                "Scope recording timed out!",
+                _logger.ExceptionTypes.TimeoutError,
+            )
+
+    async def await_done(self, timeout: float = 10, sleep_time: float = 0.005) -> None:
+        """Asynchronous version of `wait_done(...)`.
+
+        Raises:
+            TimeoutError: If the Scope recording is not done before the
+                timeout.
+
+        """
+        if not await self._parent.await_for(
+            {self._enable: False}, timeout=timeout, max_interval=sleep_time
+        ):
             _logger.error(
                 "Scope recording timed out!",
                 _logger.ExceptionTypes.TimeoutError,
@@ -112,7 +126,7 @@ class SHFScope:
                 recording (default: True).
             timeout (float): The maximum waiting time in seconds for the
                 Scope (default: 10).
-            sleep_time (float): Time in seconds to wait between
+            sleep_time (float): Maximum time in seconds to wait between
                 requesting the progress and records values
 
         Returns:
@@ -169,7 +183,9 @@ class SHFScope:
 
         """
         if value is None:
-            return self.channel1(), self.channel2(), self.channel3(), self.channel4()
+            params = [self.channel1, self.channel2, self.channel3, self.channel4]
+            values = self._parent.get_many(params)
+            return tuple(values[p] for p in params)
         else:
             if isinstance(value, tuple) or isinstance(value, list):
                 if len(value) != 4:
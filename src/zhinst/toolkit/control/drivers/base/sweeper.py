@@ -1,9 +1,12 @@
+import asyncio
 import time
 import numpy as np
-from typing import List, Dict
+from typing import List, Dict, Iterator
 
 from .base import BaseInstrument
+from zhinst.toolkit.control import aio
 from zhinst.toolkit.control.node_tree import Parameter
+from zhinst.toolkit.control.result_sink import ResultSink
 from zhinst.toolkit.interface import LoggerModule
 
 _logger = LoggerModule(__name__)
@@ -141,6 +144,12 @@ class SweeperModule:
         ...
         >>> result = mfli.sweeper.results[signal]
 
+    Long sweeps are streamed with `stream(...)`, which yields the partial
+    results while the sweep is running.
+
+        >>> for results in mfli.sweeper.stream(interval=1):
+        ...     update_plot(results[signal].grid, results[signal].r)
+
     For more information on the results object, see the documentation for
     :class:`zhinst.toolkit.control.drivers.base.sweeper.SweeperResult` below.
 
@@ -164,7 +173,9 @@ class SweeperModule:
         self._sweep_params = {}
 
     def _setup(self) -> None:
-        self._module = self._parent._controller.connection.sweeper_module
+        self._module = self._parent._controller.connection.sweeper_module_for(
+            self._parent.serial
+        )
         # add all parameters from nodetree
         nodetree = self._module.get_nodetree("*")
         for k, v in nodetree.items():
@@ -253,7 +264,9 @@ class SweeperModule:
         self._set("/gridnode", node)
         print(f"set sweep parameter to '{param}': '{node}'")
 
-    def measure(self, verbose: bool = True, timeout: bool = 20) -> None:
+    def measure(
+        self, verbose: bool = True, timeout: bool = 20, sink: ResultSink = None
+    ) -> None:
         """Performs the measurement.
 
         Starts a measurement and stores the result in `sweeper.results`. This
@@ -266,12 +279,152 @@ class SweeperModule:
                 (default: True)
             timeout (int): The measurement will be stopped after timeout. The
                 value is given in seconds. (default: 20)
+            sink (:class:`ResultSink`): If given, the sweeps of all
+                signals are written to the sink. (default: None)
+
+        Raises:
+            TimeoutError: if the measurement is not completed before
+                timeout.
+
+        """
+        self._start_measurement(verbose)
+        tik = time.time()
+        while not self._module.finished():
+            self._print_progress(verbose)
+            time.sleep(0.5)
+            tok = time.time()
+            if tok - tik > timeout:
+                _logger.error(
+                    f"{self.name}: Measurement timed out!",
+                    _logger.ExceptionTypes.TimeoutError,
+                )
+        self._finish_measurement(sink)
+
+    async def ameasure(
+        self, verbose: bool = True, timeout: float = 20, sink: ResultSink = None
+    ) -> None:
+        """Asynchronous version of `measure(...)`.
+
+        Every device has its own sweeper module, the measurements of
+        several devices run at the same time. Measurements with the same
+        module are run one after the other, but the event loop is never
+        blocked.
 
         Raises:
             TimeoutError: if the measurement is not completed before
                 timeout.
 
         """
+        async with aio.lock_for(self._module):
+            await aio.run_blocking(self._start_measurement, verbose)
+            tik = time.time()
+            while not await aio.run_blocking(self._module.finished):
+                await aio.run_blocking(self._print_progress, verbose)
+                await asyncio.sleep(0.5)
+                tok = time.time()
+                if tok - tik > timeout:
+                    _logger.error(
+                        f"{self.name}: Measurement timed out!",
+                        _logger.ExceptionTypes.TimeoutError,
+                    )
+            await aio.run_blocking(self._finish_measurement, sink)
+
+    def stream(
+        self,
+        interval: float = 0.5,
+        timeout: float = None,
+        verbose: bool = False,
+        sink: ResultSink = None,
+    ) -> Iterator[Dict[str, "SweeperResult"]]:
+        """Streams the partial results while the sweep is running.
+
+        Subscribes to all the paths in `sweeper.signals`, starts the sweep
+        and reads the data periodically with `read(...)`. The arrays of
+        the results, e.g. `grid`, `value` or `r`, are allocated once with
+        the length `samplecount` and filled in place with every read.
+        Points that were not swept yet are `NaN`. The sweep is finished
+        and the signals are unsubscribed when the sweep is done or when
+        the loop over the stream is left.
+
+            >>> signal = mfli.sweeper.signals_add("demod0")
+            >>> for results in mfli.sweeper.stream(interval=2):
+            ...     line.set_data(results[signal].grid, results[signal].r)
+            >>> mfli.sweeper.results[signal].r
+            array([0.00112, 0.00113, ...])
+
+        The next read only happens when the consumer asks for the next
+        result, at most every `interval` seconds. The yielded results are
+        the same objects on every iteration, their arrays are updated by
+        the next read.
+
+        Arguments:
+            interval (float): Minimum time in seconds between two reads
+                (default: 0.5).
+            timeout (float): The sweep will be stopped after the timeout
+                in seconds. If `None`, the stream runs until the sweep is
+                finished or the loop is left (default: None).
+            verbose (bool): A flag to enable or disable console output
+                (default: False).
+            sink (:class:`ResultSink`): If given, the sweep of every
+                signal is written to the sink once it is finished
+                (default: None).
+
+        Raises:
+            TimeoutError: if the sweep is not completed before the
+                timeout.
+
+        Yields:
+            A dictionary with the signal strings as keys and
+            :class:`SweeperResult` s with the partial results as values.
+
+        """
+        samplecount = int(self._get("samplecount"))
+        self._results = {}
+        self._start_measurement(verbose)
+        tik = time.time()
+        try:
+            while True:
+                last_read = time.time()
+                finished = self._module.finished()
+                self._print_progress(verbose)
+                if self._update_results(self._module.read(flat=True), samplecount):
+                    yield self._results
+                if finished:
+                    if sink is not None:
+                        self._write_results(sink)
+                    break
+                if timeout is not None and time.time() - tik > timeout:
+                    _logger.error(
+                        f"{self._parent.name}: Measurement timed out!",
+                        _logger.ExceptionTypes.TimeoutError,
+                    )
+                time.sleep(max(0, interval - (time.time() - last_read)))
+        finally:
+            self._module.finish()
+            self._module.unsubscribe("*")
+            if verbose:
+                print("Finished")
+
+    def _update_results(self, result: Dict, samplecount: int) -> bool:
+        """Copies the partial sweeps into the preallocated results."""
+        updated = False
+        for node in self.signals:
+            node = node.lower()
+            if not result.get(node) or not result[node][0]:
+                continue
+            sweep = result[node][0][-1]
+            if node not in self._results:
+                self._results[node] = SweeperResult(node, {})
+            self._results[node]._fill(sweep, samplecount)
+            updated = True
+        return updated
+
+    def _write_results(self, sink: ResultSink) -> None:
+        for node, result in self._results.items():
+            sink.append(node, result._result_dict)
+        sink.flush()
+
+    def _start_measurement(self, verbose: bool) -> None:
         self._set("endless", 0)
         self._set("clearhistory", 1)
         for path in self.signals:
@@ -283,22 +436,23 @@ class SweeperModule:
                 f"Sweeping {self._get('/gridnode')} from {self._get('/start')} to {self._get('/stop')}"
             )
         self._module.execute()
-        tik = time.time()
-        while not self._module.finished():
-            if verbose:
-                print(f"Progress: {(self._module.progress()[0] * 100):.1f}%")
-            time.sleep(0.5)
-            tok = time.time()
-            if tok - tik > timeout:
-                _logger.error(
-                    f"{self.name}: Measurement timed out!",
-                    _logger.ExceptionTypes.TimeoutError,
-                )
+
+    def _print_progress(self, verbose: bool) -> None:
+        if verbose:
+            print(f"Progress: {(self._module.progress()[0] * 100):.1f}%")
+
+    def _finish_measurement(self, sink: ResultSink = None) -> None:
         print("Finished")
         result = self._module.read(flat=True)
         self._module.finish()
         self._module.unsubscribe("*")
         self._get_result_from_dict(result)
+        if sink is not None:
+            for node in self.signals:
+                for sweeps in result[node.lower()]:
+                    for sweep in sweeps:
+                        sink.append(node.lower(), sweep)
+            sink.flush()
 
     def application_list(self) -> List:
         """Lists the availbale application presets.
@@ -424,6 +578,39 @@ class SweeperResult:
         for k, v in result_dict.items():
             setattr(self, k, v)
 
+    def _fill(self, sweep: Dict, samplecount: int) -> None:
+        """Updates the result with a partial sweep.
+
+        Arrays with one entry per sweep point, i.e. with the length of
+        the `grid` of the partial sweep, are copied into arrays of length
+        `samplecount`, which are allocated on the first call and filled
+        in place afterwards. Points that were not swept yet are `NaN`
+        for floating point arrays and 0 otherwise. All other items are
+        replaced.
+
+        """
+        grid = sweep.get("grid")
+        points = len(grid) if isinstance(grid, np.ndarray) else samplecount
+        for k, v in sweep.items():
+            per_point = (
+                isinstance(v, np.ndarray)
+                and v.ndim == 1
+                and v.dtype.kind in "biufc"
+                and len(v) == points <= samplecount
+            )
+            if not per_point:
+                self._result_dict[k] = v
+                setattr(self, k, v)
+                continue
+            current = self._result_dict.get(k)
+            if not isinstance(current, np.ndarray) or len(current) != samplecount:
+                current = np.zeros(samplecount, dtype=v.dtype)
+                if v.dtype.kind in "fc":
+                    current[:] = np.nan
+                self._result_dict[k] = current
+                setattr(self, k, current)
+            current[: len(v)] = v
+
     @property
     def attributes(self):
         attributes = []
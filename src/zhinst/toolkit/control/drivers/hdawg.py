@@ -121,6 +121,7 @@ class HDAWG(BaseInstrument):
 
         """
         super().factory_reset(sync=sync)
+        [awg._reset_uploads() for awg in self.awgs]
 
     def enable_qccs_mode(self) -> None:
         """Configure the instrument to work with PQSC
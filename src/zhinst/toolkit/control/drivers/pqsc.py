@@ -4,7 +4,6 @@
 # of the MIT license. See the LICENSE file for details.
 
 import numpy as np
-import time
 
 from zhinst.toolkit.control.drivers.base import BaseInstrument
 from zhinst.toolkit.interface import DeviceTypes, LoggerModule
@@ -181,7 +180,7 @@ class PQSC(BaseInstrument):
         Arguments:
             timeout (float): The maximum waiting time in seconds for the
                 PQSC (default: 10).
-            sleep_time (float): Time in seconds to wait between
+            sleep_time (float): Maximum time in seconds to wait between
                 requesting PQSC state
 
         Raises:
@@ -189,10 +188,25 @@ class PQSC(BaseInstrument):
                 triggers and processing feedback before the timeout.
 
         """
-        start_time = time.time()
-        while self.is_running and start_time + timeout >= time.time():
-            time.sleep(sleep_time)
-        if self.is_running and start_time + timeout < time.time():
+        if not self.wait_for(
+            {self._enable: False}, timeout=timeout, max_interval=sleep_time
+        ):
+            _logger.error(
+                "PQSC timed out!",
+                _logger.ExceptionTypes.TimeoutError,
+            )
+
+    async def await_done(self, timeout: float = 10, sleep_time: float = 0.005) -> None:
+        """Asynchronous version of `wait_done(...)`.
+
+        Raises:
+            TimeoutError: If the PQSC is not done sending out all
+                triggers and processing feedback before the timeout.
+
+        """
+        if not await self.await_for(
+            {self._enable: False}, timeout=timeout, max_interval=sleep_time
+        ):
             _logger.error(
                 "PQSC timed out!",
                 _logger.ExceptionTypes.TimeoutError,
@@ -242,19 +256,13 @@ class PQSC(BaseInstrument):
         """
         if type(ports) is not list:
             ports = [ports]
-        for port in ports:
-            zsync_connection_status = self._get(f"zsyncs/{port}/connection/status")
-            start_time = time.time()
-            while (
-                blocking
-                and start_time + timeout >= time.time()
-                and zsync_connection_status != 2
-            ):
-                time.sleep(1)
-                # Check again if status is 'connected' and update the variable.
-                zsync_connection_status = self._get(f"zsyncs/{port}/connection/status")
+        nodes = [f"zsyncs/{port}/connection/status" for port in ports]
+        if blocking:
+            self.wait_for({node: 2 for node in nodes}, timeout=timeout, max_interval=1)
+        zsync_connection_status = self.get_many(nodes)
+        for port, node in zip(ports, nodes):
             # Throw an exception if the instrument is still not connected after timeout
-            if zsync_connection_status != 2:
+            if zsync_connection_status[node] != 2:
                 _logger.error(
                     f"Check ZSync connection to the instrument on port {port} "
                     f"(port {port + 1} on the rear panel) of PQSC.",
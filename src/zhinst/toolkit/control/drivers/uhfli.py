@@ -100,6 +100,8 @@ class UHFLI(BaseInstrument):
                 
         """
         super().factory_reset(sync=sync)
+        if self._awg is not None:
+            self._awg._reset_uploads()
 
     def _init_awg_cores(self):
         """Initialize the AWGs cores of the device."""
@@ -190,6 +190,7 @@ class UHFQA(BaseInstrument):
 
         """
         super().factory_reset(sync=sync)
+        self.awg._reset_uploads()
         # Set the AWG to single shot mode manually since the firmware
         # is not programmed to do this automatically when factory
         # preset is loaded
@@ -229,9 +230,13 @@ class UHFQA(BaseInstrument):
                     f"The maximum size is 10 x 10.",
                     _logger.ExceptionTypes.ValueError,
                 )
+            settings = []
             for r in range(rows):
                 for c in range(cols):
-                    self._set(f"qas/0/crosstalk/rows/{r}/cols/{c}", matrix[r, c])
+                    settings.append(
+                        (f"qas/0/crosstalk/rows/{r}/cols/{c}", matrix[r, c])
+                    )
+            self._set(settings)
 
     def enable_readout_channels(self, channels: List = range(10)) -> None:
         """Enable weighted integration on the specified readout
@@ -252,7 +257,9 @@ class UHFQA(BaseInstrument):
                     f"The channel index {i} is out of range!",
                     _logger.ExceptionTypes.ValueError,
                 )
-            self.channels[i].enable()
+        with self.batch():
+            for i in channels:
+                self.channels[i].enable()
 
     def disable_readout_channels(self, channels: List = range(10)) -> None:
         """Disables weighted integration on the specified readout
@@ -273,7 +280,9 @@ class UHFQA(BaseInstrument):
                     f"The channel index {i} is out of range!",
                     _logger.ExceptionTypes.ValueError,
                 )
-            self.channels[i].disable()
+        with self.batch():
+            for i in channels:
+                self.channels[i].disable()
 
     def enable_qccs_mode(self) -> None:
         """Configure the instrument to work with PQSC.
@@ -731,12 +740,12 @@ class AWG(AWGCore):
                 _logger.ExceptionTypes.ToolkitError,
             )
 
-    def compile(self) -> None:
-        """Wrap the 'compile(...)' method of the parent class
-        `AWGCore`."""
+    def _sequencer_program(self) -> str:
+        """Wrap the '_sequencer_program()' method of the parent class
+        `AWGCore` used by `compile()` and `acompile()`."""
         if self.sequence_params["sequence_type"] == SequenceType.READOUT:
             self.update_readout_params()
-        super().compile()
+        return super()._sequencer_program()
 
 
 class ReadoutChannel:
@@ -943,16 +952,21 @@ class ReadoutChannel:
         self._parent._set(node + f"{self._index}/imag", np.zeros(4096))
 
     def _set_int_weights(self):
-        self._reset_int_weights()
-        length = self._parent.integration_length()
-        freq = self.readout_frequency()
-        envelope = self.int_weights_envelope()
-        node = f"/qas/0/integration/weights/{self._index}/"
-        _demod_weights = self._demod_weights(length, envelope, freq, 0)
-        _demod_weights_real = np.ascontiguousarray(np.real(_demod_weights))
-        _demod_weights_imag = np.ascontiguousarray(np.imag(_demod_weights))
-        self._parent._set_vector(node + "real", _demod_weights_real)
-        self._parent._set_vector(node + "imag", _demod_weights_imag)
+        with self._parent.batch():
+            # The integration length may have been set in the same batch
+            length = int(self._parent._get_buffered("qas/0/integration/length"))
+            freq = self.readout_frequency()
+            envelope = self.int_weights_envelope()
+            node = f"/qas/0/integration/weights/{self._index}/"
+            _demod_weights = self._demod_weights(length, envelope, freq, 0)
+            # Pad the weights with zeros to the full memory length instead
+            # of resetting the weights with a separate write beforehand
+            _demod_weights_real = np.zeros(4096)
+            _demod_weights_imag = np.zeros(4096)
+            _demod_weights_real[:length] = np.real(_demod_weights)
+            _demod_weights_imag[:length] = np.imag(_demod_weights)
+            self._parent._set_vector(node + "real", _demod_weights_real)
+            self._parent._set_vector(node + "imag", _demod_weights_imag)
 
     @staticmethod
     def _demod_weights(length, envelope, freq, phase):
@@ -978,9 +992,10 @@ class ReadoutChannel:
         return result / n_averages
 
     def __repr__(self):
+        values = self._parent.get_many([self.rotation, self.threshold])
         s = f"Readout Channel {self._index}:  {super().__repr__()}\n"
-        s += f"     rotation          : {self.rotation()}\n"
-        s += f"     threshold         : {self.threshold()}\n"
+        s += f"     rotation          : {values[self.rotation]}\n"
+        s += f"     threshold         : {values[self.threshold]}\n"
         if self._enabled:
             s += f"     readout_frequency : {self.readout_frequency()}\n"
             s += f"     readout_amplitude : {self.readout_amplitude()}\n"
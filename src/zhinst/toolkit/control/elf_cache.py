@@ -0,0 +1,174 @@
+# Copyright (C) 2020 Zurich Instruments
+#
+# This software may be modified and distributed under the terms
+# of the MIT license. See the LICENSE file for details.
+"""Zurich Instruments Toolkit (zhinst-toolkit) ELF Cache.
+
+This module implements a content-addressed on-disk cache for the ELF
+files produced by the AWG compiler. Compiling a sequencer program takes
+seconds while uploading an existing ELF file is fast. Calibration loops
+often recompile the very same program with different waveforms, the
+cache allows to skip the compiler in that case.
+"""
+
+import hashlib
+import os
+import tempfile
+
+from zhinst.toolkit.interface import LoggerModule
+
+_logger = LoggerModule(__name__)
+
+
+def program_hash(seqc: str) -> str:
+    """Calculates the hash of a sequencer program.
+
+    The *'automatically generated'* line of the header holds the time
+    the program was generated at and is ignored, it does not change the
+    compiled program.
+
+    Arguments:
+        seqc (str): The sequencer program.
+
+    Returns:
+        The SHA-256 hex digest of the program.
+
+    """
+    lines = [
+        line
+        for line in seqc.splitlines()
+        if not line.startswith("// automatically generated:")
+    ]
+    return hashlib.sha256("\n".join(lines).encode()).hexdigest()
+
+
+class ELFCache:
+    """Content-addressed on-disk cache for compiled ELF files.
+
+    The ELF files are stored under a key built from the sequencer
+    program, the device type, the index of the AWG Core, the firmware
+    revision and the installed options of the device. If any of them
+    changes, the program is compiled again. The cached ELF files are
+    never invalidated otherwise, the cache directory can be emptied with
+    `clear()`.
+
+        >>> hd = HDAWG("hdawg 1", "dev8030", elf_cache="~/.zhinst/elf")
+        >>> ...
+        >>> hd.awgs[0].compile()  # compiles and stores the ELF file
+        >>> hd.awgs[0].compile()  # uploads the cached ELF file
+
+    Arguments:
+        directory (str): The directory the ELF files are stored in. It
+            is created if it does not exist yet.
+
+    Attributes:
+        directory (str): The absolute path of the cache directory.
+        hits (int): Number of times an ELF file was found in the cache.
+        misses (int): Number of times a program had to be compiled.
+
+    """
+
+    KEY_NODES = [
+        "features/devtype",
+        "system/fwrevision",
+        "features/options",
+    ]
+
+    def __init__(self, directory: str) -> None:
+        self._directory = os.path.abspath(os.path.expanduser(directory))
+        self._hits = 0
+        self._misses = 0
+
+    def key(self, device, index: int, seqc: str) -> str:
+        """Builds the cache key of a sequencer program.
+
+        The device type, firmware revision and options are retrieved
+        with a single `daq.get(...)` call.
+
+        Arguments:
+            device (:class:`BaseInstrument`): The connected device.
+            index (int): Index of the AWG Core.
+            seqc (str): The sequencer program.
+
+        Returns:
+            The key as a SHA-256 hex digest.
+
+        """
+        values = device._get(self.KEY_NODES, valueonly=False)
+        parts = [program_hash(seqc), str(index)]
+        for node in self.KEY_NODES:
+            value = values.get(node)
+            if isinstance(value, bytes):
+                value = value.decode()
+            parts.append(str(value).strip())
+        return hashlib.sha256("\n".join(parts).encode()).hexdigest()
+
+    def load(self, key: str) -> bytes:
+        """Loads an ELF file from the cache.
+
+        Arguments:
+            key (str): The key built with `key(...)`.
+
+        Returns:
+            The content of the ELF file or `None` if it is not cached.
+
+        """
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            self._misses += 1
+            return None
+        except OSError as e:
+            _logger.warning(f"Could not read the cached ELF file {path}: {e}")
+            self._misses += 1
+            return None
+        self._hits += 1
+        return data
+
+    def store(self, key: str, data: bytes) -> None:
+        """Writes an ELF file to the cache.
+
+        The file is written to a temporary file first and then moved
+        into place so that an interrupted write never leaves a
+        corrupted ELF file behind.
+
+        Arguments:
+            key (str): The key built with `key(...)`.
+            data (bytes): The content of the ELF file.
+
+        """
+        os.makedirs(self._directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self._directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, self._path(key))
+        except OSError as e:
+            _logger.warning(f"Could not write the ELF file to the cache: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def clear(self) -> None:
+        """Removes all ELF files from the cache directory."""
+        if not os.path.isdir(self._directory):
+            return
+        for f in os.listdir(self._directory):
+            if f.endswith(".elf"):
+                os.remove(os.path.join(self._directory, f))
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self._directory, f"{key}.elf")
+
+    @property
+    def directory(self):
+        return self._directory
+
+    @property
+    def hits(self):
+        return self._hits
+
+    @property
+    def misses(self):
+        return self._misses
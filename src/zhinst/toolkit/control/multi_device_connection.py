@@ -6,15 +6,76 @@
 import numpy as np
 import json
 import pathlib
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+import attr
 
 from zhinst.toolkit.interface import InstrumentConfiguration, LoggerModule
 from zhinst.toolkit.control.connection import ZIConnection
 from zhinst.toolkit.control.drivers import *
 from zhinst.toolkit.control.drivers.base import BaseInstrument
+from zhinst.toolkit.helpers import WaveformLibrary
 
 _logger = LoggerModule(__name__)
 
 
+@attr.s(frozen=True)
+class ConnectionReport:
+    """The outcome of connecting a single device with `connect_devices(...)`.
+
+    Attributes:
+        name (str): The name of the device.
+        serial (str): The serial number of the device.
+        elapsed (float): Time in seconds it took to connect and
+            initialize the device.
+        error (Exception): The exception raised while connecting the
+            device or `None` if it was connected successfully.
+        success (bool): A flag that shows if the device was connected
+            successfully.
+
+    """
+
+    name = attr.ib(type=str)
+    serial = attr.ib(type=str)
+    elapsed = attr.ib(type=float)
+    error = attr.ib(default=None)
+
+    @property
+    def success(self):
+        return self.error is None
+
+
+@attr.s(frozen=True)
+class MeasurementReport:
+    """The outcome of the measurement of a single device with
+    `measure_all(...)`.
+
+    Attributes:
+        name (str): The name of the device.
+        serial (str): The serial number of the device.
+        elapsed (float): Time in seconds the measurement took.
+        results (dict): The results of the measurement with the signal
+            strings as keys, or `None` if the measurement failed.
+        error (Exception): The exception raised during the measurement
+            or `None` if it completed successfully.
+        success (bool): A flag that shows if the measurement completed
+            successfully.
+
+    """
+
+    name = attr.ib(type=str)
+    serial = attr.ib(type=str)
+    elapsed = attr.ib(type=float)
+    results = attr.ib(default=None)
+    error = attr.ib(default=None)
+
+    @property
+    def success(self):
+        return self.error is None
+
+
 class MultiDeviceConnection:
     """A data server connection shared by multiple devices.
 
@@ -38,6 +99,16 @@ class MultiDeviceConnection:
         Successfully connected to device DEV5678 on interface 1GBE
         Successfully connected to device DEV9999 on interface 1GBE
 
+    Many devices are connected faster with `mdc.connect_devices()`, which
+    connects and initializes them in parallel and reports the time it
+    took for every device.
+
+        >>> reports = mdc.connect_devices(
+        >>>     [tk.HDAWG(f"hdawg {i}", serial) for i, serial in enumerate(serials)]
+        >>> )
+        >>> reports["hdawg 0"]
+        ConnectionReport(name='hdawg 0', serial='dev1234', elapsed=2.13, error=None)
+
     The :class:`MultiDeviceConnection` holds dictionaries for every device type
     with the device name as keys:
 
@@ -46,6 +117,19 @@ class MultiDeviceConnection:
         >>> uhfqa = mdc.uhfqas["uhfqa 1"]
         >>> ...
 
+    All devices share the :class:`WaveformLibrary` of the
+    :class:`MultiDeviceConnection`. A waveform that is uploaded to the AWG
+    Cores of several devices is only held once in memory.
+
+    Every lock-in has its own DAQ and Sweeper Module. The measurements
+    that were set up on the lock-ins are run in parallel with
+    `mdc.measure_all()`:
+
+        >>> for mfli in mdc.mflis.values():
+        ...     mfli.daq.signals_add("demod1", "r")
+        >>> reports = mdc.measure_all(timeout=10)
+        >>> reports["mfli 1"].results
+
 
     Keyword Arguments:
         host (str): the host of the data server (default: 'localhost')
@@ -62,6 +146,8 @@ class MultiDeviceConnection:
         mflis (dict): A dictionary of :class:`MFLI` s with the device names as
             keys.
         pqsc (:class:`PQSC`): A PQSC if one is added, otherwise None
+        waveform_library (:class:`WaveformLibrary`): The library that
+            holds the waveform data of all devices.
 
     Raises:
         ToolkitError: if an unknown device is added
@@ -76,6 +162,7 @@ class MultiDeviceConnection:
         self._mflis = {}
         self._pqsc = None
         self._shfqas = {}
+        self._waveform_library = WaveformLibrary()
         config = InstrumentConfiguration()
         config.api_config.host = kwargs.get("host", "localhost")
         config.api_config.port = kwargs.get("port", 8004)
@@ -104,6 +191,183 @@ class MultiDeviceConnection:
             ToolkitError: if the device is not recognized
 
         """
+        self._add_device(device)
+        device.setup(connection=self._shared_connection)
+        device.connect_device()
+
+    def connect_devices(
+        self, devices: List[BaseInstrument], max_workers: int = 8
+    ) -> Dict[str, ConnectionReport]:
+        """Connects several devices to the :class:`MultiDeviceConnection`.
+
+        The devices are discovered, connected to the shared Data Server
+        and initialized in parallel on a thread pool. Calls to the
+        shared Data Server session are serialised by the
+        :class:`ZIConnection`, the discovery, the nodetree build and the
+        driver initialisation of the devices overlap with them. A
+        device that fails to connect does not abort the others, it is
+        reported and not added to the :class:`MultiDeviceConnection`.
+
+        Arguments:
+            devices (list): The devices to be added, each has to be one
+                of :class:`HDAWG`, :class:`UHFQA`, :class:`UHFLI`,
+                :class:`MFLI`, :class:`PQSC`, :class:`SHFQA`.
+            max_workers (int): Maximum number of devices that are
+                connected at the same time (default: 8).
+
+        Raises:
+            ToolkitError: if a device is not recognized
+            ToolkitConnectionError: if the :class:`MultiDeviceConnection`
+                is not set up yet
+
+        Returns:
+            A dictionary with the device names as keys and a
+            :class:`ConnectionReport` for every device as values.
+
+        """
+        for device in devices:
+            self._check_device(device)
+        if self._shared_connection is None:
+            _logger.error(
+                "The MultiDeviceConnection is not set up, call `setup()` first.",
+                _logger.ExceptionTypes.ToolkitConnectionError,
+            )
+        if not devices:
+            return {}
+        with ThreadPoolExecutor(
+            max_workers=max(1, min(max_workers, len(devices))),
+            thread_name_prefix="zhinst-toolkit-connect",
+        ) as executor:
+            futures = [executor.submit(self._connect, device) for device in devices]
+        reports = {}
+        for device, future in zip(devices, futures):
+            report = future.result()
+            reports[device.name] = report
+            if report.success:
+                self._add_device(device)
+                _logger.info(
+                    f"Connected {report.name} ({report.serial}) in "
+                    f"{report.elapsed:.2f} s."
+                )
+            else:
+                _logger.warning(
+                    f"Failed to connect {report.name} ({report.serial}): "
+                    f"{report.error}"
+                )
+        return reports
+
+    def _connect(self, device: BaseInstrument) -> ConnectionReport:
+        start_time = time.perf_counter()
+        try:
+            device.setup(connection=self._shared_connection)
+            device.connect_device()
+        except Exception as e:
+            return ConnectionReport(
+                device.name, device.serial, time.perf_counter() - start_time, e
+            )
+        return ConnectionReport(
+            device.name, device.serial, time.perf_counter() - start_time
+        )
+
+    def measure_all(
+        self,
+        devices: List[BaseInstrument] = None,
+        module: str = "daq",
+        timeout: float = 20,
+        max_workers: int = 8,
+    ) -> Dict[str, MeasurementReport]:
+        """Runs the measurements of several lock-ins in parallel.
+
+        The `measure(...)` method of the DAQ or Sweeper Module of every
+        lock-in is called on a thread pool. Every lock-in has its own
+        module, so the measurements run at the same time and none of
+        them changes the settings of another. A measurement that fails
+        or times out does not abort the others, it is reported.
+
+        Arguments:
+            devices (list): The lock-ins to be measured, each has to be
+                a :class:`UHFLI` or :class:`MFLI`. By default all
+                lock-ins of the :class:`MultiDeviceConnection` are
+                measured.
+            module (str): The module that measures, either 'daq' or
+                'sweeper' (default: 'daq').
+            timeout (float): The timeout in seconds of every single
+                measurement (default: 20).
+            max_workers (int): Maximum number of lock-ins that are
+                measured at the same time (default: 8).
+
+        Raises:
+            ValueError: if the module is neither 'daq' nor 'sweeper'
+            ToolkitError: if a device is not a lock-in
+
+        Returns:
+            A dictionary with the device names as keys and a
+            :class:`MeasurementReport` for every device as values.
+
+        """
+        if module not in ("daq", "sweeper"):
+            _logger.error(
+                f"The module must be 'daq' or 'sweeper', not '{module}'.",
+                _logger.ExceptionTypes.ValueError,
+            )
+        if devices is None:
+            devices = list(self._uhflis.values()) + list(self._mflis.values())
+        for device in devices:
+            if not isinstance(device, (UHFLI, MFLI)):
+                _logger.error(
+                    f"{device.name} is not a lock-in, only UHFLIs and MFLIs "
+                    f"can be measured.",
+                    _logger.ExceptionTypes.ToolkitError,
+                )
+        if not devices:
+            return {}
+        with ThreadPoolExecutor(
+            max_workers=max(1, min(max_workers, len(devices))),
+            thread_name_prefix="zhinst-toolkit-measure",
+        ) as executor:
+            futures = [
+                executor.submit(self._measure, device, module, timeout)
+                for device in devices
+            ]
+        reports = {}
+        for device, future in zip(devices, futures):
+            report = future.result()
+            reports[device.name] = report
+            if not report.success:
+                _logger.warning(
+                    f"Measurement of {report.name} ({report.serial}) failed: "
+                    f"{report.error}"
+                )
+        return reports
+
+    def _measure(
+        self, device: BaseInstrument, module: str, timeout: float
+    ) -> MeasurementReport:
+        measurement = getattr(device, module)
+        start_time = time.perf_counter()
+        try:
+            measurement.measure(verbose=False, timeout=timeout)
+        except Exception as e:
+            return MeasurementReport(
+                device.name, device.serial, time.perf_counter() - start_time, error=e
+            )
+        return MeasurementReport(
+            device.name,
+            device.serial,
+            time.perf_counter() - start_time,
+            results=measurement.results,
+        )
+
+    def _check_device(self, device: BaseInstrument) -> None:
+        if not isinstance(device, (HDAWG, UHFQA, PQSC, UHFLI, MFLI, SHFQA)):
+            _logger.error(
+                "This device is not recognized!",
+                _logger.ExceptionTypes.ToolkitError,
+            )
+
+    def _add_device(self, device: BaseInstrument) -> None:
+        self._check_device(device)
+        device.waveform_library = self._waveform_library
         if isinstance(device, HDAWG):
             self._hdawgs[device.name] = device
         elif isinstance(device, UHFQA):
@@ -111,18 +375,11 @@ class MultiDeviceConnection:
         elif isinstance(device, PQSC):
             self._pqsc = device
         elif isinstance(device, UHFLI):
-            self._uhflis = device
+            self._uhflis[device.name] = device
         elif isinstance(device, MFLI):
-            self._mflis = device
+            self._mflis[device.name] = device
         elif isinstance(device, SHFQA):
             self._shfqas[device.name] = device
-        else:
-            _logger.error(
-                "This device is not recognized!",
-                _logger.ExceptionTypes.ToolkitError,
-            )
-        device.setup(connection=self._shared_connection)
-        device.connect_device()
 
     @property
     def hdawgs(self):
@@ -147,3 +404,7 @@ class MultiDeviceConnection:
     @property
     def shfqas(self):
         return self._shfqas
+
+    @property
+    def waveform_library(self):
+        return self._waveform_library
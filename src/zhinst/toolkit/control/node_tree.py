@@ -13,6 +13,7 @@ import re
 from typing import List, Dict, Callable, Union, Any
 import keyword
 
+from zhinst.toolkit.control import aio
 from zhinst.toolkit.interface import LoggerModule
 
 _logger = LoggerModule(__name__)
@@ -130,26 +131,44 @@ class Parameter:
 
         """
         if "Read" in self._properties:
-            value = self._device._get(self._path)
-            if self._map is not None:
-                allowed_values = list(self._map.keys())
-                if value not in allowed_values:
-                    _logger.error(
-                        f"The value '{value}' is not in {allowed_values}.",
-                        _logger.ExceptionTypes.ValueError,
-                    )
-                value = self._map[value]
-                # If the mapping has more than one value assigned to the
-                # same key, choose the first one in the list.
-                if isinstance(value, list):
-                    value = value[0]
-            return self._get_parser(value)
+            return self._parse_value(self._device._get(self._path))
         else:
             _logger.error(
                 "This parameter is not gettable!",
                 _logger.ExceptionTypes.ToolkitNodeTreeError,
             )
 
+    def _parse_value(self, value):
+        """Parses a value gotten from the device.
+
+        Applies the value mapping and the `get` parser of the
+        :class:`Parameter` to a raw value as returned from the device.
+
+        Arguments:
+            value: The raw value of the node.
+
+        Raises:
+            ValueError: if the  :class:`Parameter` has a value mapping
+                and the value is not among the allowed values
+
+        Returns:
+            The parsed :class:`Parameter` value.
+
+        """
+        if self._map is not None:
+            allowed_values = list(self._map.keys())
+            if value not in allowed_values:
+                _logger.error(
+                    f"The value '{value}' is not in {allowed_values}.",
+                    _logger.ExceptionTypes.ValueError,
+                )
+            value = self._map[value]
+            # If the mapping has more than one value assigned to the
+            # same key, choose the first one in the list.
+            if isinstance(value, list):
+                value = value[0]
+        return self._get_parser(value)
+
     def _setter(self, value, sync=False):
         """Implements a setter for the :class:`Parameter`.
 
@@ -349,6 +368,39 @@ class Parameter:
         else:
             return self._setter(value, sync)
 
+    async def aget(self):
+        """Asynchronous version of getting the :class:`Parameter`.
+
+        The request is run on a thread pool so the event loop is not
+        blocked.
+
+            >>> await uhfqa.nodetree.osc.freq.aget()
+            10000000.00
+
+        Returns:
+            The :class:`Parameter` value as returned from the `get`
+            parser.
+
+        """
+        return await aio.run_blocking(self._getter)
+
+    async def aset(self, value, sync=False):
+        """Asynchronous version of setting the :class:`Parameter`.
+
+            >>> await uhfqa.nodetree.osc.freq.aset(10e6)
+
+        Arguments:
+            value: value to be set
+
+        Keyword Arguments:
+            sync (bool): A flag that specifies if a synchronisation
+                should be performed between the device and the data
+                server after setting the :class:`Parameter` value
+                (default: False).
+
+        """
+        return await aio.run_blocking(self._setter, value, sync=sync)
+
     def __repr__(self):
         s = f"Node: {self._path}\n"
         if self._description is not None:
@@ -411,13 +463,131 @@ class Node:
         self._parent = parent
         self._device = parent._device
 
+    def __getattr__(self, name):
+        # Only called if the attribute is not found the usual way, i.e.
+        # for children of a lazy node that have not been created yet.
+        lazy_children = self.__dict__.get("_lazy_children", None)
+        if lazy_children is None or name not in lazy_children:
+            raise AttributeError(
+                f"'{type(self).__name__}' object has no attribute '{name}'"
+            )
+        child = self._create_child(self, lazy_children.pop(name), lazy=True)
+        setattr(self, name, child)
+        return child
+
+    def __dir__(self):
+        return list(super().__dir__()) + list(self.__dict__.get("_lazy_children", {}))
+
     @property
     def nodes(self):
-        return [k for k, v in self.__dict__.items() if isinstance(v, (Node, list))]
+        nodes = [k for k, v in self.__dict__.items() if isinstance(v, (Node, list))]
+        for k, v in self.__dict__.get("_lazy_children", {}).items():
+            if not Node._is_parameter_dict(v):
+                nodes.append(k)
+        return nodes
 
     @property
     def parameters(self):
-        return [k for k, v in self.__dict__.items() if isinstance(v, Parameter)]
+        params = [k for k, v in self.__dict__.items() if isinstance(v, Parameter)]
+        for k, v in self.__dict__.get("_lazy_children", {}).items():
+            if Node._is_parameter_dict(v):
+                params.append(k)
+        return params
+
+    def snapshot(self) -> Dict:
+        """Gets the values of all readable :class:`Parameters` below the
+        :class:`Node`.
+
+        All values are retrieved with a single `daq.get(...)` call
+        using `get_many(...)` of the device. Streaming nodes are
+        skipped.
+
+            >>> hdawg.nodetree.sigouts[0].snapshot()
+            {'/dev8030/sigouts/0/on': 1,
+             '/dev8030/sigouts/0/range': 0.8,
+             ...}
+
+        Returns:
+            A dictionary with the lowercase node paths as keys and the
+            parsed :class:`Parameter` values as values.
+
+        """
+        params = [
+            p
+            for p in self._collect_parameters()
+            if p._properties is not None
+            and "Read" in p._properties
+            and "Stream" not in p._properties
+        ]
+        values = self._device.get_many(params)
+        return {p._path.lower(): v for p, v in values.items()}
+
+    def _collect_parameters(self) -> List:
+        """Recursively collects all :class:`Parameters` below the
+        :class:`Node`."""
+        params = [getattr(self, k) for k in self.parameters]
+        for k in self.nodes:
+            if k == "_parent":
+                continue
+            child = getattr(self, k)
+            for node in child if isinstance(child, list) else [child]:
+                if isinstance(node, Parameter):
+                    params.append(node)
+                else:
+                    params += node._collect_parameters()
+        return params
+
+    @staticmethod
+    def _is_parameter_dict(nodetree_dict: dict) -> bool:
+        if all(isinstance(k, int) for k in nodetree_dict.keys()):
+            if len(nodetree_dict) != 1:
+                return False
+            nodetree_dict = list(nodetree_dict.values())[0]
+        return "Node" in nodetree_dict.keys()
+
+    @staticmethod
+    def _attribute_name(key: str, nodetree_dict: dict) -> str:
+        """Returns the attribute name of a child in the :class:`NodeTree`.
+
+        An enumerated layer with only a single entry (e.g. 'qas/0/..')
+        is added as a single :class:`Node` and the plural of 'qas' is
+        turned into 'qa'.
+
+        """
+        if all(isinstance(k, int) for k in nodetree_dict.keys()):
+            if len(nodetree_dict) == 1:
+                return key[:-1]
+        return key
+
+    def _create_child(self, parent, nodetree_dict: dict, lazy: bool = False):
+        """Creates a :class:`Node`, :class:`NodeList` or :class:`Parameter`.
+
+        Arguments:
+            parent (:class:`Node`): The parent :class:`Node` of the child.
+            nodetree_dict (dict): The (sub-)dictionary describing the
+                child.
+            lazy (bool): A flag that specifies if the children of a
+                created :class:`Node` are only created on their first
+                access (default: False).
+
+        Returns:
+            The created :class:`Node`, :class:`NodeList` or
+            :class:`Parameter`.
+
+        """
+        if all(isinstance(k, int) for k in nodetree_dict.keys()):
+            lst = NodeList()
+            for value in nodetree_dict.values():
+                lst.append(self._create_child(parent, value, lazy=lazy))
+            return lst[0] if len(lst) == 1 else lst
+        if "Node" in nodetree_dict.keys():
+            return Parameter(parent, nodetree_dict)
+        node = Node(parent)
+        if lazy:
+            self._init_subnodes_lazily(node, nodetree_dict)
+        else:
+            self._init_subnodes_recursively(node, nodetree_dict)
+        return node
 
     def _init_subnodes_recursively(self, parent, nodetree_dict: dict):
         """Recursively adds class:`Nodes` and/or :class:`Parameters`
@@ -448,29 +618,36 @@ class Node:
 
         """
         for key, value in nodetree_dict.items():
-            if all(isinstance(k, int) for k in value.keys()):
-                lst = NodeList()
-                for k in value.keys():
-                    if "Node" in value[k].keys():
-                        param = Parameter(parent, value[k])
-                        lst.append(param)
-                    else:
-                        node = Node(parent)
-                        lst.append(node)
-                        self._init_subnodes_recursively(node, value[k])
-                if len(lst) == 1:
-                    key = key[:-1]
-                    setattr(parent, key, lst[0])
-                else:
-                    setattr(parent, key, lst)
-            else:
-                if "Node" in value.keys():
-                    param = Parameter(parent, value)
-                    setattr(parent, key, param)
-                else:
-                    node = Node(parent)
-                    setattr(parent, key, node)
-                    self._init_subnodes_recursively(node, value)
+            setattr(
+                parent,
+                self._attribute_name(key, value),
+                self._create_child(parent, value),
+            )
+
+    def _init_subnodes_lazily(self, parent, nodetree_dict: dict):
+        """Registers the children of a parent :class:`Node` for lazy
+        creation.
+
+        Instead of creating all :class:`Nodes` and :class:`Parameters`
+        right away, only the (sub-)dictionaries describing the children
+        are stored in the parent :class:`Node`. A child is created in
+        `__getattr__(...)` the first time it is accessed. The naming
+        of the children is the same as in
+        `_init_subnodes_recursively(...)`.
+
+        Arguments:
+            parent (:class:`Node`): The parent :class:`Node` that the
+                :class:`Nodes` or :class:`Parameters` are added to as
+                attributes.
+            nodetree_dict (dict): A (sub-)dictionary containing the
+                next :class:`Nodes` and/or :class:`Parameters` as
+                dicts.
+
+        """
+        parent._lazy_children = {
+            self._attribute_name(key, value): value
+            for key, value in nodetree_dict.items()
+        }
 
     def __repr__(self):
         s = super().__repr__()
@@ -552,10 +729,23 @@ class NodeTree(Node):
         parameters:
         - clockbase
 
+    If a :class:`NodeTreeCache` is given, the nested dictionary is
+    loaded from the cache as long as the device type, firmware, FPGA
+    revision and options of the device match the cached entry. Only
+    on a cache miss the nodetree is retrieved from the device and the
+    cache is updated.
+
     Arguments:
         device (:class:`BaseInstrument`): A reference to the instrument
             that the :class:`NodeTree` belongs to. Used for `getting`
             and `setting` of each :class:`Parameter`.
+        cache (:class:`NodeTreeCache`): An optional on-disk cache for
+            the nested nodetree dictionary (default: None).
+        lazy (bool): A flag that specifies if the :class:`Nodes` and
+            :class:`Parameters` are only created the first time they
+            are accessed. Connect time and memory usage then scale
+            with the part of the nodetree that is actually used
+            (default: False).
 
     Attributes:
         device (:class:`BaseInstrument`): The associated device.
@@ -565,10 +755,35 @@ class NodeTree(Node):
 
     """
 
-    def __init__(self, device) -> None:
+    def __init__(self, device, cache=None, lazy: bool = False) -> None:
         self._device = device
-        self._nodetree_dict = self._get_nodetree_dict()
-        self._init_subnodes_recursively(self, self._nodetree_dict)
+        if cache is None:
+            self._nodetree_dict = self._get_nodetree_dict()
+        else:
+            self._nodetree_dict = self._load_nodetree_dict(cache)
+        if lazy:
+            self._init_subnodes_lazily(self, self._nodetree_dict)
+        else:
+            self._init_subnodes_recursively(self, self._nodetree_dict)
+
+    def _load_nodetree_dict(self, cache) -> Dict:
+        """Gets the nested nodetree dictionary using the cache.
+
+        Arguments:
+            cache (:class:`NodeTreeCache`): The on-disk nodetree cache.
+
+        Returns:
+            The nested nodetree dictionary either loaded from the cache
+            or retrieved from the device.
+
+        """
+        serial = self._device.serial
+        key = cache.key(self._device)
+        nodetree = cache.load(serial, key)
+        if nodetree is None:
+            nodetree = self._get_nodetree_dict()
+            cache.store(serial, key, nodetree)
+        return nodetree
 
     def _get_nodetree_dict(self) -> Dict:
         """Gets the :class:`NodeTree` as a nested dictionary.
@@ -590,6 +805,97 @@ class NodeTree(Node):
             dictify(nodetree, hierarchy, value)
         return nodetree
 
+    @property
+    def nodetree_dict(self):
+        return self._nodetree_dict
+
+
+class NodeDictResolver:
+    """Resolves node paths to their node dictionaries from memory.
+
+    Drivers create a :class:`Parameter` for many device nodes in their
+    `_init_params()` methods. Each of them needs the dictionary
+    describing the node as returned from `daq.listNodesJSON(...)`.
+    Instead of requesting it from the data server for every single
+    node, the :class:`NodeDictResolver` indexes all node dictionaries
+    of a nodetree once and answers the requests from memory.
+
+    The nodetree can either be the flat dictionary as returned from
+    `daq.listNodesJSON(...)` or the nested dictionary of a
+    :class:`NodeTree`.
+
+    Arguments:
+        nodetree_dict (dict): A flat or nested nodetree dictionary.
+
+    Attributes:
+        round_trips_saved (int): The number of `daq.listNodesJSON(...)`
+            calls that were saved by resolving node dictionaries from
+            memory.
+        misses (int): The number of node paths that could not be
+            resolved.
+
+    """
+
+    ROUND_TRIPS_PER_NODE = 2
+
+    def __init__(self, nodetree_dict: Dict) -> None:
+        self._node_dicts = {}
+        self._round_trips_saved = 0
+        self._misses = 0
+        self._index(nodetree_dict)
+
+    def _index(self, nodetree_dict: Dict) -> None:
+        if isinstance(nodetree_dict.get("Node", None), str):
+            self._node_dicts[nodetree_dict["Node"].lower()] = nodetree_dict
+            return
+        for value in nodetree_dict.values():
+            if isinstance(value, dict):
+                self._index(value)
+
+    def resolve(self, device_node: str) -> Dict:
+        """Gets the node dictionary of a node.
+
+        Arguments:
+            device_node (str): The full node path including the device
+                serial, e.g. '/dev8030/sigouts/0/on'.
+
+        Returns:
+            The dictionary containing the keys: 'Node', 'Description',
+            'Unit', etc. or `None` if the node is unknown.
+
+        """
+        node_dict = self._node_dicts.get(device_node.lower(), None)
+        if node_dict is None:
+            self._misses += 1
+        else:
+            self._round_trips_saved += self.ROUND_TRIPS_PER_NODE
+        return node_dict
+
+    def node_dict(self, device_node: str) -> Dict:
+        """Gets the node dictionary of a node without counting it as a
+        saved round-trip.
+
+        Arguments:
+            device_node (str): The full node path including the device
+                serial.
+
+        Returns:
+            The node dictionary or `None` if the node is unknown.
+
+        """
+        return self._node_dicts.get(device_node.lower(), None)
+
+    def __len__(self):
+        return len(self._node_dicts)
+
+    @property
+    def round_trips_saved(self):
+        return self._round_trips_saved
+
+    @property
+    def misses(self):
+        return self._misses
+
 
 def dictify(data, keys: List, val: Dict) -> Dict:
     """Turns a flat :class:`NodeTree` dictionary into a nested
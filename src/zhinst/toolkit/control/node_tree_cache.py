@@ -0,0 +1,187 @@
+# Copyright (C) 2020 Zurich Instruments
+#
+# This software may be modified and distributed under the terms
+# of the MIT license. See the LICENSE file for details.
+"""Zurich Instruments Toolkit (zhinst-toolkit) Nodetree Cache.
+
+This module implements a persistent on-disk cache for the parsed
+nodetree of a device. Retrieving the nodetree with
+`daq.listNodesJSON(...)` and converting it to a nested dictionary is
+one of the most expensive steps when connecting a device. The cache
+allows to skip both steps on a reconnect as long as the device type,
+firmware, FPGA revision and installed options are unchanged.
+"""
+
+import os
+import pickle
+import tempfile
+from typing import Dict, Tuple
+
+from zhinst.toolkit.interface import LoggerModule
+
+_logger = LoggerModule(__name__)
+
+
+class NodeTreeCache:
+    """Versioned on-disk cache for the parsed nodetree of a device.
+
+    Every device gets its own cache file in the cache directory. The
+    file holds the parsed nodetree together with a key built from the
+    device type, the firmware revision, the FPGA revision and the
+    installed options of the device. On connect the key is read from
+    the device and compared with the stored key. The cached nodetree
+    is only used if both keys match, otherwise the nodetree is rebuilt
+    and the cache file is overwritten.
+
+        >>> hd = HDAWG("hdawg 1", "dev8030", nodetree_cache="~/.zhinst/nodetrees")
+        >>> hd.setup()
+        >>> hd.connect_device()  # builds the nodetree and writes the cache
+        >>> ...
+        >>> hd.connect_device()  # loads the nodetree from the cache
+
+    Arguments:
+        directory (str): The directory the cache files are stored in.
+            It is created if it does not exist yet.
+
+    Attributes:
+        directory (str): The absolute path of the cache directory.
+        hits (int): Number of times the nodetree was loaded from the
+            cache.
+        misses (int): Number of times the nodetree had to be rebuilt.
+
+    """
+
+    VERSION = 1
+    KEY_NODES = [
+        "features/devtype",
+        "system/fwrevision",
+        "system/fpgarevision",
+        "features/options",
+    ]
+
+    def __init__(self, directory: str) -> None:
+        self._directory = os.path.abspath(os.path.expanduser(directory))
+        self._hits = 0
+        self._misses = 0
+
+    def key(self, device) -> Tuple:
+        """Reads the cache key from the device.
+
+        All key nodes are retrieved with a single `daq.get(...)` call.
+
+        Arguments:
+            device (:class:`BaseInstrument`): The connected device.
+
+        Returns:
+            A tuple with the device type, firmware revision, FPGA
+            revision and the installed options.
+
+        """
+        values = device._get(self.KEY_NODES, valueonly=False)
+        key = []
+        for node in self.KEY_NODES:
+            value = values.get(node)
+            if isinstance(value, bytes):
+                value = value.decode()
+            if isinstance(value, str):
+                value = value.strip()
+            else:
+                value = str(value)
+            key.append(value)
+        return tuple(key)
+
+    def load(self, serial: str, key: Tuple) -> Dict:
+        """Loads the nodetree of a device from the cache.
+
+        Arguments:
+            serial (str): Serial number of the device.
+            key (tuple): The key read from the device with `key(...)`.
+
+        Returns:
+            The cached nodetree entry or `None` if no entry exists for
+            the device or if the stored key does not match.
+
+        """
+        path = self._path(serial)
+        try:
+            with open(path, "rb") as f:
+                entry = pickle.load(f)
+        except FileNotFoundError:
+            self._misses += 1
+            return None
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError) as e:
+            _logger.warning(f"Could not read the nodetree cache file {path}: {e}")
+            self._misses += 1
+            return None
+        if (
+            not isinstance(entry, dict)
+            or entry.get("version") != self.VERSION
+            or entry.get("key") != key
+        ):
+            self._misses += 1
+            return None
+        self._hits += 1
+        return entry["nodetree"]
+
+    def store(self, serial: str, key: Tuple, nodetree: Dict) -> None:
+        """Writes the nodetree of a device to the cache.
+
+        The file is written to a temporary file first and then moved
+        into place so that an interrupted write never leaves a
+        corrupted cache file behind.
+
+        Arguments:
+            serial (str): Serial number of the device.
+            key (tuple): The key read from the device with `key(...)`.
+            nodetree (dict): The nodetree entry to be cached.
+
+        """
+        os.makedirs(self._directory, exist_ok=True)
+        entry = dict(version=self.VERSION, key=key, nodetree=nodetree)
+        fd, tmp_path = tempfile.mkstemp(dir=self._directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self._path(serial))
+        except OSError as e:
+            _logger.warning(f"Could not write the nodetree cache for {serial}: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def clear(self, serial: str = None) -> None:
+        """Removes cache files from the cache directory.
+
+        Arguments:
+            serial (str): Serial number of the device whose cache file
+                should be removed. If not specified, the cache files of
+                all devices are removed (default: None).
+
+        """
+        if serial is not None:
+            paths = [self._path(serial)]
+        elif os.path.isdir(self._directory):
+            paths = [
+                os.path.join(self._directory, f)
+                for f in os.listdir(self._directory)
+                if f.endswith(".nodetree")
+            ]
+        else:
+            paths = []
+        for path in paths:
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _path(self, serial: str) -> str:
+        return os.path.join(self._directory, f"{serial.lower()}.nodetree")
+
+    @property
+    def directory(self):
+        return self._directory
+
+    @property
+    def hits(self):
+        return self._hits
+
+    @property
+    def misses(self):
+        return self._misses
@@ -0,0 +1,216 @@
+# Copyright (C) 2020 Zurich Instruments
+#
+# This software may be modified and distributed under the terms
+# of the MIT license. See the LICENSE file for details.
+"""Zurich Instruments Toolkit (zhinst-toolkit) Node Value Cache.
+
+This module implements an in-memory cache for the values of setting
+nodes of a device. Settings only change when they are set, so reading
+them over and over again from the data server can be avoided.
+"""
+
+import fnmatch
+from typing import Callable, Dict, Tuple
+
+from zhinst.toolkit.interface import LoggerModule
+
+_logger = LoggerModule(__name__)
+
+
+class NodeValueCache:
+    """Cache for the values of the setting nodes of a device.
+
+    The cache is used by the :class:`DeviceConnection` of a device. Only
+    nodes whose properties include *'Setting'* and *'Read'* are cached.
+    Streaming nodes, vector nodes and nodes that are changed by the
+    device itself (e.g. *'awgs/0/enable'* or *'scopes/0/single'*) are
+    never cached. This includes the user registers and counters that are
+    written by the sequencer (e.g. *'awgs/0/userregs/0'* or
+    *'qas/0/result/acquired'*) and the checksum of the uploaded ELF.
+
+    A value is stored in the cache when it is read from the device or
+    when it is returned from one of the `daq.syncSet...(...)` methods.
+    A plain `daq.set(...)` only invalidates the cached value since the
+    device may adjust the set value (e.g. rounding of the number of
+    result averages to a power of two). Wildcard sets invalidate all
+    matching nodes.
+
+        >>> uhfqa = UHFQA("qa", "dev2000", cache=True)
+        >>> ...
+        >>> uhfqa.integration_length()  # read from the device
+        4096
+        >>> uhfqa.integration_length()  # served from the cache
+        4096
+        >>> uhfqa.cache.hits, uhfqa.cache.misses
+        (1, 1)
+        >>> uhfqa.cache.clear()
+
+    Arguments:
+        node_dict (Callable): A function that returns the node
+            dictionary as returned from `daq.listNodesJSON(...)` for a
+            full node path or `None` if it is unknown.
+        enabled (bool): A flag that specifies if the cache is used
+            (default: False).
+
+    Attributes:
+        enabled (bool): A flag that specifies if the cache is used.
+        hits (int): Number of values served from the cache.
+        misses (int): Number of cacheable values that had to be read
+            from the device.
+
+    """
+
+    VOLATILE_NODES = [
+        "*/enable",
+        "*/single",
+        "*/reset",
+        "*/ready",
+        "*/busy",
+        "*/status",
+        "*/load",
+        "*/save",
+        "*/trigger",
+        "*/progress",
+        "*/sequencer/status",
+        "*/userregs/*",
+        "*/elf/checksum",
+        "*/acquired",
+    ]
+
+    def __init__(self, node_dict: Callable, enabled: bool = False) -> None:
+        self._node_dict = node_dict
+        self._enabled = enabled
+        self._values = {}
+        self._cacheable = {}
+        self._excluded = list(self.VOLATILE_NODES)
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, node: str) -> Tuple:
+        """Looks up the value of a node.
+
+        Arguments:
+            node (str): Full lowercase node path including the device
+                serial.
+
+        Returns:
+            A tuple with a flag that specifies if the value was found
+            and the cached value itself.
+
+        """
+        if not self.is_cacheable(node):
+            return False, None
+        if node in self._values:
+            self._hits += 1
+            return True, self._values[node]
+        self._misses += 1
+        return False, None
+
+    def update(self, node: str, value) -> None:
+        """Stores a value read from the device in the cache.
+
+        Arguments:
+            node (str): Full lowercase node path including the device
+                serial.
+            value: The value of the node as returned from the device.
+
+        """
+        if not self.is_cacheable(node):
+            return
+        # Keywords set to integer nodes are returned as strings from
+        # `daq.syncSetString(...)`, only cache values of the node type.
+        if isinstance(value, str) and "String" not in self._cacheable[node]:
+            return
+        self._values[node] = value
+
+    def invalidate(self, node: str) -> None:
+        """Removes a node from the cache.
+
+        Arguments:
+            node (str): Full lowercase node path including the device
+                serial. Wildcards ('*') remove all matching nodes.
+
+        """
+        if "*" in node:
+            for key in fnmatch.filter(list(self._values.keys()), node):
+                del self._values[key]
+        else:
+            self._values.pop(node, None)
+
+    def exclude(self, pattern: str) -> None:
+        """Excludes nodes from being cached.
+
+        Arguments:
+            pattern (str): A node path or a pattern with wildcards
+                ('*'), e.g. *'*/qas/0/result/averages'*.
+
+        """
+        pattern = pattern.lower()
+        self._excluded.append(pattern)
+        self._cacheable = {}
+        self.invalidate(pattern if pattern.startswith("*") else "*" + pattern)
+
+    def clear(self) -> None:
+        """Removes all values from the cache."""
+        self._values = {}
+        self._cacheable = {}
+
+    def is_cacheable(self, node: str) -> bool:
+        """Checks if the value of a node can be cached.
+
+        Arguments:
+            node (str): Full lowercase node path including the device
+                serial.
+
+        Returns:
+            A flag that specifies if the node can be cached.
+
+        """
+        if not self._enabled:
+            return False
+        if node not in self._cacheable:
+            self._cacheable[node] = self._cacheable_type(node)
+        return self._cacheable[node] is not None
+
+    def _cacheable_type(self, node: str) -> str:
+        """Returns the node type if the node can be cached, otherwise
+        `None`."""
+        if "*" in node or node.startswith("/zi/"):
+            return None
+        if any(fnmatch.fnmatch(node, pattern) for pattern in self._excluded):
+            return None
+        node_dict = self._node_dict(node)
+        if node_dict is None:
+            return None
+        properties = node_dict.get("Properties", "")
+        node_type = node_dict.get("Type", "")
+        if (
+            "Setting" in properties
+            and "Read" in properties
+            and "Stream" not in properties
+            and "Vector" not in node_type
+        ):
+            return node_type
+        return None
+
+    @property
+    def enabled(self):
+        return self._enabled
+
+    @enabled.setter
+    def enabled(self, value: bool):
+        self._enabled = bool(value)
+        if not self._enabled:
+            self.clear()
+
+    @property
+    def hits(self):
+        return self._hits
+
+    @property
+    def misses(self):
+        return self._misses
+
+    @property
+    def values(self) -> Dict:
+        return dict(self._values)
@@ -0,0 +1,206 @@
+# Copyright (C) 2020 Zurich Instruments
+#
+# This software may be modified and distributed under the terms
+# of the MIT license. See the LICENSE file for details.
+"""Zurich Instruments Toolkit (zhinst-toolkit) Result Sinks.
+
+This module implements sinks that write the results of the DAQ and
+Sweeper Modules to disk while a measurement is running. Every record,
+e.g. a grid of the DAQ Module or a sweep of the Sweeper Module, is
+appended to resizable, chunked and compressed datasets, so the full
+result of a long measurement is never built in memory.
+
+    >>> with HDF5Sink("overnight.h5") as sink:
+    ...     for chunk in mf.daq.stream(sink=sink, duration=12 * 3600):
+    ...         pass
+
+The sinks depend on the optional packages `h5py` and `zarr`, which are
+only imported when a sink is created.
+"""
+
+import abc
+import importlib
+from typing import Dict
+
+import numpy as np
+
+from zhinst.toolkit.interface import LoggerModule
+
+_logger = LoggerModule(__name__)
+
+# Target size in bytes of a single chunk of a dataset
+CHUNK_BYTES = 2 ** 20
+
+
+def _import(module: str):
+    try:
+        return importlib.import_module(module)
+    except ImportError:
+        _logger.error(
+            f"The package '{module}' is required for this result sink, "
+            f"install it with 'pip install {module}'.",
+            _logger.ExceptionTypes.ToolkitError,
+        )
+
+
+class ResultSink(abc.ABC):
+    """Base class for sinks that store measurement results as they arrive.
+
+    A record is a dictionary of arrays, every array is appended as a new
+    row to the dataset `<path>/<key>`. Nested dictionaries such as the
+    `header` are stored in sub groups. Arrays that are not numeric are
+    skipped. Subclasses implement the abstract methods `_create(...)`
+    and `_append(...)` for a storage backend.
+
+    Properties:
+        records (int): number of records written to the sink
+
+    """
+
+    def __init__(self):
+        self._datasets = {}
+        self._records = 0
+
+    def append(self, path: str, record: Dict) -> None:
+        """Appends a record to the datasets of a signal.
+
+        Arguments:
+            path (str): The path of the signal, used as the name of the
+                group of the datasets.
+            record (dict): A dictionary of arrays, the arrays of all
+                records of the same signal and key need to have the
+                same shape.
+
+        """
+        self._append_record(path.strip("/"), record)
+        self._records += 1
+
+    def _append_record(self, group: str, record: Dict) -> None:
+        for key, value in record.items():
+            name = f"{group}/{key}"
+            if isinstance(value, dict):
+                self._append_record(name, value)
+                continue
+            if value is None:
+                continue
+            value = np.asarray(value)
+            if value.dtype.kind not in "biufc":
+                continue
+            dataset = self._datasets.get(name)
+            if dataset is None:
+                row_bytes = max(1, value.nbytes)
+                chunk_rows = max(1, CHUNK_BYTES // row_bytes)
+                dataset = self._create(name, value, (chunk_rows,) + value.shape)
+                self._datasets[name] = dataset
+            self._append(dataset, value[np.newaxis])
+
+    @abc.abstractmethod
+    def _create(self, name: str, value: np.ndarray, chunks: tuple):
+        """Creates the dataset of a key, or returns the existing one."""
+
+    @abc.abstractmethod
+    def _append(self, dataset, rows: np.ndarray) -> None:
+        """Appends rows to a dataset."""
+
+    def flush(self) -> None:
+        """Writes all buffered data to disk."""
+        pass
+
+    def close(self) -> None:
+        """Closes the sink."""
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def records(self):
+        return self._records
+
+
+class HDF5Sink(ResultSink):
+    """Writes measurement results to an HDF5 file using `h5py`.
+
+    The datasets are resizable along their first axis and chunked, with
+    about 1 MB per chunk.
+
+    Arguments:
+        filename (str): The HDF5 file, it is created if it does not
+            exist yet. New datasets are added to an existing file.
+        compression (str): The compression filter of the datasets, e.g.
+            'gzip' or 'lzf', `None` disables the compression
+            (default: 'gzip').
+        compression_opts: The options of the compression filter, e.g.
+            the level of the 'gzip' compression (default: 4).
+
+    Raises:
+        ToolkitError: If `h5py` is not installed.
+
+    """
+
+    def __init__(self, filename: str, compression="gzip", compression_opts=4):
+        super().__init__()
+        h5py = _import("h5py")
+        self._compression = compression
+        self._compression_opts = compression_opts if compression else None
+        self._file = h5py.File(filename, "a")
+
+    def _create(self, name: str, value: np.ndarray, chunks: tuple):
+        if name in self._file:
+            return self._file[name]
+        return self._file.create_dataset(
+            name,
+            shape=(0,) + value.shape,
+            maxshape=(None,) + value.shape,
+            dtype=value.dtype,
+            chunks=chunks,
+            compression=self._compression,
+            compression_opts=self._compression_opts,
+        )
+
+    def _append(self, dataset, rows: np.ndarray) -> None:
+        n = dataset.shape[0]
+        dataset.resize(n + len(rows), axis=0)
+        dataset[n:] = rows
+
+    def flush(self) -> None:
+        self._file.flush()
+
+    def close(self) -> None:
+        if self._file.id:
+            self._file.close()
+
+
+class ZarrSink(ResultSink):
+    """Writes measurement results to a Zarr store using `zarr`.
+
+    The arrays are chunked with about 1 MB per chunk and compressed with
+    the default codec of `zarr`.
+
+    Arguments:
+        store (str): The directory of the Zarr store, it is created if
+            it does not exist yet.
+
+    Raises:
+        ToolkitError: If `zarr` is not installed.
+
+    """
+
+    def __init__(self, store: str):
+        super().__init__()
+        zarr = _import("zarr")
+        self._group = zarr.open_group(store, mode="a")
+
+    def _create(self, name: str, value: np.ndarray, chunks: tuple):
+        if name in self._group:
+            return self._group[name]
+        create = getattr(self._group, "create_array", None)
+        if create is None:
+            create = self._group.create_dataset
+        return create(name, shape=(0,) + value.shape, chunks=chunks, dtype=value.dtype)
+
+    def _append(self, dataset, rows: np.ndarray) -> None:
+        dataset.append(rows, axis=0)
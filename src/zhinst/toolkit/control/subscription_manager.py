@@ -0,0 +1,386 @@
+# Copyright (C) 2020 Zurich Instruments
+#
+# This software may be modified and distributed under the terms
+# of the MIT license. See the LICENSE file for details.
+"""Zurich Instruments Toolkit (zhinst-toolkit) Subscription Manager.
+
+This module implements a background subscription manager that keeps the
+values of watched nodes up to date using `daq.subscribe(...)` and
+`daq.poll(...)` instead of requesting them with `daq.get(...)`.
+"""
+
+import fnmatch
+import threading
+import time
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+import zhinst.ziPython as zi
+
+from zhinst.toolkit.interface import LoggerModule
+
+_logger = LoggerModule(__name__)
+
+
+class SubscriptionManager:
+    """Keeps the values of watched nodes up to date in the background.
+
+    The :class:`SubscriptionManager` opens a dedicated `ziDAQServer`
+    session to the data server so that its `daq.poll(...)` calls do not
+    interfere with the main session. Watched nodes are subscribed in
+    this session and their current value is requested once with
+    `daq.getAsEvent(...)`. A single background thread drains
+    `daq.poll(...)` and stores the latest value of every watched node.
+
+    The :class:`ZIConnection` serves `get(...)` requests for watched
+    nodes from these values without a round-trip to the data server.
+    Setting a watched node invalidates its value with `invalidate(...)`
+    until a value polled after the set has been received.
+    Waiting code can block on a condition variable with `wait(...)`
+    until a watched node fulfills a condition.
+
+        >>> manager = connection.subscriptions
+        >>> manager.watch(["/dev8030/awgs/0/enable"])
+        >>> manager.wait("/dev8030/awgs/0/enable", lambda v: v == 0, timeout=10)
+        True
+
+    Arguments:
+        connection_details: The connection details (host, port, api
+            level) used to open the dedicated data server session.
+        daq_factory (Callable): A callable that is called with the
+            host, port and api level and returns the data server
+            session (default: `zi.ziDAQServer`).
+        poll_time (float): Recording time in seconds of a single
+            `daq.poll(...)` call of the background thread
+            (default: 0.01).
+
+    Attributes:
+        watched (list): The list of watched nodes.
+        is_running (bool): A flag that shows if the background thread
+            is running.
+
+    """
+
+    def __init__(
+        self,
+        connection_details,
+        daq_factory: Callable = None,
+        poll_time: float = 0.01,
+    ) -> None:
+        self._connection_details = connection_details
+        self._daq_factory = daq_factory if daq_factory is not None else zi.ziDAQServer
+        self._poll_time = poll_time
+        self._daq = None
+        self._condition = threading.Condition()
+        self._values = {}
+        self._watched = set()
+        self._pending = {}
+        self._invalidated = {}
+        self._poll_count = 0
+        self._thread = None
+        self._stop_event = threading.Event()
+        self._listeners = []
+
+    def watch(self, nodes: List) -> None:
+        """Starts watching nodes.
+
+        The nodes are subscribed and their current values are requested
+        by the background thread, which is started if it is not running
+        yet. Until the first value of a node is received, `get(...)`
+        requests for it are not served by the manager.
+
+        Arguments:
+            nodes (list): A list of full node paths including the
+                device serial.
+
+        """
+        with self._condition:
+            nodes = [n.lower() for n in nodes if n.lower() not in self._watched]
+            if not nodes:
+                return
+            if self._daq is None:
+                self._daq = self._daq_factory(
+                    self._connection_details.host,
+                    self._connection_details.port,
+                    self._connection_details.api,
+                )
+            self._watched.update(nodes)
+            for node in nodes:
+                self._invalidated.pop(node, None)
+                self._pending[node] = True
+        self._start()
+
+    def unwatch(self, nodes: List = None) -> None:
+        """Stops watching nodes.
+
+        The background thread is stopped if no node is watched anymore.
+
+        Arguments:
+            nodes (list): A list of full node paths including the
+                device serial. If not specified, all nodes are
+                unwatched (default: None).
+
+        """
+        with self._condition:
+            if nodes is None:
+                nodes = list(self._watched)
+            nodes = [n.lower() for n in nodes if n.lower() in self._watched]
+            for node in nodes:
+                self._watched.discard(node)
+                self._values.pop(node, None)
+                self._invalidated.pop(node, None)
+                self._pending[node] = False
+            watched = bool(self._watched)
+        if not watched:
+            self.stop()
+
+    def invalidate(self, nodes: List) -> None:
+        """Invalidates the values of watched nodes after they were set.
+
+        The values are dropped and requested again. Until a value is
+        received from a `daq.poll(...)` call that started after the
+        invalidation, `get(...)` requests for the nodes are not served
+        by the manager and waiting code blocks.
+
+        Arguments:
+            nodes (list): A list of full node paths including the
+                device serial. Wildcards ('*') invalidate all matching
+                watched nodes.
+
+        """
+        with self._condition:
+            for pattern in nodes:
+                pattern = pattern.strip().lower()
+                if "*" in pattern:
+                    matches = fnmatch.filter(list(self._watched), pattern)
+                elif pattern in self._watched:
+                    matches = [pattern]
+                else:
+                    matches = []
+                for node in matches:
+                    self._values.pop(node, None)
+                    self._invalidated[node] = self._poll_count
+                    self._pending[node] = True
+
+    def is_watched(self, node: str) -> bool:
+        return node.lower() in self._watched
+
+    def latest(self, node: str) -> Tuple:
+        """Gets the latest value of a watched node.
+
+        Arguments:
+            node (str): Full node path including the device serial.
+
+        Returns:
+            A tuple with a flag that specifies if a value was received
+            for the node and the value itself.
+
+        """
+        node = node.lower()
+        with self._condition:
+            if node in self._values:
+                return True, self._values[node]
+            return False, None
+
+    def get(self, node_string: str) -> Dict:
+        """Serves a `daq.get(...)` request from the latest values.
+
+        Arguments:
+            node_string (str): One or several comma separated full node
+                paths as passed to `daq.get(...)`.
+
+        Returns:
+            A flat dictionary in the same format as returned from
+            `daq.get(..., flat=True)` if all nodes are watched and have
+            received a value, otherwise `None`.
+
+        """
+        if not self._watched:
+            return None
+        data = {}
+        with self._condition:
+            for node in node_string.split(","):
+                node = node.strip().lower()
+                if node not in self._values:
+                    return None
+                value = self._values[node]
+                if isinstance(value, np.ndarray):
+                    data[node] = {"vector": value}
+                else:
+                    data[node] = {"value": [value]}
+        return data
+
+    def wait(self, node: str, predicate: Callable, timeout: float = 10) -> bool:
+        """Blocks until the value of a watched node fulfills a condition.
+
+        Arguments:
+            node (str): Full node path including the device serial.
+            predicate (Callable): A function that is called with the
+                latest value of the node and returns `True` if the
+                condition is fulfilled.
+            timeout (float): Maximum time in seconds to wait
+                (default: 10).
+
+        Raises:
+            ToolkitError: If the node is not watched.
+
+        Returns:
+            Either `True` or `False` to indicate whether the condition
+            was fulfilled before the timeout.
+
+        """
+        node = node.lower()
+        if node not in self._watched:
+            _logger.error(
+                f"The node {node} is not watched!",
+                _logger.ExceptionTypes.ToolkitError,
+            )
+        return self.wait_all({node: predicate}, timeout=timeout)
+
+    def wait_all(self, conditions: Dict, timeout: float = 10) -> bool:
+        """Blocks until all watched nodes fulfill their conditions.
+
+        Arguments:
+            conditions (dict): A dictionary with full node paths as
+                keys and predicate functions as values.
+            timeout (float): Maximum time in seconds to wait
+                (default: 10).
+
+        Returns:
+            Either `True` or `False` to indicate whether all conditions
+            were fulfilled before the timeout.
+
+        """
+        conditions = {k.lower(): v for k, v in conditions.items()}
+
+        def fulfilled():
+            return all(
+                node in self._values and predicate(self._values[node])
+                for node, predicate in conditions.items()
+            )
+
+        with self._condition:
+            return self._condition.wait_for(fulfilled, timeout=timeout)
+
+    def add_listener(self, listener: Callable) -> None:
+        """Registers a function that is called after every update.
+
+        The listener is called without arguments from the background
+        thread whenever new values were received. It must not block.
+
+        Arguments:
+            listener (Callable): The function to be called.
+
+        """
+        with self._condition:
+            self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable) -> None:
+        """Removes a function registered with `add_listener(...)`.
+
+        Arguments:
+            listener (Callable): The function to be removed.
+
+        """
+        with self._condition:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+    def stop(self) -> None:
+        """Stops the background thread.
+
+        All nodes that are no longer watched are unsubscribed before
+        the thread exits.
+
+        """
+        thread = self._thread
+        if thread is None:
+            return
+        self._stop_event.set()
+        if thread is not threading.current_thread():
+            thread.join()
+        self._thread = None
+
+    def _start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="zhinst-toolkit-subscriptions", daemon=True
+        )
+        self._thread.start()
+
+    def _run(self) -> None:
+        """Drains `daq.poll(...)` until the manager is stopped.
+
+        All calls to the data server session are made from this thread,
+        including the (un-)subscriptions requested by `watch(...)` and
+        `unwatch(...)`.
+
+        """
+        while True:
+            self._process_pending()
+            if self._stop_event.is_set():
+                break
+            with self._condition:
+                self._poll_count += 1
+                poll_index = self._poll_count
+            try:
+                data = self._daq.poll(self._poll_time, 10, 0, True)
+            except RuntimeError as e:
+                _logger.warning(f"Polling the subscribed nodes failed: {e}")
+                time.sleep(self._poll_time)
+                continue
+            if data:
+                self._update(data, poll_index)
+
+    def _process_pending(self) -> None:
+        with self._condition:
+            pending, self._pending = self._pending, {}
+        for node, subscribe in pending.items():
+            if subscribe:
+                self._daq.subscribe(node)
+                self._daq.getAsEvent(node)
+            else:
+                self._daq.unsubscribe(node)
+
+    def _update(self, data: Dict, poll_index: int) -> None:
+        with self._condition:
+            for node, node_data in data.items():
+                node = node.lower()
+                if node not in self._watched:
+                    continue
+                # Values polled before the node was set are outdated
+                if self._invalidated.get(node, 0) >= poll_index:
+                    continue
+                value = self._last_value(node_data)
+                if value is not None:
+                    self._values[node] = value
+                    self._invalidated.pop(node, None)
+            self._condition.notify_all()
+            listeners = list(self._listeners)
+        for listener in listeners:
+            listener()
+
+    @staticmethod
+    def _last_value(node_data):
+        """Extracts the last value from the polled data of a node."""
+        if isinstance(node_data, list):
+            if not node_data:
+                return None
+            node_data = node_data[-1]
+        if isinstance(node_data, dict):
+            if "value" in node_data and len(node_data["value"]):
+                return node_data["value"][-1]
+            if "vector" in node_data:
+                return node_data["vector"]
+            return None
+        return node_data
+
+    @property
+    def watched(self):
+        return sorted(self._watched)
+
+    @property
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
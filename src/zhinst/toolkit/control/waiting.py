@@ -0,0 +1,113 @@
+# Copyright (C) 2020 Zurich Instruments
+#
+# This software may be modified and distributed under the terms
+# of the MIT license. See the LICENSE file for details.
+"""Zurich Instruments Toolkit (zhinst-toolkit) Waiting Primitives.
+
+This module implements the building blocks used to wait until the
+instrument reaches a certain state. Instead of sleeping for a fixed time
+between two requests, the interval starts short and grows exponentially
+up to a maximum. Conditions that are fulfilled quickly are detected
+almost immediately while long waits do not flood the data server with
+requests.
+"""
+
+import time
+from typing import Callable
+
+import attr
+
+
+@attr.s(frozen=True)
+class WaitResult:
+    """The outcome of waiting for one or several conditions.
+
+    A :class:`WaitResult` evaluates to `True` if all conditions were
+    fulfilled before the timeout.
+
+        >>> result = hdawg.wait_for({"awgs/0/enable": 0}, timeout=5)
+        >>> bool(result), result.elapsed, result.polls
+        (True, 0.0153, 5)
+
+    Attributes:
+        success (bool): A flag that shows if all conditions were
+            fulfilled before the timeout.
+        elapsed (float): Time in seconds spent waiting.
+        polls (int): Number of times the condition was evaluated by
+            polling. Waits served by node subscriptions do not poll and
+            report 0.
+
+    """
+
+    success = attr.ib(type=bool)
+    elapsed = attr.ib(type=float)
+    polls = attr.ib(type=int, default=0)
+
+    def __bool__(self):
+        return self.success
+
+
+def poll_until(
+    condition: Callable,
+    timeout: float = None,
+    initial_interval: float = 0.001,
+    max_interval: float = 0.1,
+    factor: float = 2,
+) -> WaitResult:
+    """Evaluates a condition until it is fulfilled or the timeout expires.
+
+    The condition is evaluated immediately. Afterwards the interval
+    between two evaluations starts at *initial_interval* and is
+    multiplied by *factor* after every evaluation until it reaches
+    *max_interval*. The last evaluation happens at the timeout so a
+    condition that is fulfilled in time is never missed.
+
+    Arguments:
+        condition (Callable): A function without arguments that returns
+            `True` if the condition is fulfilled.
+        timeout (float): Maximum time in seconds to wait. If `None`,
+            the function waits until the condition is fulfilled
+            (default: None).
+        initial_interval (float): Time in seconds between the first two
+            evaluations (default: 0.001).
+        max_interval (float): Maximum time in seconds between two
+            evaluations (default: 0.1).
+        factor (float): Factor the interval grows with after every
+            evaluation (default: 2).
+
+    Returns:
+        A :class:`WaitResult` with the outcome of the wait.
+
+    """
+    start_time = time.monotonic()
+    interval = min(initial_interval, max_interval)
+    polls = 0
+    while True:
+        polls += 1
+        if condition():
+            return WaitResult(True, time.monotonic() - start_time, polls)
+        elapsed = time.monotonic() - start_time
+        if timeout is not None:
+            if elapsed >= timeout:
+                return WaitResult(False, elapsed, polls)
+            time.sleep(min(interval, timeout - elapsed))
+        else:
+            time.sleep(interval)
+        interval = min(interval * factor, max_interval)
+
+
+def as_predicate(expected) -> Callable:
+    """Turns an expected value into a predicate function.
+
+    Arguments:
+        expected: Either a function that is called with the value and
+            returns `True` if the condition is fulfilled or a value the
+            node is expected to have.
+
+    Returns:
+        A predicate function.
+
+    """
+    if callable(expected):
+        return expected
+    return lambda value: value == expected
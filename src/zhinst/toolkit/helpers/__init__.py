@@ -3,8 +3,9 @@
 # This software may be modified and distributed under the terms
 # of the MIT license. See the LICENSE file for details.
 
-from .waveform import Waveform
+from .waveform import Waveform, pack_waveforms, open_waveform
 from .shf_waveform import SHFWaveform
+from .waveform_library import WaveformLibrary
 from .sequence_program import SequenceProgram
 from .sequence_commands import SequenceCommand
 from .utils import SequenceType, TriggerMode, Alignment
@@ -408,11 +408,21 @@ class SimpleSequence(Sequence):
         delay_times (list): A list of delay times for each fo the individual
             waveform w.r.t. the time origin of the period. These values will be
             taken from the waveform queue of the AWG Core.
+        wave_indices (list): A list with the index of the placeholder that
+            is played for each waveform in the queue. If not given, every
+            waveform gets its own placeholder.
+        share_placeholders (bool): A flag that specifies if identical
+            waveforms in the queue share a single placeholder and are only
+            uploaded once. A shared placeholder can not be changed with
+            `replace_waveform(...)` without compiling the program again
+            (default: False).
 
     """
 
     buffer_lengths = attr.ib(default=[800], validator=attr.validators.instance_of(list))
     delay_times = attr.ib(default=[0])
+    wave_indices = attr.ib(default=None)
+    share_placeholders = attr.ib(default=False)
     wait_samples_updated = attr.ib(default=[0])
     dead_samples_updated = attr.ib(default=[0])
 
@@ -424,17 +434,21 @@ class SimpleSequence(Sequence):
             self.sequence, SequenceType.SIMPLE
         )
         # Loop over the waveforms and initialize placeholders
+        # Identical waveforms share a placeholder
+        placeholders = {}
+        for i, index in enumerate(self.wave_indices):
+            placeholders.setdefault(index, self.buffer_lengths[i])
         self.sequence += SequenceCommand.inline_comment("Waveform definitions")
-        for i in range(self.n_HW_loop):
+        for index, length in sorted(placeholders.items()):
             self.sequence += SequenceCommand.init_buffer_indexed(
-                self.buffer_lengths[i], i, self.target
+                length, index, self.target
             )
         # Define trigger waveform (depends on the trigger mode)
         self.sequence += self.trigger_cmd_define
         self.sequence += SequenceCommand.new_line()
-        # Loop over the waveforms and assign indices
-        for i in range(self.n_HW_loop):
-            self.sequence += SequenceCommand.assign_wave_index(i)
+        # Loop over the placeholders and assign indices
+        for index in sorted(placeholders):
+            self.sequence += SequenceCommand.assign_wave_index(index)
         self.sequence += SequenceCommand.new_line()
         self.sequence += SequenceCommand.inline_comment("Trigger commands")
         # Send trigger (depends on the trigger mode)
@@ -461,7 +475,7 @@ class SimpleSequence(Sequence):
             self.sequence += SequenceCommand.tab() + self.osc_cmd_reset
             # Play the waveforms
             self.sequence += SequenceCommand.tab() + SequenceCommand.play_wave_indexed(
-                i
+                self.wave_indices[i]
             )
             # Trigger quantum analyzer (depends on the device type)
             self.sequence += SequenceCommand.tab() + self.readout_cmd_trigger
@@ -477,6 +491,8 @@ class SimpleSequence(Sequence):
         super().update_params()
         if len(self.buffer_lengths) != self.n_HW_loop:
             self.n_HW_loop = len(self.buffer_lengths)
+        if self.wave_indices is None or len(self.wave_indices) != self.n_HW_loop:
+            self.wave_indices = list(range(self.n_HW_loop))
         if len(self.buffer_lengths) < len(self.delay_times):
             self.delay_times = self.delay_times[: len(self.buffer_lengths)]
         if len(self.buffer_lengths) > len(self.delay_times):
@@ -3,9 +3,12 @@
 # This software may be modified and distributed under the terms
 # of the MIT license. See the LICENSE file for details.
 
+import hashlib
+
 import numpy as np
 
 from zhinst.toolkit.interface import LoggerModule
+from .waveform import CHUNK_SIZE, max_amplitude, open_waveform
 
 _logger = LoggerModule(__name__)
 
@@ -19,7 +22,8 @@ class SHFWaveform(object):
 
     Arguments:
         wave (array): list or numpy array for the waveform, will be
-            scaled to have a maximum amplitude of 1
+            scaled to have a maximum amplitude of 1, alternatively a
+            memory map or the path to a `.npy` or raw int16 file
         delay (float): individual waveform delay in seconds with
             respect to the time origin of the sequence, a positive
             value shifts the start of the waveform forward in time
@@ -39,6 +43,8 @@ class SHFWaveform(object):
             w.r.t. the sequence time origin
         buffer_length (int): number of samples for the sequence code
             buffer wave
+        checksum (str): hash of the waveform data, it is recalculated
+            after the data was replaced
 
     """
 
@@ -46,14 +52,14 @@ class SHFWaveform(object):
         self._granularity = granularity
         self._min_length = min_length
         self._align_start = align_start
-        self._wave = wave
+        self._wave = open_waveform(wave)
         self._delay = delay
         self._update()
 
     def replace_data(self, wave, delay=0):
         """Replaces the data in the waveform."""
         self._delay = delay
-        self._wave = wave
+        self._wave = open_waveform(wave)
         self._update()
 
     @property
@@ -68,40 +74,43 @@ class SHFWaveform(object):
     def buffer_length(self):
         return self._buffer_length
 
+    @property
+    def checksum(self):
+        if self._checksum is None:
+            data = np.ascontiguousarray(self.data)
+            self._checksum = hashlib.blake2b(memoryview(data).cast("B")).hexdigest()
+        return self._checksum
+
     def _update(self):
         """Update the buffer length and data attributes for new waveforms."""
         self._buffer_length = self._round_up(len(self._wave))
         self._data = self._adjust_scale(self._wave)
+        self._checksum = None
 
     def _adjust_scale(self, wave):
         """Adjust the scaling of the waveform.
 
         The data is actually sent as complex values in the range of
-        (-1, 1).
+        (-1, 1). The samples are scaled in chunks of `CHUNK_SIZE`
+        directly into the complex data array.
 
         """
+        wave = np.asarray(wave)
         if len(wave) == 0:
             wave = np.zeros(1)
-        n = len(wave)
-        n = min(n, self.buffer_length)
-        m = np.max(np.abs(wave))
-        data = np.zeros(self.buffer_length, dtype=np.complex)
-
+        n = min(len(wave), self.buffer_length)
+        m = max_amplitude(wave)
+        data = np.zeros(self.buffer_length, dtype=complex)
         if self._align_start:
-            if len(wave) > n:
-                data[:n] = wave[:n] / m if m >= 1 else wave[:n]
-            else:
-                data[: len(wave)] = wave / m if m >= 1 else wave
+            wave = wave[:n]
+            target = data[:n]
         else:
-            if len(wave) > n:
-                data[:n] = (
-                    wave[len(wave) - n :] / m if m >= 1 else wave[len(wave) - n :]
-                )
-            else:
-                data[(self.buffer_length - len(wave)) :] = wave / m if m >= 1 else wave
-
-        complex_data = data.astype(complex)
-        return complex_data
+            wave = wave[len(wave) - n :]
+            target = data[self.buffer_length - n :]
+        for start in range(0, n, CHUNK_SIZE):
+            block = wave[start : start + CHUNK_SIZE]
+            target[start : start + len(block)] = block / m if m >= 1 else block
+        return data
 
     def _round_up(self, waveform_length):
         """Adapt to the allowed granularity and minimum length of
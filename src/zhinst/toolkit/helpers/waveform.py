@@ -3,12 +3,68 @@
 # This software may be modified and distributed under the terms
 # of the MIT license. See the LICENSE file for details.
 
+import hashlib
+import os
+from typing import List
+
 import numpy as np
 
 from zhinst.toolkit.interface import LoggerModule
 
 _logger = LoggerModule(__name__)
 
+# Number of samples scaled at once, bounds the size of the float64
+# scratch buffer used while interleaving.
+CHUNK_SIZE = 2 ** 16
+
+
+def open_waveform(source):
+    """Opens a waveform source without reading it into memory.
+
+    A path to a `.npy` file is opened with `np.load(..., mmap_mode="r")`,
+    any other path is opened as a raw file of int16 samples with
+    `np.memmap(...)`. Only the chunks that are currently scaled are read
+    from the file. Arrays, memory maps and lists are returned unchanged.
+
+    Arguments:
+        source: A list, numpy array, memory map or the path to a file
+            with the samples of the waveform.
+
+    Returns:
+        The waveform samples.
+
+    """
+    if not isinstance(source, (str, os.PathLike)):
+        return source
+    path = os.path.expanduser(os.fspath(source))
+    if path.lower().endswith(".npy"):
+        return np.load(path, mmap_mode="r")
+    return np.memmap(path, dtype=np.int16, mode="r")
+
+
+def max_amplitude(x) -> float:
+    """Calculates the maximum absolute value of a waveform in chunks.
+
+    The waveform is read in chunks of `CHUNK_SIZE` samples, so no copy
+    of the whole waveform is made even if it is a memory map.
+
+    Arguments:
+        x (array): The real or complex waveform samples.
+
+    Returns:
+        The maximum absolute value of the samples, 0 for an empty
+        waveform.
+
+    """
+    m = 0
+    for start in range(0, len(x), CHUNK_SIZE):
+        block = x[start : start + CHUNK_SIZE]
+        if np.iscomplexobj(block):
+            m = max(m, np.max(np.abs(block)))
+        else:
+            m = max(m, np.max(block), -float(np.min(block)))
+    return m
+
 
 class Waveform(object):
     """Implements a waveform for two channels.
@@ -19,9 +75,11 @@ class Waveform(object):
 
     Arguments:
         wave1 (array): list or numpy array for the waveform on channel 1, will
-            be scaled to have a maximum amplitude of 1
+            be scaled to have a maximum amplitude of 1, alternatively a
+            memory map or the path to a `.npy` or raw int16 file
         wave2 (array): list or numpy array for the waveform on channel 2, will
-            be scaled to have a maximum amplitude of 1
+            be scaled to have a maximum amplitude of 1, alternatively a
+            memory map or the path to a `.npy` or raw int16 file
         delay (float): individual waveform delay in seconds with respect to the
             time origin of the sequence, a positive value shifts the start of
             the waveform forward in time (default: 0)
@@ -30,24 +88,32 @@ class Waveform(object):
         align_start (bool): the waveform will be padded with zeros to match the
             granularity, either before or after the samples (default: True)
 
+    The interleaved data is only calculated when it is accessed for the
+    first time or when the waveform is packed with `pack_waveforms(...)`.
+    Files are memory mapped and scaled chunk by chunk into the int16
+    data, so very long waveforms are never held in memory as floats.
+
     Properties:
         data (array): interleaved and normalized waveform data of the two
             channels to be uplaoded to the AWG
         delay (double): delay in seconds of the individual waveform w.r.t. the
             sequence time origin
         buffer_length (int): number of samples for the seuqence c buffer wave
+        checksum (str): hash of the waveform data, it is recalculated
+            after the data was replaced
 
     """
 
     def __init__(self, wave1, wave2, delay=0, granularity=16, align_start=True):
         self._granularity = granularity
         self._align_start = align_start
-        self._waves = [wave1, wave2]
+        self._waves = [open_waveform(wave1), open_waveform(wave2)]
         self._delay = delay
         self._update()
 
     def replace_data(self, wave1, wave2, delay=0):
         """Replaces the data in the waveform."""
+        wave1, wave2 = open_waveform(wave1), open_waveform(wave2)
         new_buffer_length = self._round_up(max(len(wave1), len(wave2), 32))
         self._delay = delay
         if new_buffer_length == self.buffer_length:
@@ -61,6 +127,8 @@ class Waveform(object):
 
     @property
     def data(self):
+        if self._data is None:
+            self._data = self._interleave_waveforms(self._waves[0], self._waves[1])
         return self._data
 
     @property
@@ -71,12 +139,22 @@ class Waveform(object):
     def buffer_length(self):
         return self._buffer_length
 
+    @property
+    def checksum(self):
+        if self._checksum is None and self._data is None:
+            self._checksum = self._hash_waves()
+        elif self._checksum is None:
+            data = np.ascontiguousarray(self._data)
+            self._checksum = hashlib.blake2b(memoryview(data).cast("B")).hexdigest()
+        return self._checksum
+
     def _update(self):
-        """Update the buffer length and data attributes for new waveforms."""
+        """Update the buffer length and reset the data for new waveforms."""
         self._buffer_length = self._round_up(
             max(len(self._waves[0]), len(self._waves[1]), 32)
         )
-        self._data = self._interleave_waveforms(self._waves[0], self._waves[1])
+        self._data = None
+        self._checksum = None
 
     def _interleave_waveforms(self, x1, x2):
         """Interleaves the waveforms of both channels and adjusts the scaling.
@@ -84,42 +162,107 @@ class Waveform(object):
         The data is actually sent as values in the range of +/- (2^15 - 1).
 
         """
-        if len(x1) == 0:
-            x1 = np.zeros(1)
-        if len(x2) == 0:
-            x2 = np.zeros(1)
-
-        n = max(len(x1), len(x2))
-        n = min(n, self.buffer_length)
-        m1, m2 = np.max(np.abs(x1)), np.max(np.abs(x2))
-        data = np.zeros((2, self.buffer_length))
-
-        if self._align_start:
-            if len(x1) > n:
-                data[0, :n] = x1[:n] / m1 if m1 >= 1 else x1[:n]
-            else:
-                data[0, : len(x1)] = x1 / m1 if m1 >= 1 else x1
-            if len(x2) > n:
-                data[1, :n] = x2[:n] / m2 if m2 >= 1 else x2[:n]
-            else:
-                data[1, : len(x2)] = x2 / m2 if m2 >= 1 else x2
-        else:
-            if len(x1) > n:
-                data[0, :n] = x1[len(x1) - n :] / m1 if m1 >= 1 else x1[len(x1) - n :]
-            else:
-                data[0, (self.buffer_length - len(x1)) :] = x1 / m1 if m1 >= 1 else x1
+        data = np.zeros(2 * self.buffer_length, dtype=np.int16)
+        self._write_interleaved(data, [x1, x2])
+        return data
 
-            if len(x2) > n:
-                data[1, :n] = x2[len(x2) - n :] / m2 if m2 >= 1 else x2[len(x2) - n :]
-            else:
-                data[1, (self.buffer_length - len(x2)) :] = x2 / m2 if m2 >= 1 else x2
+    def _hash_waves(self):
+        """Calculates the checksum of the data without calculating the data.
 
-        interleaved_data = (data.reshape((-2,), order="F") * (2 ** 15 - 1)).astype(
-            "int16"
-        )
-        return interleaved_data
+        The interleaved samples are written block by block to a buffer of
+        at most `2 * CHUNK_SIZE` int16 values and hashed incrementally,
+        the checksum is identical to the hash of the whole data.
+
+        """
+        waves = [np.asarray(x) for x in self._waves]
+        amplitudes = [max_amplitude(x) for x in waves]
+        block = np.empty(2 * min(self.buffer_length, CHUNK_SIZE), dtype=np.int16)
+        scratch = np.empty(min(self.buffer_length, CHUNK_SIZE))
+        checksum = hashlib.blake2b()
+        for start in range(0, self.buffer_length, CHUNK_SIZE):
+            out = block[: 2 * min(CHUNK_SIZE, self.buffer_length - start)]
+            out[:] = 0
+            self._write_interleaved(out, waves, scratch, start, amplitudes)
+            checksum.update(memoryview(out).cast("B"))
+        return checksum.hexdigest()
+
+    def _write_interleaved(self, out, waves, scratch=None, start=0, amplitudes=None):
+        """Scales the waveforms and writes them interleaved to `out`.
+
+        The samples of both channels are written directly to the strided
+        views of the int16 array `out`, which has to be zero initialised.
+        It holds the samples `start` to `start + len(out) // 2` of the
+        data, by default the whole data of length `2 * buffer_length`.
+        The scaling is done in chunks of at most `CHUNK_SIZE` samples in
+        the float64 array `scratch`, which is allocated if not given. The
+        maximum amplitudes of the waveforms are calculated if not given.
+
+        """
+        stop = start + len(out) // 2
+        for channel, x in enumerate(waves):
+            x = np.asarray(x)
+            if len(x) == 0:
+                continue
+            m = max_amplitude(x) if amplitudes is None else amplitudes[channel]
+            n = min(len(x), self.buffer_length)
+            if self._align_start:
+                x = x[:n]
+                offset = 0
+            else:
+                x = x[len(x) - n :]
+                offset = self.buffer_length - n
+            first = max(start - offset, 0)
+            last = min(stop - offset, n)
+            if first >= last:
+                continue
+            x = x[first:last]
+            target = out[channel::2][offset + first - start : offset + last - start]
+            if scratch is None:
+                scratch = np.empty(min(len(x), CHUNK_SIZE))
+            for i in range(0, len(x), len(scratch)):
+                block = x[i : i + len(scratch)]
+                tmp = scratch[: len(block)]
+                if m >= 1:
+                    np.divide(block, m, out=tmp)
+                else:
+                    tmp[:] = block
+                tmp *= 2 ** 15 - 1
+                target[i : i + len(block)] = tmp
 
     def _round_up(self, n):
         """Adapt to the allowed granularity of waveforms."""
         m, rest = divmod(n, self._granularity)
         return n if not rest else (m + 1) * self._granularity
+
+
+def pack_waveforms(waveforms: List[Waveform]) -> np.ndarray:
+    """Scales and interleaves several waveforms into a single buffer.
+
+    All waveforms whose data has not been calculated yet are written to
+    one preallocated int16 buffer. The `data` of every packed waveform
+    is a view into this buffer, no intermediate float64 copy of a
+    waveform is made.
+
+        >>> waveforms = [Waveform(w1, w2) for w1, w2 in waves]
+        >>> buffer = pack_waveforms(waveforms)
+        >>> waveforms[1].data.base is buffer
+        True
+
+    Arguments:
+        waveforms (list): The :class:`Waveform` objects to be packed.
+
+    Returns:
+        The buffer holding the data of the packed waveforms.
+
+    """
+    pending = [w for w in waveforms if w._data is None]
+    lengths = [2 * w.buffer_length for w in pending]
+    buffer = np.zeros(sum(lengths), dtype=np.int16)
+    scratch = np.empty(min(max(lengths, default=0), CHUNK_SIZE))
+    offset = 0
+    for waveform, length in zip(pending, lengths):
+        data = buffer[offset : offset + length]
+        waveform._write_interleaved(data, waveform._waves, scratch)
+        waveform._data = data
+        offset += length
+    return buffer
@@ -0,0 +1,131 @@
+# Copyright (C) 2020 Zurich Instruments
+#
+# This software may be modified and distributed under the terms
+# of the MIT license. See the LICENSE file for details.
+
+import threading
+import weakref
+
+
+class WaveformLibrary(object):
+    """Implements a content-addressed store for waveform data.
+
+    Waveforms with identical data share a single data array. The data is
+    identified by the checksum of the scaled and interleaved samples, so
+    the same pulse shape uploaded from several AWG Cores or at several
+    indices of a queue is only held once in memory. The waveforms are
+    looked up when they are uploaded, before their data is calculated,
+    so only the data of new waveforms is calculated and packed. The
+    library only keeps weak references, the data is released as soon as
+    no queued waveform uses it anymore.
+
+    Every instrument has its own library, all instruments of a
+    :class:`MultiDeviceConnection` share one.
+
+        >>> gauss = np.exp(-np.linspace(-4, 4, 800) ** 2)
+        >>> library = hdawg.waveform_library
+        >>> hdawg.awgs[0].queue_waveform(gauss, gauss)
+        >>> hdawg.awgs[1].queue_waveform(gauss, gauss)
+        >>> hdawg.awgs[0].upload_waveforms()
+        >>> hdawg.awgs[1].upload_waveforms()
+        >>> len(library), library.saved_bytes
+        (1, 3200)
+
+    Properties:
+        hits (int): number of waveforms whose data was already in the
+            library
+        misses (int): number of waveforms whose data was added
+        saved_bytes (int): number of bytes that were not allocated or
+            were released because the data of a waveform was already in
+            the library
+        nbytes (int): number of bytes of all data in the library
+
+    """
+
+    def __init__(self):
+        self._entries = weakref.WeakValueDictionary()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._saved_bytes = 0
+
+    def find(self, waveform):
+        """Looks up the data of a waveform in the library.
+
+        If the library already holds identical data, the waveform uses
+        this data from now on. Data the waveform has not calculated yet
+        is never calculated and its own copy is released. The checksum
+        of a waveform without data is calculated chunk by chunk.
+
+        Arguments:
+            waveform (:class:`Waveform` or :class:`SHFWaveform`): the
+                waveform to be looked up
+
+        Returns:
+            A flag that shows if the data was found in the library.
+
+        """
+        key = self._key(waveform)
+        with self._lock:
+            shared = self._entries.get(key)
+            if shared is None:
+                return False
+            if waveform._data is not shared:
+                # a view into a packed buffer does not release any memory
+                if waveform._data is None or waveform._data.base is None:
+                    self._saved_bytes += shared.nbytes
+                waveform._data = shared
+                self._hits += 1
+        return True
+
+    def add(self, waveform):
+        """Adds the data of a waveform to the library.
+
+        If the library already holds identical data, the waveform uses
+        this data from now on, see :meth:`find`. Otherwise the data of
+        the waveform is calculated if necessary and added.
+
+        Arguments:
+            waveform (:class:`Waveform` or :class:`SHFWaveform`): the
+                waveform to be added
+
+        Returns:
+            The waveform.
+
+        """
+        if not self.find(waveform):
+            key, data = self._key(waveform), waveform.data
+            with self._lock:
+                self._entries[key] = data
+                self._misses += 1
+        return waveform
+
+    def _key(self, waveform):
+        return (type(waveform).__name__, waveform.buffer_length, waveform.checksum)
+
+    def clear(self):
+        """Removes all data from the library and resets the statistics."""
+        with self._lock:
+            self._entries.clear()
+            self._hits = 0
+            self._misses = 0
+            self._saved_bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def hits(self):
+        return self._hits
+
+    @property
+    def misses(self):
+        return self._misses
+
+    @property
+    def saved_bytes(self):
+        return self._saved_bytes
+
+    @property
+    def nbytes(self):
+        return sum(data.nbytes for data in list(self._entries.values()))
@@ -10,10 +10,20 @@ from zhinst.toolkit.control.drivers.base.base import (
     BaseInstrument,
     _logger as baseinstrument_logger,
 )
-from zhinst.toolkit.control.drivers.base.awg import AWGCore, _logger as awg_logger
-from zhinst.toolkit.control.drivers.base.scope import Scope, _logger as scope_logger
+from zhinst.toolkit.control.drivers.base.awg import (
+    AWGCore,
+    compile_all,
+    _logger as awg_logger,
+)
+from zhinst.toolkit.control.drivers.base.compiler import _logger as compiler_logger
+from zhinst.toolkit.control.drivers.base.scope import (
+    Scope,
+    ScopeBuffer,
+    _logger as scope_logger,
+)
 from zhinst.toolkit.control.drivers.base.daq import (
     DAQModule,
+    DAQResult,
     _logger as daq_logger,
 )
 from zhinst.toolkit.control.drivers.base.sweeper import (
@@ -49,6 +59,8 @@ from zhinst.toolkit.control.drivers.uhfli import (
 from zhinst.toolkit.control.connection import (
     ZIConnection,
     DeviceConnection,
+    AWGModulePool,
+    SweeperModuleConnection,
     _logger as connection_logger,
 )
 from zhinst.toolkit.control.node_tree import (
@@ -58,14 +70,38 @@ from zhinst.toolkit.control.node_tree import (
     Node,
     _logger as nodetree_logger,
 )
+from zhinst.toolkit.control.node_tree_cache import NodeTreeCache
+from zhinst.toolkit.control.elf_cache import ELFCache, program_hash
+from zhinst.toolkit.control.result_sink import (
+    ResultSink,
+    HDF5Sink,
+    ZarrSink,
+    _import as import_optional,
+    _logger as result_sink_logger,
+)
+from zhinst.toolkit.control.multi_device_connection import (
+    MultiDeviceConnection,
+    _logger as mdc_logger,
+)
+from zhinst.toolkit.control.subscription_manager import (
+    SubscriptionManager,
+    _logger as subscription_logger,
+)
+from zhinst.toolkit.control.waiting import WaitResult, poll_until
+from zhinst.toolkit.control import aio
 from zhinst.toolkit.control.parsers import Parse, _logger as parser_logger
 from zhinst.toolkit.helpers.sequence_commands import (
     SequenceCommand,
     _logger as sequence_command_logger,
 )
 from zhinst.toolkit.helpers.sequences import _logger as sequences_logger
-from zhinst.toolkit.helpers.waveform import Waveform, _logger as waveform_logger
-from zhinst.toolkit.helpers import SequenceProgram
+from zhinst.toolkit.helpers.waveform import (
+    Waveform,
+    pack_waveforms,
+    open_waveform,
+    _logger as waveform_logger,
+)
+from zhinst.toolkit.helpers import SequenceProgram, SHFWaveform, WaveformLibrary
 from zhinst.toolkit import SequenceType, TriggerMode, Alignment
 from zhinst.toolkit.interface import (
     InstrumentConfiguration,
@@ -0,0 +1,71 @@
+# Copyright (C) 2020 Zurich Instruments
+#
+# This software may be modified and distributed under the terms
+# of the MIT license. See the LICENSE file for details.
+"""Mocks of the streaming DAQ and Sweeper Modules used by several tests."""
+
+
+class StreamingParent:
+    serial = "dev1234"
+    name = "mf"
+
+    def _get_streamingnodes(self):
+        return "streamingnodes"
+
+
+class StreamingModuleMock:
+    """A module that returns the next record of a signal on every read.
+
+    Subclasses implement `record(index)`, which returns the data of the
+    signal for the `index`-th read. The module is finished once the
+    last of `n_reads` records is read.
+
+    """
+
+    def __init__(self, signal, n_reads):
+        self.signal = signal
+        self.n_reads = n_reads
+        self.settings = {}
+        self.subscribed = []
+        self.reads = 0
+        self.finished_called = False
+
+    def set(self, node, value, device=None):
+        self.settings[node] = value
+
+    def get(self, node, device=None):
+        return {node: [self.settings[node]]}
+
+    def subscribe(self, path):
+        self.subscribed.append(path)
+
+    def unsubscribe(self, path):
+        self.subscribed = []
+
+    def execute(self):
+        pass
+
+    def finish(self):
+        self.finished_called = True
+
+    def finished(self):
+        return self.reads >= self.n_reads - 1
+
+    def progress(self):
+        return [self.reads / self.n_reads]
+
+    def read(self, flat=True):
+        data = self.record(self.reads)
+        self.reads += 1
+        return {self.signal: data}
+
+    def record(self, index):
+        raise NotImplementedError()
+
+
+def streaming_module(module_class, module):
+    """Creates a DAQ or Sweeper Module that streams from the mock."""
+    instance = module_class(StreamingParent())
+    instance._module = module
+    instance._signals = [module.signal]
+    return instance
@@ -0,0 +1,220 @@
+# Copyright (C) 2020 Zurich Instruments
+#
+# This software may be modified and distributed under the terms
+# of the MIT license. See the LICENSE file for details.
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from .context import (
+    BaseInstrument,
+    DeviceTypes,
+    Parameter,
+    ZIConnection,
+    aio,
+    baseinstrument_logger,
+    connection_logger,
+)
+
+baseinstrument_logger.disable_logging()
+connection_logger.disable_logging()
+
+
+class Details:
+    host = "localhost"
+    port = 8004
+    api = 6
+
+
+def test_run_blocking():
+    main_thread = threading.current_thread()
+
+    def blocking(a, b=0):
+        assert threading.current_thread() is not main_thread
+        return a + b
+
+    assert asyncio.run(aio.run_blocking(blocking, 1, b=2)) == 3
+
+
+def test_set_max_workers():
+    executor = aio.get_executor()
+    assert executor is aio.get_executor()
+    aio.set_max_workers(2)
+    assert aio.get_executor() is not executor
+    assert aio.get_executor()._max_workers == 2
+    aio.set_max_workers(aio.MAX_WORKERS)
+
+
+def test_run_concurrently():
+    def blocking():
+        time.sleep(0.1)
+
+    async def main():
+        start = time.monotonic()
+        await asyncio.gather(*[aio.run_blocking(blocking) for _ in range(4)])
+        return time.monotonic() - start
+
+    assert asyncio.run(main()) < 0.3
+
+
+def test_lock_for():
+    async def main():
+        owner = object()
+        assert aio.lock_for(owner) is aio.lock_for(owner)
+        assert aio.lock_for(owner) is not aio.lock_for(object())
+
+    asyncio.run(main())
+
+
+def test_poll_until():
+    calls = []
+
+    def condition():
+        calls.append(1)
+        return len(calls) >= 3
+
+    result = asyncio.run(aio.poll_until(condition, timeout=1))
+    assert result.success
+    assert result.polls == 3
+    result = asyncio.run(aio.poll_until(lambda: False, timeout=0.02))
+    assert not result.success
+    assert result.elapsed >= 0.02
+
+
+class SubscriptionsMock:
+    def __init__(self):
+        self.values = {"/dev1234/awgs/0/enable": 1}
+        self.listeners = []
+
+    def add_listener(self, listener):
+        self.listeners.append(listener)
+
+    def remove_listener(self, listener):
+        self.listeners.remove(listener)
+
+    def wait_all(self, conditions, timeout=10):
+        assert timeout == 0
+        return all(p(self.values[n]) for n, p in conditions.items())
+
+    def push(self, node, value):
+        self.values[node] = value
+        for listener in self.listeners:
+            listener()
+
+
+def test_wait_all():
+    subscriptions = SubscriptionsMock()
+    conditions = {"/dev1234/awgs/0/enable": lambda v: v == 0}
+    threading.Timer(
+        0.02, subscriptions.push, args=("/dev1234/awgs/0/enable", 0)
+    ).start()
+    result = asyncio.run(aio.wait_all(subscriptions, conditions, timeout=1))
+    assert result.success
+    assert result.polls == 0
+    assert subscriptions.listeners == []
+    subscriptions.push("/dev1234/awgs/0/enable", 1)
+    result = asyncio.run(aio.wait_all(subscriptions, conditions, timeout=0.02))
+    assert not result.success
+
+
+class ServerMock:
+    def __init__(self):
+        self.gets = 0
+
+    def get(self, node_string, **kwargs):
+        self.gets += 1
+        return {"/dev1234/awgs/0/enable": {"value": [0 if self.gets >= 3 else 1]}}
+
+
+def test_connection_await_for():
+    connection = ZIConnection(Details())
+    with pytest.raises(connection_logger.ToolkitConnectionError):
+        asyncio.run(connection.await_for({"/dev1234/awgs/0/enable": 0}))
+    connection._daq = ServerMock()
+
+    async def main():
+        # the event loop keeps running while the node is polled
+        ticks = 0
+        task = asyncio.ensure_future(
+            connection.await_for({"/dev1234/awgs/0/enable": 0}, timeout=1)
+        )
+        while not task.done():
+            ticks += 1
+            await asyncio.sleep(0)
+        return task.result(), ticks
+
+    result, ticks = asyncio.run(main())
+    assert result.success
+    assert result.polls == 3
+    assert ticks > 1
+
+
+class DiscoveryMock:
+    def find(self, serial):
+        return serial.lower()
+
+    def get(self, serial):
+        return {"deviceid": serial}
+
+
+class ConnectionMock:
+    def __init__(self):
+        self.established = True
+        self.values = {"/dev10000/features/options": "", "/dev10000/sigouts/0/on": 1}
+        self.sets = []
+
+    def connect_device(self, serial=None, interface=None):
+        pass
+
+    def list_nodes(self, *args, **kwargs):
+        return '{"node_address": {"Node": "node_address"}}'
+
+    def get(self, node_string, **kwargs):
+        return {n: {"value": [self.values[n]]} for n in node_string.split(", ")}
+
+    def set(self, settings):
+        self.sets.extend(settings)
+
+
+def test_instrument_aget_aset():
+    inst = BaseInstrument(
+        "name",
+        DeviceTypes.PQSC,
+        "dev10000",
+        interface="1GbE",
+        discovery=DiscoveryMock(),
+    )
+    on = Parameter(
+        inst,
+        {"Node": "/DEV10000/SIGOUTS/0/ON", "Properties": "Read, Write"},
+        device=inst,
+        mapping={0: "off", 1: "on"},
+    )
+    with pytest.raises(baseinstrument_logger.ToolkitConnectionError):
+        asyncio.run(inst.aget("sigouts/0/on"))
+    with pytest.raises(baseinstrument_logger.ToolkitConnectionError):
+        asyncio.run(inst.aset("sigouts/0/on", 1))
+    connection = ConnectionMock()
+    inst.setup(connection)
+    inst.connect_device(nodetree=False)
+
+    async def main():
+        return await asyncio.gather(
+            inst.aget("sigouts/0/on"),
+            on.aget(),
+            inst.aget_many([on, "sigouts/0/on"]),
+            inst.aset("sigouts/1/on", 1),
+            on.aset("off"),
+        )
+
+    value, parsed, many, _, _ = asyncio.run(main())
+    assert value == 1
+    assert parsed == "on"
+    assert many == {on: "on", "sigouts/0/on": 1}
+    assert sorted(connection.sets) == [
+        ("/dev10000/sigouts/0/on", 0),
+        ("/dev10000/sigouts/1/on", 1),
+    ]
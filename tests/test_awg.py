@@ -3,23 +3,37 @@
 # This software may be modified and distributed under the terms
 # of the MIT license. See the LICENSE file for details.
 
+import asyncio
+import time
+import weakref
+
+import numpy as np
 import pytest
 from hypothesis import given, strategies as st
 
 from .context import (
     AWGCore,
+    AWGModulePool,
+    ELFCache,
+    compile_all,
+    program_hash,
     HDAWG,
     UHFQA,
     UHFLI,
+    SHFQA,
+    SHFQA_Channel,
+    SHFQA_Generator,
     DeviceTypes,
     SequenceType,
     awg_logger,
+    compiler_logger,
     parser_logger,
     connection_logger,
     baseinstrument_logger,
 )
 
 awg_logger.disable_logging()
+compiler_logger.disable_logging()
 parser_logger.disable_logging()
 connection_logger.disable_logging()
 baseinstrument_logger.disable_logging()
@@ -152,3 +166,371 @@ def test_awg_waveform(device_type, sequence_type, index):
                 with pytest.raises(awg_logger.ToolkitError):
                     awg.queue_waveform([], [])
                 assert awg.waveforms == []
+
+
+class CompilingModuleMock:
+    COMPILE_TIME = 0.1
+    UPLOAD_TIME = 0.05
+
+    def __init__(self):
+        self.compiled = []
+        self.uploaded = []
+        self._start = None
+        self._source = ""
+
+    def update(self, **kwargs):
+        pass
+
+    def set(self, node, value):
+        assert node == "compiler/sourcestring"
+        self.compiled.append(value)
+        self._source = value
+        self._start = time.perf_counter()
+
+    def _elapsed(self):
+        return time.perf_counter() - self._start
+
+    def get_int(self, node):
+        if node == "compiler/status":
+            if self._elapsed() < self.COMPILE_TIME:
+                return -1
+            return 1 if "error" in self._source else 0
+        return 0
+
+    def get_double(self, node):
+        done = self._elapsed() >= self.COMPILE_TIME + self.UPLOAD_TIME
+        return 1.0 if done else 0.0
+
+    def get_string(self, node):
+        if "error" in self._source:
+            return "Compiler Error (line: 7): syntax error"
+        return ""
+
+    def read_elf(self):
+        return f"ELF {self._source}".encode()
+
+    def upload_elf(self, data, filename):
+        self.uploaded.append((data, filename))
+
+    def elf_upload_done(self):
+        return True
+
+
+class PoolConnectionMock:
+    established = True
+
+    def __init__(self, size):
+        self.modules = []
+        self.awg_module_pool = AWGModulePool(self._new_module, size=size)
+
+    def _new_module(self):
+        self.modules.append(CompilingModuleMock())
+        return self.modules[-1]
+
+
+def compiling_awgs(pool_size, **kwargs):
+    instr = HDAWG("hd", "dev1234", **kwargs)
+    instr._controller._connection = PoolConnectionMock(pool_size)
+    instr._controller._is_established = True
+    awgs = []
+    for i in range(4):
+        awg = AWGCore(instr, i)
+        awg._module = CompilingModuleMock()
+        awg.set_sequence_params(sequence_type="Custom", program=f"// awg {i}")
+        awgs.append(awg)
+    return awgs
+
+
+def test_compile_all():
+    awgs = compiling_awgs(pool_size=4)
+    with pytest.raises(awg_logger.ToolkitConnectionError):
+        compile_all([AWGCore(HDAWG("hd2", "dev2345"), 0)])
+    with pytest.raises(awg_logger.ToolkitError):
+        compile_all([awgs[0], awgs[0]])
+    assert compile_all([]) == {}
+    awgs[3].set_sequence_params(program="// syntax error")
+    start = time.perf_counter()
+    reports = compile_all(awgs)
+    # the cores are compiled in parallel on separate awgModules
+    assert time.perf_counter() - start < 0.3
+    connection = awgs[0]._parent._controller._connection
+    assert len(connection.modules) == 4
+    assert all(len(m.compiled) == 1 for m in connection.modules)
+    assert all(awg._module.compiled == [] for awg in awgs)
+    assert list(reports.keys()) == [awg.name for awg in awgs]
+    report = reports["hd-awg-0"]
+    assert report.success
+    assert report.status == 0
+    assert report.compile_time >= 0.1
+    assert report.compile_time + report.upload_time >= 0.15
+    # a failing core does not abort the others
+    assert not reports["hd-awg-3"].success
+    assert reports["hd-awg-3"].status == 1
+    assert "syntax error" in reports["hd-awg-3"].statusstring
+    assert isinstance(reports["hd-awg-3"].error, awg_logger.ToolkitError)
+
+
+def test_compile_all_reuses_modules():
+    awgs = compiling_awgs(pool_size=2)
+    reports = compile_all(awgs)
+    assert all(r.success for r in reports.values())
+    connection = awgs[0]._parent._controller._connection
+    assert len(connection.modules) == 2
+    assert sum(len(m.compiled) for m in connection.modules) == 4
+
+
+def test_program_hash():
+    header = "// Zurich Instruments sequencer program\n"
+    seqc = header + "// automatically generated:    18/10/2026 @19:52\n\nwait(1);"
+    later = header + "// automatically generated:    19/10/2026 @08:01\n\nwait(1);"
+    assert program_hash(seqc) == program_hash(later)
+    assert program_hash(seqc) != program_hash(seqc.replace("wait(1)", "wait(2)"))
+
+
+class KeyDevice:
+    def __init__(self, fwrevision=67225):
+        self.values = {
+            "features/devtype": "HDAWG8",
+            "system/fwrevision": fwrevision,
+            "features/options": "ME\nCNT\n",
+        }
+
+    def _get(self, nodes, valueonly=True):
+        if isinstance(nodes, str):
+            return 1234
+        return {node: self.values[node] for node in nodes}
+
+
+def test_elf_cache(tmp_path):
+    cache = ELFCache(str(tmp_path / "elf"))
+    key = cache.key(KeyDevice(), 0, "wait(1);")
+    assert key == cache.key(KeyDevice(), 0, "wait(1);")
+    assert key != cache.key(KeyDevice(), 1, "wait(1);")
+    assert key != cache.key(KeyDevice(fwrevision=68000), 0, "wait(1);")
+    assert key != cache.key(KeyDevice(), 0, "wait(2);")
+    assert cache.load(key) is None
+    assert cache.misses == 1
+    cache.store(key, b"ELF")
+    assert cache.load(key) == b"ELF"
+    assert cache.hits == 1
+    cache.clear()
+    assert cache.load(key) is None
+
+
+def test_compile_with_elf_cache(tmp_path):
+    awgs = compiling_awgs(pool_size=4, elf_cache=str(tmp_path))
+    device = awgs[0]._parent
+    device._get = KeyDevice()._get
+    reports = compile_all(awgs[:2])
+    assert not any(r.cached for r in reports.values())
+    assert device.elf_cache.misses == 2
+    # the second compilation of the same programs skips the compiler
+    start = time.perf_counter()
+    reports = compile_all(awgs[:2], force=True)
+    assert time.perf_counter() - start < 0.1
+    assert all(r.cached and r.success for r in reports.values())
+    connection = device._controller._connection
+    assert sum(len(m.compiled) for m in connection.modules) == 2
+    uploaded = [data for m in connection.modules for data, _ in m.uploaded]
+    assert len(uploaded) == 2
+    assert all(b"// awg " in data for data in uploaded)
+    # a changed program is compiled again
+    awgs[0].set_sequence_params(program="// changed")
+    assert not compile_all(awgs[:1])["hd-awg-0"].cached
+
+
+def test_compile_skips_unchanged_program():
+    awgs = compiling_awgs(pool_size=4)
+    checksums = {f"awgs/{i}/elf/checksum": 1000 + i for i in range(4)}
+    awgs[0]._parent._get = lambda node: checksums[node]
+    reports = compile_all(awgs)
+    assert not any(r.skipped for r in reports.values())
+    reports = compile_all(awgs)
+    assert all(r.skipped and r.success for r in reports.values())
+    connection = awgs[0]._parent._controller._connection
+    assert sum(len(m.compiled) for m in connection.modules) == 4
+    # a changed program, a changed ELF on the device and `force=True`
+    # all lead to a new compilation
+    awgs[0].set_sequence_params(program="// changed")
+    checksums["awgs/1/elf/checksum"] = 0
+    reports = compile_all(awgs[:3])
+    assert [r.skipped for r in reports.values()] == [False, False, True]
+    assert not compile_all(awgs[2:3], force=True)["hd-awg-2"].skipped
+    assert sum(len(m.compiled) for m in connection.modules) == 7
+    # a program whose ELF checksum can not be read is compiled again
+    def missing_node(node):
+        raise awg_logger.ToolkitConnectionError("No data returned...")
+
+    awgs[0]._parent._get = missing_node
+    assert not compile_all(awgs[:1])["hd-awg-0"].skipped
+    assert not compile_all(awgs[:1])["hd-awg-0"].skipped
+    awgs[0]._parent._get = lambda node: checksums[node]
+    # `compile()` uses the shared awgModule of the AWG Core
+    awgs[3].compile()
+    assert awgs[3]._module.compiled == []
+    awgs[3].compile(force=True)
+    assert len(awgs[3]._module.compiled) == 1
+
+
+def test_acompile():
+    awgs = compiling_awgs(pool_size=4)
+    checksums = {f"awgs/{i}/elf/checksum": 1000 + i for i in range(4)}
+    awgs[0]._parent._get = lambda node: checksums[node]
+    awgs[1]._module = awgs[0]._module
+
+    async def compile_twice():
+        await asyncio.gather(*(awg.acompile() for awg in awgs[:2]))
+        await awgs[0].acompile()
+
+    asyncio.run(compile_twice())
+    # both cores share the awgModule, the unchanged program is skipped
+    compiled = awgs[0]._module.compiled
+    assert len(compiled) == 2 and "// awg 1" in "".join(compiled)
+    awgs[3].set_sequence_params(program="// syntax error")
+    with pytest.raises(awg_logger.ToolkitError):
+        asyncio.run(awgs[3].acompile())
+
+
+def test_compile_shf_generator():
+    instr = SHFQA("shf", "dev12000")
+    checksums = {"qachannels/1/generator/elf/checksum": 1234}
+    instr._get = lambda node: checksums[node]
+    generator = SHFQA_Generator(SHFQA_Channel(instr, 1))
+    generator._module = CompilingModuleMock()
+    generator.set_sequence_params(sequence_type="Custom", program="// generator")
+    generator.compile()
+    assert len(generator._module.compiled) == 1
+    # the generator reads the ELF checksum of its own channel
+    generator.compile()
+    assert len(generator._module.compiled) == 1
+    checksums["qachannels/1/generator/elf/checksum"] = 0
+    generator.compile()
+    assert len(generator._module.compiled) == 2
+
+
+def test_upload_changed_waveforms():
+    instr = HDAWG("hd", "dev1234")
+    sent = []
+    instr._check_connected = lambda: None
+    instr._set_vector = lambda settings: sent.append(list(settings))
+    awg = AWGCore(instr, 0)
+    awg.set_sequence_params(sequence_type="Simple")
+    for _ in range(4):
+        awg.queue_waveform(np.ones(64), np.ones(64))
+    report = awg.upload_waveforms()
+    assert report.uploaded == 4 and report.skipped == 0
+    assert report.uploaded_bytes == 4 * 2 * 64 * 2
+    assert [node for node, _ in sent[-1]] == [
+        f"awgs/0/waveform/waves/{i}" for i in range(4)
+    ]
+    # only the replaced waveform is sent again
+    awg.replace_waveform(np.zeros(64), np.ones(64), i=2)
+    report = awg.upload_waveforms()
+    assert [node for node, _ in sent[-1]] == ["awgs/0/waveform/waves/2"]
+    assert report.skipped == 3
+    assert report.skipped_bytes == 3 * 2 * 64 * 2
+    # nothing is sent if no waveform changed
+    assert awg.upload_waveforms().uploaded == 0
+    assert len(sent) == 2
+    assert awg.upload_waveforms(force=True).uploaded == 4
+    # a new queue with the same waveforms is not sent again
+    awg.reset_queue()
+    for _ in range(4):
+        awg.queue_waveform(np.ones(64), np.ones(64))
+    assert awg.upload_waveforms().uploaded == 1
+    # a factory reset sends all waveforms again
+    instr._awgs = [awg]
+    instr._set = lambda *args, **kwargs: None
+    instr.factory_reset()
+    assert awg.upload_waveforms().uploaded == 4
+
+
+def test_shared_placeholders():
+    instr = HDAWG("hd", "dev1234")
+    sent = []
+    instr._check_connected = lambda: None
+    instr._set_vector = lambda settings: sent.append(list(settings))
+    awg = AWGCore(instr, 0)
+    awg.set_sequence_params(sequence_type="Simple", share_placeholders=True)
+    gauss = np.exp(-np.linspace(-4, 4, 800) ** 2)
+    for wave in [gauss, np.ones(64), gauss, gauss]:
+        awg.queue_waveform(wave, wave)
+    seqc = awg._sequencer_program()
+    assert seqc.count("placeholder(") == 4
+    assert "assignWaveIndex(w1_1, w1_2, 0);" in seqc
+    assert "assignWaveIndex(w2_1, w2_2, 1);" in seqc
+    assert "assignWaveIndex(w3_1" not in seqc
+    assert seqc.count("playWave(w1_1, w1_2);") == 3
+    report = awg.upload_waveforms()
+    assert [node for node, _ in sent[-1]] == [
+        f"awgs/0/waveform/waves/{i}" for i in range(2)
+    ]
+    assert report.uploaded == 2 and report.skipped == 0
+    assert report.shared == 2 and report.shared_bytes == 2 * 2 * 800 * 2
+    # identical waveforms share their data
+    assert awg.waveforms[0].data is awg.waveforms[2].data
+    assert instr.waveform_library.hits == 2
+    # a shared placeholder cannot hold two different waveforms
+    awg.replace_waveform(-gauss, gauss, i=3)
+    with pytest.raises(awg_logger.ToolkitError):
+        awg.upload_waveforms()
+    awg._sequencer_program()
+    assert awg.upload_waveforms().uploaded == 1
+    assert [node for node, _ in sent[-1]] == ["awgs/0/waveform/waves/2"]
+
+
+def test_waveforms_shared_between_queues():
+    instr = HDAWG("hd", "dev1234")
+    instr._check_connected = lambda: None
+    instr._set_vector = lambda settings: list(settings)
+    awg0, awg1 = AWGCore(instr, 0), AWGCore(instr, 1)
+    gauss = np.exp(-np.linspace(-4, 4, 800) ** 2)
+    for i, awg in enumerate([awg0, awg1]):
+        awg.set_sequence_params(sequence_type="Simple")
+        for j in range(3):
+            awg.queue_waveform(np.linspace(0, 1, 800) ** (i + j + 1), gauss)
+        awg.queue_waveform(gauss, gauss)
+    awg0.upload_waveforms()
+    awg1.upload_waveforms()
+    # the gauss of the second queue is never calculated, only the new
+    # waveforms are packed, one of them is also found in the first queue
+    assert awg1.waveforms[3].data is awg0.waveforms[3].data
+    assert awg1.waveforms[0].data is awg0.waveforms[1].data
+    assert awg1.waveforms[1].data is awg0.waveforms[2].data
+    assert awg1.waveforms[2].data.base.nbytes == 2 * 800 * 2
+    library = instr.waveform_library
+    assert library.hits == 3 and library.misses == 5
+    assert library.saved_bytes == 3 * 2 * 800 * 2
+    assert library.nbytes == 5 * 2 * 800 * 2
+    # the memory is released with the queues
+    buffers = [weakref.ref(w.data.base) for w in awg0.waveforms + awg1.waveforms]
+    awg0.reset_queue()
+    assert len(library) == 4
+    awg1.reset_queue()
+    assert len(library) == 0
+    assert all(buffer() is None for buffer in buffers)
+
+
+def test_replace_dummy_waveforms():
+    instr = HDAWG("hd", "dev1234")
+    sent = []
+    instr._check_connected = lambda: None
+    instr._set_vector = lambda settings: sent.append(list(settings))
+    awg = AWGCore(instr, 0)
+    awg.set_sequence_params(sequence_type="Simple")
+    for _ in range(3):
+        awg.queue_waveform([], [])
+    # the data is only calculated when the waveforms are uploaded
+    assert all(w._data is None for w in awg.waveforms)
+    assert len(instr.waveform_library) == 0
+    # every waveform has its own placeholder unless sharing is enabled
+    seqc = awg._sequencer_program()
+    assert seqc.count("placeholder(") == 6
+    assert awg.upload_waveforms().uploaded == 3
+    # identical waveforms are packed only once
+    assert awg.waveforms[0].data.base.size == awg.waveforms[0].data.size
+    assert awg.waveforms[1].data is awg.waveforms[0].data
+    assert instr.waveform_library.hits == 2
+    awg.replace_waveform(np.ones(32), np.ones(32), i=1)
+    assert awg.upload_waveforms().uploaded == 1
+    assert [node for node, _ in sent[-1]] == ["awgs/0/waveform/waves/1"]
@@ -7,7 +7,9 @@ import pytest
 
 from .context import (
     BaseInstrument,
+    Parameter,
     DeviceTypes,
+    WaitResult,
     ziDiscovery,
     baseinstrument_logger,
 )
@@ -42,6 +44,22 @@ class ConnectionMock:
         return {"node": {"value": [""]}}
 
 
+class NodeTreeConnectionMock(ConnectionMock):
+    def __init__(self):
+        super().__init__()
+        self.list_nodes_calls = 0
+
+    def list_nodes(self, prefix, *args, **kwargs):
+        self.list_nodes_calls += 1
+        if prefix.startswith("/zi/"):
+            return '{"/ZI/ABOUT/REVISION": {"Node": "/ZI/ABOUT/REVISION"}}'
+        return (
+            '{"/DEV10000/SYSTEM/FWREVISION": {"Node": "/DEV10000/SYSTEM/FWREVISION"}, '
+            '"/DEV10000/SYSTEM/FPGAREVISION": {"Node": "/DEV10000/SYSTEM/FPGAREVISION"}, '
+            '"/DEV10000/SIGOUTS/0/ON": {"Node": "/DEV10000/SIGOUTS/0/ON"}}'
+        )
+
+
 def test_init_instrument():
     instr = BaseInstrument(
         "name",
@@ -59,6 +77,11 @@ def test_init_instrument():
     assert instr.serial == "dev10000"
     assert instr.interface == "1GbE"
     assert instr.is_connected is False
+    assert instr.cache.enabled is False
+    instr = BaseInstrument(
+        "name", DeviceTypes.PQSC, "dev10000", discovery=DiscoveryMock(), cache=True
+    )
+    assert instr.cache.enabled is True
 
 
 def test_check_connection():
@@ -144,3 +167,171 @@ def test_set_get():
         instr._get_node_dict("zi/about/revision")
     with pytest.raises(baseinstrument_logger.ToolkitConnectionError):
         instr._get_streamingnodes()
+
+
+@pytest.mark.parametrize("nodetree", [True, False])
+def test_node_dict_resolver(nodetree):
+    inst = BaseInstrument(
+        "name",
+        DeviceTypes.PQSC,
+        "dev10000",
+        interface="1GbE",
+        discovery=DiscoveryMock(),
+    )
+    connection = NodeTreeConnectionMock()
+    inst.setup(connection)
+    inst.connect_device(nodetree=nodetree)
+    # one call for the device nodetree, two for '/zi/about/revision'
+    assert connection.list_nodes_calls == 3
+    assert inst.node_dict_resolver.round_trips_saved == 4
+    node_dict = inst._get_node_dict("sigouts/0/on")
+    assert node_dict == {"Node": "/DEV10000/SIGOUTS/0/ON"}
+    assert connection.list_nodes_calls == 3
+    assert inst.node_dict_resolver.round_trips_saved == 6
+    # unknown nodes fall back to listNodesJSON
+    inst._get_node_dict("sigouts/1/on")
+    assert connection.list_nodes_calls == 5
+    assert inst.node_dict_resolver.misses == 1
+
+
+class BatchConnectionMock(ConnectionMock):
+    def __init__(self):
+        super().__init__()
+        self.settings = []
+
+    def set(self, settings):
+        self.settings.append(settings)
+
+
+def test_batch():
+    inst = BaseInstrument(
+        "name",
+        DeviceTypes.PQSC,
+        "dev10000",
+        interface="1GbE",
+        discovery=DiscoveryMock(),
+    )
+    with pytest.raises(baseinstrument_logger.ToolkitConnectionError):
+        with inst.batch():
+            pass
+    connection = BatchConnectionMock()
+    inst.setup(connection)
+    inst.connect_device(nodetree=False)
+    with inst.batch():
+        inst._set("execution/enable", 0)
+        inst._set("execution/enable", 1)
+        assert inst._get_buffered("execution/enable") == 1
+    assert connection.settings == [[("/dev10000/execution/enable", 1)]]
+    inst._get = lambda command: "device value"
+    assert inst._get_buffered("execution/enable") == "device value"
+    with pytest.raises(ValueError):
+        with inst.batch():
+            inst._set("execution/enable", 0)
+            raise ValueError()
+    assert len(connection.settings) == 1
+    assert not inst._controller.in_batch
+
+
+class GetManyConnectionMock(ConnectionMock):
+    def __init__(self):
+        super().__init__()
+        self.gets = []
+
+    def get(self, *args, **kwargs):
+        self.gets.append(args[0])
+        values = {
+            "/dev10000/features/options": {"value": [""]},
+            "/dev10000/sigouts/0/on": {"value": [1]},
+            "/dev10000/sigouts/0/range": {"value": [0.8]},
+            "/zi/about/revision": {"value": [200802104]},
+        }
+        return {k: v for k, v in values.items() if k in args[0].split(", ")}
+
+
+def test_get_many():
+    inst = BaseInstrument(
+        "name",
+        DeviceTypes.PQSC,
+        "dev10000",
+        interface="1GbE",
+        discovery=DiscoveryMock(),
+    )
+    on = Parameter(
+        inst,
+        {"Node": "/DEV10000/SIGOUTS/0/ON", "Properties": "Read, Write"},
+        device=inst,
+        mapping={0: "off", 1: "on"},
+    )
+    with pytest.raises(TypeError):
+        inst.get_many([on, None])
+    with pytest.raises(baseinstrument_logger.ToolkitConnectionError):
+        inst.get_many([on])
+    connection = GetManyConnectionMock()
+    inst.setup(connection)
+    inst.connect_device(nodetree=False)
+    connection.gets = []
+    values = inst.get_many([on, "sigouts/0/range", "/zi/about/revision"])
+    assert len(connection.gets) == 1
+    assert values == {
+        on: "on",
+        "sigouts/0/range": 0.8,
+        "/zi/about/revision": 200802104,
+    }
+    assert inst.get_many([]) == {}
+    with pytest.raises(baseinstrument_logger.ToolkitConnectionError):
+        inst.get_many(["sigouts/1/on"])
+    write_only = Parameter(
+        inst, {"Node": "/DEV10000/SIGOUTS/0/ON", "Properties": "Write"}, device=inst
+    )
+    with pytest.raises(baseinstrument_logger.ToolkitNodeTreeError):
+        inst.get_many([write_only])
+
+
+class WaitConnectionMock(ConnectionMock):
+    def __init__(self):
+        super().__init__()
+        self.values = {"/dev10000/sigouts/0/on": 1, "/dev10000/sigouts/0/range": 0.8}
+        self.conditions = []
+
+    def wait_for(self, conditions, timeout=10, **kwargs):
+        self.conditions.append((list(conditions.keys()), timeout, kwargs))
+        success = all(
+            predicate(self.values[node]) for node, predicate in conditions.items()
+        )
+        return WaitResult(success, 0.0, 1)
+
+
+def test_wait_for():
+    inst = BaseInstrument(
+        "name",
+        DeviceTypes.PQSC,
+        "dev10000",
+        interface="1GbE",
+        discovery=DiscoveryMock(),
+    )
+    on = Parameter(
+        inst,
+        {"Node": "/DEV10000/SIGOUTS/0/ON", "Properties": "Read, Write"},
+        device=inst,
+        mapping={0: "off", 1: "on"},
+    )
+    with pytest.raises(TypeError):
+        inst.wait_for({None: 1})
+    with pytest.raises(baseinstrument_logger.ToolkitConnectionError):
+        inst.wait_for({on: "on"})
+    connection = WaitConnectionMock()
+    inst.setup(connection)
+    inst.connect_device(nodetree=False)
+    # parameter values are parsed, node strings are compared as they are
+    assert inst.wait_for({on: "on", "sigouts/0/range": lambda v: v < 1}, timeout=2)
+    assert connection.conditions[-1] == (
+        ["/dev10000/sigouts/0/on", "/dev10000/sigouts/0/range"],
+        2,
+        {},
+    )
+    assert not inst.wait_for({on: "off"}, max_interval=0.5)
+    assert connection.conditions[-1][2] == {"max_interval": 0.5}
+    assert inst._assert_node_value("sigouts/0/on", 1, blocking=False)
+    assert connection.conditions[-1][1] == 0
+    assert not inst._assert_node_value([("sigouts/0/on", 0)], timeout=1)
+    assert connection.conditions[-1][1] == 1
@@ -3,9 +3,19 @@
 # This software may be modified and distributed under the terms
 # of the MIT license. See the LICENSE file for details.
 
+import threading
+
+import numpy as np
 import pytest
 
-from .context import ZIConnection, DeviceConnection, DeviceTypes, connection_logger
+from .context import (
+    ZIConnection,
+    DeviceConnection,
+    AWGModulePool,
+    SweeperModuleConnection,
+    DeviceTypes,
+    connection_logger,
+)
 
 connection_logger.disable_logging()
 
@@ -51,6 +61,72 @@ def test_init_zi_connection():
     assert c.scope_module is None
     assert c.daq_module is None
     assert c.sweeper_module is None
+    with pytest.raises(connection_logger.ToolkitConnectionError):
+        c.awg_module_pool
+
+
+class ModuleMock:
+    def __init__(self):
+        self.device = ""
+        self.finished = False
+        self.cleared = False
+
+    def finish(self):
+        self.finished = True
+
+    def clear(self):
+        self.cleared = True
+
+    def getString(self, path):
+        return self.device
+
+    def set(self, path, value):
+        if path == "/device":
+            self.device = value
+
+
+class DAQServerMock:
+    def dataAcquisitionModule(self):
+        return ModuleMock()
+
+    def sweep(self):
+        return ModuleMock()
+
+
+def test_device_modules():
+    c = ZIConnection(Details())
+    with pytest.raises(connection_logger.ToolkitConnectionError):
+        c.daq_module_for("dev1234")
+    c._daq = DAQServerMock()
+    daq1 = c.daq_module_for("dev1234")
+    daq2 = c.daq_module_for("dev5678")
+    sweeper1 = c.sweeper_module_for("dev1234")
+    # every device has its own modules, which are reused
+    assert daq1 is not daq2
+    assert c.daq_module_for("dev1234") is daq1
+    assert c.sweeper_module_for("dev1234") is sweeper1
+    assert isinstance(sweeper1, SweeperModuleConnection)
+    assert daq1.device == sweeper1.device == "dev1234"
+    assert daq2.device == "dev5678"
+    # the modules are never switched to another device
+    daq1.set("historylength", 10, device="dev1234")
+    assert daq1.device == "dev1234"
+
+
+def test_close_modules():
+    c = ZIConnection(Details())
+    c._daq = DAQServerMock()
+    daq1 = c.daq_module_for("dev1234")
+    idle = ModuleMock()
+    c._awg_module_pool = AWGModulePool(lambda: idle, size=1)
+    with c.awg_module_pool.module():
+        pass
+    # a reconnect finishes and clears the modules of the old session
+    c._close_modules()
+    assert daq1._module.finished and daq1._module.cleared
+    assert idle.finished and idle.cleared
+    assert c._awg_module_pool is None
+    assert c.daq_module_for("dev1234") is not daq1
 
 
 def test_check_connection():
@@ -146,3 +222,257 @@ def test_device_normalized_serial():
     c = DeviceConnection(Device(), DiscoveryMock())
     with pytest.raises(connection_logger.ToolkitConnectionError):
         c.normalized_serial
+
+
+class RecordingConnection:
+    def __init__(self):
+        self.established = True
+        self.calls = []
+
+    def set(self, settings):
+        self.calls.append(("set", list(settings)))
+
+    def set_vector(self, settings):
+        self.calls.append(("set_vector", list(settings)))
+
+    def sync_set(self, *args):
+        self.calls.append(("sync_set", args))
+        return args[1]
+
+    def sync(self):
+        self.calls.append(("sync",))
+
+
+def connected_device_connection():
+    c = DeviceConnection(Device(), DiscoveryMock())
+    c._connection = RecordingConnection()
+    c._is_established = True
+    c._is_connected = True
+    c._normalized_serial = "dev1234"
+    return c
+
+
+def test_device_connection_batch():
+    c = connected_device_connection()
+    with pytest.raises(connection_logger.ToolkitConnectionError):
+        c.end_batch()
+    c.begin_batch()
+    assert c.in_batch
+    c.set("sigouts/0/on", 0)
+    c.set([("sigouts/0/range", 1.5), ("sigouts/1/on", 1)])
+    c.begin_batch()
+    c.set("sigouts/0/on", 1, sync=True)
+    c.set_vector("zsyncs/0/alias", "hd1")
+    c.set_vector("awgs/0/waveform/waves/0", np.ones(4, dtype=bool))
+    c.end_batch()
+    assert c._connection.calls == []
+    c.end_batch()
+    assert not c.in_batch
+    set_call, vector_call, sync_call = c._connection.calls
+    assert set_call == (
+        "set",
+        [
+            ("/dev1234/sigouts/0/range", 1.5),
+            ("/dev1234/sigouts/1/on", 1),
+            ("/dev1234/sigouts/0/on", 1),
+        ],
+    )
+    # all vectors are sent with `set_vector(...)`
+    assert vector_call[0] == "set_vector"
+    assert [node for node, _ in vector_call[1]] == [
+        "/dev1234/zsyncs/0/alias",
+        "/dev1234/awgs/0/waveform/waves/0",
+    ]
+    assert vector_call[1][1][1].dtype == bool
+    assert sync_call == ("sync",)
+
+
+def test_device_connection_batch_discard():
+    c = connected_device_connection()
+    c.begin_batch()
+    c.set("sigouts/0/on", 1)
+    c.end_batch(discard=True)
+    assert not c.in_batch
+    assert c._connection.calls == []
+    c.set("sigouts/0/on", 1)
+    assert c._connection.calls == [("set", [("/dev1234/sigouts/0/on", 1)])]
+    # an inner batch only discards its own settings
+    c.begin_batch()
+    c.set("sigouts/0/on", 0)
+    c.begin_batch()
+    c.set("sigouts/0/on", 1, sync=True)
+    c.set("sigouts/1/on", 1)
+    c.end_batch(discard=True)
+    c.end_batch()
+    assert c._connection.calls[-1] == ("set", [("/dev1234/sigouts/0/on", 0)])
+
+
+class Resolver:
+    NODE_DICTS = {
+        "/dev1234/qas/0/result/averages": {
+            "Properties": "Read, Write, Setting",
+            "Type": "Integer (64 bit)",
+        },
+        "/dev1234/qas/0/result/enable": {
+            "Properties": "Read, Write, Setting",
+            "Type": "Integer (64 bit)",
+        },
+        "/dev1234/stats/cmdstream/bandwidth": {
+            "Properties": "Read",
+            "Type": "Double",
+        },
+        "/dev1234/awgs/0/userregs/0": {
+            "Properties": "Read, Write, Setting",
+            "Type": "Integer (64 bit)",
+        },
+    }
+
+    def node_dict(self, node):
+        return self.NODE_DICTS.get(node, None)
+
+
+class CacheDevice(Device):
+    def _get_node_dict_resolver(self):
+        return Resolver()
+
+
+class CachingConnection(RecordingConnection):
+    def __init__(self):
+        super().__init__()
+        self.values = {
+            "/dev1234/qas/0/result/averages": 4,
+            "/dev1234/qas/0/result/enable": 1,
+            "/dev1234/stats/cmdstream/bandwidth": 1.5,
+            "/dev1234/awgs/0/userregs/0": 3,
+        }
+
+    def get(self, node_string, **kwargs):
+        self.calls.append(("get", node_string))
+        return {n: {"value": [self.values[n]]} for n in node_string.split(", ")}
+
+
+def test_device_connection_cache():
+    c = connected_device_connection()
+    c._device = CacheDevice()
+    c._connection = CachingConnection()
+    assert not c.cache.enabled
+    c.get("qas/0/result/averages")
+    c.get("qas/0/result/averages")
+    assert len(c._connection.calls) == 2
+    c.cache.enabled = True
+    assert c.get("qas/0/result/averages") == 4
+    assert c.get("qas/0/result/averages") == 4
+    assert c.get("qas/0/result/averages", valueonly=False) == {
+        "qas/0/result/averages": 4
+    }
+    assert c.cache.hits == 2
+    assert c.cache.misses == 1
+    # volatile and non-setting nodes are not cached
+    c.get("qas/0/result/enable")
+    c.get("qas/0/result/enable")
+    c.get("stats/cmdstream/bandwidth")
+    c.get("stats/cmdstream/bandwidth")
+    c.get("awgs/0/userregs/0")
+    c.get("awgs/0/userregs/0")
+    assert c.cache.values == {"/dev1234/qas/0/result/averages": 4}
+    # a plain set invalidates the cached value
+    c.set("qas/0/result/averages", 8)
+    assert c.cache.values == {}
+    c._connection.values["/dev1234/qas/0/result/averages"] = 8
+    assert c.get("qas/0/result/averages") == 8
+    # a sync set caches the value returned from the device
+    c.set("qas/0/result/averages", 16, sync=True)
+    assert c.cache.values == {"/dev1234/qas/0/result/averages": 16}
+    c.set("qas/0/result/averages", "keyword", sync=True)
+    assert c.cache.values == {}
+    # lists of nodes populate the cache
+    c.get(["qas/0/result/averages", "stats/cmdstream/bandwidth"])
+    assert c.cache.values == {"/dev1234/qas/0/result/averages": 8}
+    # wildcards invalidate all matching nodes
+    c.set("qas/*/result/averages", 2)
+    assert c.cache.values == {}
+    c.get("qas/0/result/averages")
+    c.cache.clear()
+    assert c.cache.values == {}
+
+
+def test_awg_module_pool():
+    with pytest.raises(ValueError):
+        AWGModulePool(object, size=0)
+    pool = AWGModulePool(object, size=2)
+    assert pool.size == 2
+    first = pool.acquire()
+    with pool.module() as second:
+        assert second is not first
+        assert pool.created == 2
+    # released modules are reused
+    assert pool.acquire() is second
+    released = []
+
+    def release_later():
+        released.append(first)
+        pool.release(first)
+
+    timer = threading.Timer(0.05, release_later)
+    timer.start()
+    # blocks until a module is released
+    assert pool.acquire() is first
+    assert released == [first]
+    assert pool.created == 2
+
+
+class VectorDaqMock:
+    def __init__(self):
+        self.calls = []
+
+    def set(self, settings):
+        self.calls.append(("set", settings))
+
+    def setVector(self, node, value):
+        self.calls.append(("setVector", node, value))
+
+
+def test_set_vector_bulk():
+    c = ZIConnection(Details())
+    c._daq = VectorDaqMock()
+    waves = [
+        (f"/dev1234/awgs/0/waveform/waves/{i}", np.ones(64, np.int16)) for i in range(5)
+    ]
+    transfer = c.set_vector(waves + [("/dev1234/awgs/0/commandtable/data", "{}")])
+    # numeric vectors are sent with a single call, strings one by one
+    assert [call[0] for call in c._daq.calls] == ["setVector", "set"]
+    assert len(c._daq.calls[1][1]) == 5
+    assert transfer.nbytes == 5 * 128
+    assert len(transfer.chunks) == 1
+    assert transfer.throughput > 0
+    # the vectors are split into chunks of at most `chunk_size` bytes
+    c._daq.calls = []
+    transfer = c.set_vector(waves, chunk_size=300)
+    assert [len(call[1]) for call in c._daq.calls] == [2, 2, 1]
+    assert len(transfer.chunks) == 3
+    c.vector_chunk_size = 100
+    c.set_vector(waves[:2])
+    assert [len(call[1]) for call in c._daq.calls[3:]] == [1, 1]
+
+
+def test_set_vector_dtypes():
+    c = ZIConnection(Details())
+    c._daq = VectorDaqMock()
+    c.set_vector(
+        [
+            ("/a", [1.0, 0.5]),
+            ("/b", np.ones(4, dtype=complex)),
+            ("/c", np.ones((2, 2), dtype=np.float16)),
+            ("/d", [True, False]),
+            ("/e", np.arange(8, dtype=np.int16)[::2]),
+        ]
+    )
+    vectors = dict(c._daq.calls[0][1])
+    assert vectors["/a"].dtype == np.float64
+    assert vectors["/b"].dtype == complex
+    assert vectors["/c"].dtype == np.float32 and vectors["/c"].shape == (4,)
+    assert vectors["/d"].dtype == np.uint8
+    assert vectors["/e"].flags["C_CONTIGUOUS"]
+    with pytest.raises(TypeError):
+        c.set_vector([("/f", np.array([None, 1]))])
+    assert c.set_vector([]).nbytes == 0
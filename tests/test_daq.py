@@ -1,6 +1,11 @@
+import time
+import tracemalloc
+
+import numpy as np
 import pytest
 
-from .context import DAQModule, daq_logger
+from .context import DAQModule, DAQResult, HDF5Sink, daq_logger
+from .streaming import StreamingModuleMock, StreamingParent, streaming_module
 
 daq_logger.disable_logging()
 
@@ -30,3 +35,224 @@ def test_no_connection():
         daq._set("endless", 0)
     with pytest.raises(daq_logger.ToolkitConnectionError):
         daq._get("endless")
+
+
+SIGNAL = "/dev1234/demods/0/sample.r.avg"
+
+
+class GridModuleMock(StreamingModuleMock):
+    def __init__(self, n_grids, rows=2, cols=4):
+        super().__init__(SIGNAL, n_grids)
+        self.rows = rows
+        self.cols = cols
+
+    def record(self, index):
+        start = index * self.rows * self.cols
+        value = np.arange(start, start + self.rows * self.cols, dtype=float)
+        timestamp = np.arange(self.rows * self.cols, dtype=np.uint64) * 6000
+        grid = {
+            "header": {"createdtimestamp": np.array([index], dtype=np.uint64)},
+            "value": value.reshape(self.rows, self.cols),
+            "timestamp": timestamp.reshape(self.rows, self.cols),
+        }
+        return [grid]
+
+
+def streaming_daq(n_grids, **kwargs):
+    return streaming_module(DAQModule, GridModuleMock(n_grids, **kwargs))
+
+
+def test_stream():
+    daq = streaming_daq(5)
+    chunks = list(daq.stream(interval=0))
+    assert daq._module.settings["endless"] == 1
+    assert daq._module.finished_called and not daq._module.subscribed
+    assert len(chunks) == 5
+    result = chunks[2][SIGNAL][0]
+    assert result.shape == (2, 4)
+    assert result.value[0, 0] == 16
+    assert np.allclose(result.time, np.arange(4) * 1e-4)
+    # without a ring buffer the results hold the last grid only
+    assert daq.results[SIGNAL].value[0, 0] == 32
+
+
+def test_stream_ring_buffer():
+    daq = streaming_daq(10)
+    for i, chunk in enumerate(daq.stream(interval=0, max_rows=5, endless=False)):
+        rows = min(2 * (i + 1), 5)
+        assert daq.results[SIGNAL].shape == (rows, 4)
+        if i == 6:
+            break
+    # leaving the loop finishes the measurement
+    assert daq._module.settings["endless"] == 0
+    assert daq._module.finished_called and not daq._module.subscribed
+    assert daq._module.reads == 7
+    assert np.array_equal(daq.results[SIGNAL].value[:, 0], [36, 40, 44, 48, 52])
+
+
+def test_stream_back_pressure():
+    daq = streaming_daq(100)
+    stream = daq.stream(interval=0.05, duration=0.5)
+    next(stream)
+    time.sleep(0.2)
+    # no data is read while the consumer is busy
+    assert daq._module.reads == 1
+    next(stream)
+    assert daq._module.reads == 2
+    start = time.time()
+    next(stream)
+    # the reads are at least `interval` apart
+    assert time.time() - start >= 0.04
+    # the stream ends after `duration`
+    assert len(list(stream)) < 10
+    assert daq._module.finished_called
+
+
+def test_stream_to_sink(tmp_path):
+    h5py = pytest.importorskip("h5py")
+
+    def peak_memory(n_grids, filename):
+        daq = streaming_daq(n_grids, rows=10, cols=1000)
+        tracemalloc.start()
+        with HDF5Sink(tmp_path / filename) as sink:
+            for _ in daq.stream(interval=0, endless=False, sink=sink):
+                pass
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return peak
+
+    short_run = peak_memory(20, "short.h5")
+    long_run = peak_memory(80, "long.h5")
+    # the memory does not grow with the length of the run
+    assert long_run < 1.5 * short_run
+    with h5py.File(tmp_path / "long.h5", "r") as f:
+        group = f[SIGNAL.strip("/")]
+        assert group["value"].shape == (80, 10, 1000)
+        assert group["value"][79, 0, 0] == 79 * 10 * 1000
+        assert group["timestamp"].shape == (80, 10, 1000)
+        assert group["time"].shape == (80, 1000)
+        assert list(group["header/createdtimestamp"][:, 0]) == list(range(80))
+
+
+def test_lazy_result():
+    value = np.arange(12, dtype=float).reshape(3, 4)
+    timestamp = np.arange(12, dtype=np.uint64).reshape(3, 4) * 6
+    grid = {"header": {"gridcoldelta": 2.0}, "value": value, "timestamp": timestamp}
+    result = DAQResult(SIGNAL, grid, clk_rate=60)
+    # the value is a read-only view without a copy
+    assert np.shares_memory(result.value, value)
+    with pytest.raises(ValueError):
+        result.value[0, 0] = 1
+    assert value.flags.writeable
+    # the axes are calculated on first access and memoised
+    assert result._time is None
+    assert np.allclose(result.time, [0, 0.1, 0.2, 0.3])
+    assert result.time is result.time
+    assert result.frequency is None
+    fft = DAQResult(SIGNAL.replace(".r.", ".xiy.fft.abs."), grid)
+    assert fft.time is None
+    assert np.allclose(fft.frequency, [-3, -1, 1, 3])
+    assert not hasattr(result, "__dict__")
+
+
+def test_lazy_results():
+    daq = streaming_daq(1)
+    signals = [SIGNAL, SIGNAL.replace(".r.", ".x.")]
+    daq._signals = signals
+    grid = {"value": np.ones((2, 4)), "timestamp": np.zeros((2, 4), dtype=np.uint64)}
+    daq._get_result_from_dict({s: [grid] for s in signals})
+    assert list(daq.results) == signals and len(daq.results) == 2
+    # the results are only created when they are accessed
+    assert daq.results._results == {}
+    assert daq.results[SIGNAL] is daq.results[SIGNAL]
+    assert list(daq.results._results) == [SIGNAL]
+    with pytest.raises(daq_logger.ToolkitError):
+        daq._get_result_from_dict({SIGNAL: [grid]})
+
+
+class SeriesModuleMock(StreamingModuleMock):
+    def __init__(self, parent, acquisition_time=0.02):
+        super().__init__(SIGNAL, 1)
+        self.parent = parent
+        self.acquisition_time = acquisition_time
+        self.started = None
+        self.executed = 0
+        self.subscriptions = 0
+
+    def subscribe(self, path):
+        self.subscriptions += 1
+        super().subscribe(path)
+
+    def execute(self):
+        self.executed += 1
+        self.started = time.perf_counter()
+
+    def finished(self):
+        return time.perf_counter() - self.started >= self.acquisition_time
+
+    def record(self, index):
+        freq = self.parent.settings.get("oscs/0/freq", 0)
+        shape = (2, self.parent.settings.get("cols", 4))
+        grid = {
+            "value": np.full(shape, freq),
+            "timestamp": np.zeros(shape, dtype=np.uint64),
+        }
+        return [grid]
+
+
+class SeriesParent(StreamingParent):
+    def __init__(self):
+        self.settings = {}
+        self.set_calls = []
+
+    def _set(self, settings, sync=False):
+        assert sync
+        self.set_calls.append(settings)
+        self.settings.update(settings)
+
+
+def test_measure_series():
+    parent = SeriesParent()
+    daq = DAQModule(parent)
+    daq._module = SeriesModuleMock(parent)
+    daq._signals = [SIGNAL]
+    points = [{"oscs/0/freq": f, "sigouts/0/on": 1} for f in [1, 1, 2, 3]]
+    series = daq.measure_series(iter(points))
+    assert daq._module.subscriptions == 1 and daq._module.executed == 4
+    assert daq._module.finished_called and not daq._module.subscribed
+    # only changed settings are applied
+    assert parent.set_calls == [
+        [("oscs/0/freq", 1), ("sigouts/0/on", 1)],
+        [("oscs/0/freq", 2)],
+        [("oscs/0/freq", 3)],
+    ]
+    assert series.values[SIGNAL].shape == (4, 2, 4)
+    assert np.array_equal(series.values[SIGNAL][:, 0, 0], [1, 1, 2, 3])
+    assert series.axes[SIGNAL].shape == (4,)
+    assert series.settings == points
+    assert all(series.acquisition_time >= 0.02)
+    assert all(series.overhead < 0.05)
+    # `measure()` polls every 0.5 s, the overhead of a point is much larger
+    start = time.perf_counter()
+    daq.measure(verbose=False)
+    assert time.perf_counter() - start - 0.02 > 5 * series.overhead.max()
+
+
+def test_measure_series_timeout():
+    parent = SeriesParent()
+    daq = DAQModule(parent)
+    daq._module = SeriesModuleMock(parent, acquisition_time=10)
+    daq._signals = [SIGNAL]
+    with pytest.raises(TimeoutError):
+        daq.measure_series([{"oscs/0/freq": 1}], timeout=0.05)
+    assert daq._module.finished_called
+
+
+def test_measure_series_grid_shape():
+    parent = SeriesParent()
+    daq = DAQModule(parent)
+    daq._module = SeriesModuleMock(parent, acquisition_time=0)
+    daq._signals = [SIGNAL]
+    with pytest.raises(daq_logger.ToolkitError):
+        daq.measure_series([{"cols": 4}, {"cols": 8}])
+    assert daq._module.finished_called
@@ -0,0 +1,120 @@
+# Copyright (C) 2020 Zurich Instruments
+#
+# This software may be modified and distributed under the terms
+# of the MIT license. See the LICENSE file for details.
+
+import time
+
+import pytest
+
+from .context import (
+    HDAWG,
+    MFLI,
+    UHFLI,
+    BaseInstrument,
+    DeviceTypes,
+    MultiDeviceConnection,
+    mdc_logger,
+)
+
+mdc_logger.disable_logging()
+
+
+class ConnectionMock:
+    established = True
+
+
+def device(cls, name, serial, delay=0.1, fail=False):
+    instr = cls(name, serial)
+
+    def connect_device():
+        time.sleep(delay)
+        if fail:
+            raise RuntimeError(f"{serial} not found")
+
+    instr.connect_device = connect_device
+    return instr
+
+
+def test_connect_devices():
+    mdc = MultiDeviceConnection()
+    with pytest.raises(mdc_logger.ToolkitConnectionError):
+        mdc.connect_devices([device(HDAWG, "hdawg 0", "dev8000")])
+    mdc._shared_connection = ConnectionMock()
+    with pytest.raises(mdc_logger.ToolkitError):
+        mdc.connect_devices([BaseInstrument("base", DeviceTypes.HDAWG, "dev1")])
+    assert mdc.connect_devices([]) == {}
+    devices = [device(HDAWG, f"hdawg {i}", f"dev800{i}") for i in range(4)]
+    devices.append(device(UHFLI, "uhfli", "dev2000"))
+    devices.append(device(MFLI, "mfli", "dev5000", fail=True))
+    start = time.perf_counter()
+    reports = mdc.connect_devices(devices)
+    # the devices are connected in parallel
+    assert time.perf_counter() - start < 0.5
+    assert list(reports.keys()) == [d.name for d in devices]
+    assert all(r.elapsed >= 0.1 for r in reports.values())
+    assert reports["hdawg 0"].success
+    assert reports["hdawg 0"].serial == "dev8000"
+    # a failing device does not abort the others and is not added
+    assert not reports["mfli"].success
+    assert isinstance(reports["mfli"].error, RuntimeError)
+    assert list(mdc.hdawgs.keys()) == [f"hdawg {i}" for i in range(4)]
+    assert mdc.uhflis == {"uhfli": devices[4]}
+    assert mdc.mflis == {}
+    for d in devices:
+        assert d._controller.connection is mdc._shared_connection
+    # all connected devices share the waveform library
+    assert devices[0].waveform_library is mdc.waveform_library
+    assert devices[4].waveform_library is mdc.waveform_library
+    assert devices[5].waveform_library is not mdc.waveform_library
+
+
+class MeasurementMock:
+    def __init__(self, serial, delay=0.1, fail=False):
+        self.serial = serial
+        self.delay = delay
+        self.fail = fail
+        self.results = None
+
+    def measure(self, verbose=True, timeout=20):
+        time.sleep(self.delay)
+        if self.fail:
+            raise TimeoutError("Measurement timed out!")
+        self.results = {f"/{self.serial}/demods/0/sample.r": timeout}
+
+
+def lock_in(cls, name, serial, **kwargs):
+    instr = cls(name, serial)
+    measurement = MeasurementMock(serial, **kwargs)
+    if cls is MFLI:
+        instr._daq_module = instr._sweeper_module = measurement
+    else:
+        instr._daq = instr._sweeper = measurement
+    return instr
+
+
+def test_measure_all():
+    mdc = MultiDeviceConnection()
+    assert mdc.measure_all() == {}
+    with pytest.raises(mdc_logger.ToolkitError):
+        mdc.measure_all([HDAWG("hdawg", "dev8000")])
+    with pytest.raises(ValueError):
+        mdc.measure_all(module="scope")
+    devices = [lock_in(MFLI, f"mfli {i}", f"dev500{i}") for i in range(4)]
+    devices.append(lock_in(UHFLI, "uhfli", "dev2000", fail=True))
+    for d in devices:
+        mdc._add_device(d)
+    start = time.perf_counter()
+    reports = mdc.measure_all(timeout=5)
+    # the lock-ins are measured in parallel
+    assert time.perf_counter() - start < 0.4
+    assert sorted(reports.keys()) == sorted(d.name for d in devices)
+    assert reports["mfli 0"].success
+    assert reports["mfli 0"].elapsed >= 0.1
+    assert reports["mfli 0"].results == {"/dev5000/demods/0/sample.r": 5}
+    # a failing measurement does not abort the others
+    assert not reports["uhfli"].success
+    assert isinstance(reports["uhfli"].error, TimeoutError)
+    assert reports["uhfli"].results is None
+    reports = mdc.measure_all(devices[1:2], module="sweeper")
+    assert list(reports.keys()) == ["mfli 1"]
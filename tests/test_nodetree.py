@@ -3,9 +3,10 @@
 # This software may be modified and distributed under the terms
 # of the MIT license. See the LICENSE file for details.
 
+import pytest
 from hypothesis import given, strategies as st
 
-from .context import NodeTree, Node, NodeList, nodetree_logger
+from .context import NodeTree, Node, NodeList, NodeTreeCache, nodetree_logger
 
 nodetree_logger.disable_logging()
 
@@ -39,9 +40,22 @@ FLAT_DUMMY_DICT = {
 class Device:
     serial = ""
 
+    def __init__(self, fwrevision=1):
+        self.fwrevision = fwrevision
+        self.nodetree_calls = 0
+
     def _get_nodetree(self, *args):
+        self.nodetree_calls += 1
         return FLAT_DUMMY_DICT
 
+    def _get(self, command, valueonly=True):
+        return {
+            "features/devtype": "HDAWG8",
+            "system/fwrevision": self.fwrevision,
+            "system/fpgarevision": 2,
+            "features/options": "CNT\nMF\n",
+        }
+
 
 class Parent:
     def __init__(self, dev):
@@ -81,6 +95,67 @@ def test_nodetree_init():
     assert tree.__repr__() != ""
 
 
+def test_lazy_nodetree_init():
+    tree = NodeTree(Device(), lazy=True)
+    assert tree._nodetree_dict == DUMMY_DICT
+    assert "first" not in tree.__dict__
+    assert sorted(tree.nodes) == ["first", "second"]
+    assert sorted(tree.parameters) == ["fourth", "third"]
+    assert "first" in dir(tree)
+    assert len(tree.first.parameters) == 3
+    assert "first" in tree.__dict__
+    assert "second" not in tree.__dict__
+    assert isinstance(tree.second, NodeList)
+    assert len(tree.second) == 3
+    assert not isinstance(tree.fourth, NodeList)
+    assert tree.third is tree.third
+    assert tree.__repr__() != ""
+    with pytest.raises(AttributeError):
+        tree.fifth
+
+
+def test_lazy_nodetree_matches_eager():
+    eager = NodeTree(Device())
+    lazy = NodeTree(Device(), lazy=True)
+    assert sorted(eager.nodes) == sorted(lazy.nodes)
+    assert sorted(eager.parameters) == sorted(lazy.parameters)
+    assert sorted(eager.first.parameters) == sorted(lazy.first.parameters)
+
+
+READ_PARAMETER = {"Node": "/DEV1234/TEST/READ", "Properties": "Read, Write"}
+STREAM_PARAMETER = {"Node": "/DEV1234/TEST/STREAM", "Properties": "Read, Stream"}
+WRITE_PARAMETER = {"Node": "/DEV1234/TEST/WRITE", "Properties": "Write"}
+
+
+class SnapshotDevice(Device):
+    def __init__(self):
+        super().__init__()
+        self.requested = []
+
+    def get_many(self, items):
+        self.requested.append(items)
+        return {item: item._path for item in items}
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+def test_node_snapshot(lazy):
+    dev = SnapshotDevice()
+    node = Node(Parent(dev))
+    nodetree_dict = {
+        "sub": {"read": READ_PARAMETER, "stream": STREAM_PARAMETER},
+        "list": {0: READ_PARAMETER, 1: {"write": WRITE_PARAMETER}},
+        "write": WRITE_PARAMETER,
+    }
+    if lazy:
+        node._init_subnodes_lazily(node, nodetree_dict)
+    else:
+        node._init_subnodes_recursively(node, nodetree_dict)
+    snapshot = node.snapshot()
+    assert len(dev.requested) == 1
+    assert len(dev.requested[0]) == 2
+    assert snapshot == {"/dev1234/test/read": "/DEV1234/TEST/READ"}
+
+
 @given(st.integers(0, 10))
 def test_nodelist_init(n):
     lst = NodeList()
@@ -89,3 +164,42 @@ def test_nodelist_init(n):
     assert lst.__repr__() != ""
     if n > 0:
         assert f"Node {n}" in lst.__repr__()
+
+
+def test_nodetree_cache(tmp_path):
+    cache = NodeTreeCache(str(tmp_path))
+    dev = Device()
+    tree = NodeTree(dev, cache=cache)
+    assert tree._nodetree_dict == DUMMY_DICT
+    assert dev.nodetree_calls == 1
+    assert cache.misses == 1
+    assert len(list(tmp_path.iterdir())) == 1
+    # second connect is served from the cache
+    tree = NodeTree(dev, cache=NodeTreeCache(str(tmp_path)))
+    assert tree._nodetree_dict == DUMMY_DICT
+    assert dev.nodetree_calls == 1
+    assert isinstance(tree.second, NodeList)
+
+
+def test_nodetree_cache_invalidation(tmp_path):
+    cache = NodeTreeCache(str(tmp_path))
+    NodeTree(Device(fwrevision=1), cache=cache)
+    dev = Device(fwrevision=2)
+    NodeTree(dev, cache=cache)
+    assert dev.nodetree_calls == 1
+    assert cache.hits == 0
+    assert cache.misses == 2
+    NodeTree(dev, cache=cache)
+    assert dev.nodetree_calls == 1
+    assert cache.hits == 1
+    cache.clear()
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_nodetree_cache_corrupted_file(tmp_path):
+    cache = NodeTreeCache(str(tmp_path))
+    (tmp_path / ".nodetree").write_bytes(b"not a pickle")
+    dev = Device()
+    tree = NodeTree(dev, cache=cache)
+    assert tree._nodetree_dict == DUMMY_DICT
+    assert dev.nodetree_calls == 1
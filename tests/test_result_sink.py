@@ -0,0 +1,76 @@
+# Copyright (C) 2020 Zurich Instruments
+#
+# This software may be modified and distributed under the terms
+# of the MIT license. See the LICENSE file for details.
+
+import numpy as np
+import pytest
+
+from .context import (
+    ResultSink,
+    HDF5Sink,
+    ZarrSink,
+    import_optional,
+    result_sink_logger,
+)
+
+result_sink_logger.disable_logging()
+
+
+def records(n):
+    for i in range(n):
+        yield {
+            "value": np.full((2, 3), i, dtype=float),
+            "grid": np.arange(3),
+            "header": {"flags": np.array([i], dtype=np.uint32), "name": "demod"},
+            "unused": None,
+        }
+
+
+def test_hdf5_sink(tmp_path):
+    h5py = pytest.importorskip("h5py")
+    filename = tmp_path / "result.h5"
+    with HDF5Sink(filename) as sink:
+        for record in records(5):
+            sink.append("/dev1234/demods/0/sample.r", record)
+        assert sink.records == 5
+    # a second sink appends to the existing datasets
+    with HDF5Sink(filename, compression=None) as sink:
+        for record in records(2):
+            sink.append("/dev1234/demods/0/sample.r", record)
+    with h5py.File(filename, "r") as f:
+        group = f["dev1234/demods/0/sample.r"]
+        assert group["value"].shape == (7, 2, 3)
+        assert group["value"].compression == "gzip"
+        assert np.array_equal(group["value"][:, 0, 0], [0, 1, 2, 3, 4, 0, 1])
+        assert np.array_equal(group["grid"][3], np.arange(3))
+        assert group["header/flags"].shape == (7, 1)
+        assert "name" not in group["header"] and "unused" not in group
+
+
+def test_zarr_sink(tmp_path):
+    zarr = pytest.importorskip("zarr")
+    store = str(tmp_path / "result.zarr")
+    with ZarrSink(store) as sink:
+        for record in records(5):
+            sink.append("/dev1234/demods/0/sample.r", record)
+    group = zarr.open_group(store, mode="r")
+    assert group["dev1234/demods/0/sample.r/value"].shape == (5, 2, 3)
+    assert group["dev1234/demods/0/sample.r/value"][4, 1, 2] == 4
+    assert group["dev1234/demods/0/sample.r/header/flags"].shape == (5, 1)
+
+
+def test_missing_package():
+    with pytest.raises(result_sink_logger.ToolkitError):
+        import_optional("zhinst_toolkit_missing_package")
+
+
+def test_abstract_sink():
+    class IncompleteSink(ResultSink):
+        def _create(self, name, value, chunks):
+            return []
+
+    with pytest.raises(TypeError):
+        ResultSink()
+    with pytest.raises(TypeError):
+        IncompleteSink()
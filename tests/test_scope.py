@@ -3,11 +3,13 @@
 # This software may be modified and distributed under the terms
 # of the MIT license. See the LICENSE file for details.
 
+import numpy as np
 import pytest
 from hypothesis import given, strategies as st
 
 from .context import (
     Scope,
+    ScopeBuffer,
     scope_logger,
     parser_logger,
     connection_logger,
@@ -115,3 +117,86 @@ def test_scope_set_get(device_type):
             scope.averager_weight()
         with pytest.raises(AttributeError):
             scope.averager_weight(10)
+
+
+class StreamingScopeModuleMock:
+    """Acquires `per_read` records before every read and returns the
+    last `history` records, like the scopeModule in continuous mode."""
+
+    def __init__(self, per_read=3, history=4, length=8):
+        self.per_read = per_read
+        self.history = history
+        self.length = length
+        self.acquired = 0
+        self.finished = False
+
+    def read(self):
+        self.acquired += self.per_read
+        first = max(0, self.acquired - self.history)
+        records = [
+            [
+                {
+                    "timestamp": 1000 * (i + 1),
+                    "dt": 1e-3,
+                    "wave": np.full((2, self.length), i, dtype=float),
+                }
+            ]
+            for i in range(first, self.acquired)
+        ]
+        return {"/dev1234/scopes/0/wave": records}
+
+    def finish(self):
+        self.finished = True
+
+
+def test_stream():
+    scope = Scope(UHFLI("name", "dev1234"))
+    with pytest.raises(scope_logger.ToolkitConnectionError):
+        next(scope.stream())
+    scope._module = StreamingScopeModuleMock()
+    received = []
+    buffers = []
+    for buffer in scope.stream(
+        n_records=5, callbacks=[lambda w, t: received.append((w[0, 0], t))], interval=0
+    ):
+        buffers.append(buffer)
+        if buffer.count >= 9:
+            break
+    # every record is passed to the callbacks exactly once
+    assert received == [(i, 1000 * (i + 1)) for i in range(9)]
+    # the buffer and the time axis are allocated once
+    assert all(b is buffers[0] for b in buffers)
+    assert buffer.data.shape == (5, 2, 8)
+    assert np.allclose(buffer.time, np.arange(8) * 1e-3)
+    # the buffer holds the last records, the oldest first
+    assert buffer.size == 5
+    assert np.array_equal(buffer.records()[:, 0, 0], [4, 5, 6, 7, 8])
+    assert buffer.latest[1, 0] == 8
+    assert sorted(buffer.timestamps) == [5000, 6000, 7000, 8000, 9000]
+    # the scope keeps running
+    assert not scope._module.finished
+
+
+def test_stream_duration():
+    scope = Scope(UHFLI("name", "dev1234"))
+    scope._module = StreamingScopeModuleMock(per_read=1)
+    buffers = list(scope.stream(n_records=3, interval=0.01, duration=0.05))
+    assert 1 <= buffers[-1].count <= 10
+    assert np.array_equal(
+        buffers[-1].records()[:, 0, 0], np.arange(buffers[-1].count)[-3:]
+    )
+
+
+def test_scope_buffer():
+    with pytest.raises(ValueError):
+        ScopeBuffer(0, 2, 8, 1e-3)
+    buffer = ScopeBuffer(3, 1, 4, 1e-3, dtype=np.int16)
+    assert buffer.size == 0
+    assert buffer.latest is None
+    assert buffer.records().shape == (0, 1, 4)
+    assert buffer.fits(np.zeros((1, 4)), 1e-3)
+    assert not buffer.fits(np.zeros((1, 5)), 1e-3)
+    assert not buffer.fits(np.zeros((1, 4)), 2e-3)
+    assert buffer.append(np.ones((1, 4)), 10) == 0
+    assert buffer.data.dtype == np.int16
+    assert np.array_equal(buffer.records(), np.ones((1, 1, 4)))
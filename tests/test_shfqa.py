@@ -3,6 +3,7 @@
 # This software may be modified and distributed under the terms
 # of the MIT license. See the LICENSE file for details.
 
+import numpy as np
 import pytest
 
 from .context import (
@@ -46,3 +47,20 @@ def test_init_shfqa():
     with pytest.raises(shfqa_logger.ToolkitConnectionError):
         qa._init_params()
     qa._init_settings()
+
+
+def test_generator_upload_changed_waveforms():
+    qa = SHFQA("name", "dev12000")
+    sent = []
+    qa._check_connected = lambda: None
+    qa._set_vector = lambda settings: sent.append(list(settings))
+    generator = SHFQA_Generator(SHFQA_Channel(qa, 1))
+    generator.set_sequence_params(sequence_type="Custom")
+    generator.queue_waveform(np.ones(8) * 0.5)
+    generator.queue_waveform(np.ones(8))
+    assert generator.upload_waveforms().uploaded == 2
+    generator.replace_waveform(np.zeros(8), i=0)
+    report = generator.upload_waveforms()
+    assert [node for node, _ in sent[-1]] == ["qachannels/1/generator/waveforms/0/wave"]
+    assert report.skipped == 1
+    assert report.skipped_bytes == 8 * 16
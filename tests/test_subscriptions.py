@@ -0,0 +1,202 @@
+# Copyright (C) 2020 Zurich Instruments
+#
+# This software may be modified and distributed under the terms
+# of the MIT license. See the LICENSE file for details.
+
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from .context import (
+    SubscriptionManager,
+    ZIConnection,
+    connection_logger,
+    subscription_logger,
+)
+
+subscription_logger.disable_logging()
+
+
+class Details:
+    host = "localhost"
+    port = 8004
+    api = 6
+
+
+class DAQMock:
+    def __init__(self, host, port, api):
+        self.values = {}
+        self.subscribed = set()
+        self.events = []
+        self.lock = threading.Lock()
+
+    def subscribe(self, node):
+        self.subscribed.add(node)
+
+    def unsubscribe(self, node):
+        self.subscribed.discard(node)
+
+    def getAsEvent(self, node):
+        self.push(node, self.values.get(node, 0))
+
+    def push(self, node, value):
+        with self.lock:
+            if isinstance(value, np.ndarray):
+                self.events.append({node: [{"vector": value}]})
+            else:
+                self.events.append({node: {"value": np.array([value])}})
+
+    def poll(self, recording_time, timeout, flags, flat):
+        time.sleep(recording_time)
+        with self.lock:
+            events, self.events = self.events, []
+        data = {}
+        for event in events:
+            data.update(event)
+        return data
+
+
+def test_watch_and_get():
+    manager = SubscriptionManager(Details(), daq_factory=DAQMock, poll_time=0.001)
+    assert not manager.is_running
+    assert manager.get("/dev1234/awgs/0/enable") is None
+    manager.watch(["/DEV1234/awgs/0/enable", "/dev1234/awgs/0/waveform/waves/0"])
+    assert manager.is_running
+    assert manager.watched == [
+        "/dev1234/awgs/0/enable",
+        "/dev1234/awgs/0/waveform/waves/0",
+    ]
+    assert manager.wait("/dev1234/awgs/0/enable", lambda v: v == 0, timeout=1)
+    assert manager._daq.subscribed == set(manager.watched)
+    assert manager.get("/dev1234/awgs/0/enable") == {
+        "/dev1234/awgs/0/enable": {"value": [0]}
+    }
+    manager._daq.push("/dev1234/awgs/0/waveform/waves/0", np.ones(4))
+    manager._daq.push("/dev1234/awgs/0/enable", 1)
+    assert manager.wait_all(
+        {
+            "/dev1234/awgs/0/enable": lambda v: v == 1,
+            "/dev1234/awgs/0/waveform/waves/0": lambda v: len(v) == 4,
+        },
+        timeout=1,
+    )
+    data = manager.get("/dev1234/awgs/0/enable, /dev1234/awgs/0/waveform/waves/0")
+    assert data["/dev1234/awgs/0/enable"] == {"value": [1]}
+    assert np.array_equal(
+        data["/dev1234/awgs/0/waveform/waves/0"]["vector"], np.ones(4)
+    )
+    # nodes that are not watched are not served
+    assert manager.get("/dev1234/awgs/0/enable, /dev1234/awgs/1/enable") is None
+    assert manager.latest("/dev1234/awgs/0/enable") == (True, 1)
+    assert manager.latest("/dev1234/awgs/1/enable") == (False, None)
+    manager.unwatch()
+    assert not manager.is_running
+    assert manager.watched == []
+    assert manager._daq.subscribed == set()
+
+
+def test_wait_timeout():
+    manager = SubscriptionManager(Details(), daq_factory=DAQMock, poll_time=0.001)
+    with pytest.raises(subscription_logger.ToolkitError):
+        manager.wait("/dev1234/awgs/0/enable", lambda v: v == 1)
+    manager.watch(["/dev1234/awgs/0/enable"])
+    start = time.time()
+    assert not manager.wait("/dev1234/awgs/0/enable", lambda v: v == 1, timeout=0.1)
+    assert time.time() - start < 1
+    manager.stop()
+    assert not manager.is_running
+
+
+class ServerMock:
+    def __init__(self):
+        self.gets = 0
+        self.settings = []
+
+    def get(self, *args, **kwargs):
+        self.gets += 1
+        return {"/dev1234/awgs/1/enable": {"value": [0]}}
+
+    def set(self, settings):
+        self.settings += settings
+
+
+def test_connection_served_from_subscriptions():
+    connection = ZIConnection(Details())
+    with pytest.raises(connection_logger.ToolkitConnectionError):
+        connection.subscriptions
+    connection._daq = ServerMock()
+    manager = connection.subscriptions
+    assert manager is connection.subscriptions
+    manager._daq_factory = DAQMock
+    manager._poll_time = 0.001
+    manager.watch(["/dev1234/awgs/0/enable"])
+    manager.wait("/dev1234/awgs/0/enable", lambda v: v == 0, timeout=1)
+    data = connection.get("/dev1234/awgs/0/enable", settingsonly=False, flat=True)
+    assert data == {"/dev1234/awgs/0/enable": {"value": [0]}}
+    assert connection._daq.gets == 0
+    connection.get("/dev1234/awgs/1/enable", settingsonly=False, flat=True)
+    assert connection._daq.gets == 1
+    manager.stop()
+
+
+def test_connection_wait_for_watched_nodes():
+    connection = ZIConnection(Details())
+    connection._daq = ServerMock()
+    manager = connection.subscriptions
+    manager._daq_factory = DAQMock
+    manager._poll_time = 0.001
+    manager.watch(["/dev1234/awgs/0/enable"])
+    manager._daq.values["/dev1234/awgs/0/enable"] = 1
+    threading.Timer(0.02, manager._daq.push, args=("/dev1234/awgs/0/enable", 0)).start()
+    result = connection.wait_for({"/dev1234/awgs/0/enable": 0}, timeout=1)
+    assert result.success
+    assert result.polls == 0
+    assert connection._daq.gets == 0
+    manager.stop()
+
+
+def test_invalidate():
+    manager = SubscriptionManager(Details(), daq_factory=DAQMock, poll_time=0.001)
+    manager.watch(["/dev1234/awgs/0/enable"])
+    assert manager.wait("/dev1234/awgs/0/enable", lambda v: v == 0, timeout=1)
+    # values polled before the invalidation are outdated
+    manager.stop()
+    manager._daq.values["/dev1234/awgs/0/enable"] = 1
+    poll_index = manager._poll_count
+    manager.invalidate(["/DEV1234/awgs/0/enable", "/dev1234/awgs/1/enable"])
+    assert manager.get("/dev1234/awgs/0/enable") is None
+    manager._update({"/dev1234/awgs/0/enable": {"value": [0]}}, poll_index)
+    assert manager.latest("/dev1234/awgs/0/enable") == (False, None)
+    # the value is requested again
+    manager._start()
+    assert manager.wait("/dev1234/awgs/0/enable", lambda v: v == 1, timeout=1)
+    manager.stop()
+
+
+def test_invalidate_wildcards():
+    manager = SubscriptionManager(Details(), daq_factory=DAQMock, poll_time=0.001)
+    nodes = ["/dev1234/sigouts/0/on", "/dev1234/sigouts/1/on", "/dev1234/awgs/0/enable"]
+    manager.watch(nodes)
+    assert all(manager.wait(node, lambda v: v == 0, timeout=1) for node in nodes)
+    manager.stop()
+    manager.invalidate(["/DEV1234/sigouts/*/on"])
+    assert [manager.latest(node)[0] for node in nodes] == [False, False, True]
+
+
+def test_connection_set_invalidates_subscriptions():
+    connection = ZIConnection(Details())
+    connection._daq = ServerMock()
+    manager = connection.subscriptions
+    manager._daq_factory = DAQMock
+    manager._poll_time = 0.001
+    manager.watch(["/dev1234/awgs/1/enable"])
+    manager.wait("/dev1234/awgs/1/enable", lambda v: v == 0, timeout=1)
+    manager.stop()
+    connection.set([("/dev1234/awgs/1/enable", 1)])
+    assert connection._daq.settings == [("/dev1234/awgs/1/enable", 1)]
+    assert manager.latest("/dev1234/awgs/1/enable") == (False, None)
+    # the node is requested from the data server until a new value is pushed
+    connection.get("/dev1234/awgs/1/enable", settingsonly=False, flat=True)
+    assert connection._daq.gets == 1
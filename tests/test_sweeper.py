@@ -3,9 +3,11 @@
 # This software may be modified and distributed under the terms
 # of the MIT license. See the LICENSE file for details.
 
+import numpy as np
 import pytest
 
-from .context import SweeperModule, sweeper_logger
+from .context import HDF5Sink, SweeperModule, sweeper_logger
+from .streaming import StreamingModuleMock, streaming_module
 
 sweeper_logger.disable_logging()
 
@@ -35,3 +37,72 @@ def test_no_connection():
         s._set("endless", 0)
     with pytest.raises(sweeper_logger.ToolkitConnectionError):
         s._get("endless")
+
+
+SIGNAL = "/dev1234/demods/0/sample"
+
+
+class SweepModuleMock(StreamingModuleMock):
+    def __init__(self, samplecount=6, step=2):
+        super().__init__(SIGNAL, -(-samplecount // step))
+        self.settings["samplecount"] = samplecount
+        self.step = step
+
+    def record(self, index):
+        samplecount = self.settings["samplecount"]
+        n = min((index + 1) * self.step, samplecount)
+        sweep = {
+            "header": {"flags": np.array([index + 1])},
+            "grid": np.linspace(1e3, 6e3, samplecount)[:n],
+            "r": np.arange(n, dtype=float),
+            "timestamp": np.arange(n, dtype=np.uint64),
+            "samplecount": np.array([samplecount]),
+            "settling": np.full(3, index + 1.0),
+        }
+        return [[sweep]]
+
+
+def streaming_sweeper(**kwargs):
+    return streaming_module(SweeperModule, SweepModuleMock(**kwargs))
+
+
+def test_stream():
+    s = streaming_sweeper()
+    grids = []
+    for results in s.stream(interval=0):
+        result = results[SIGNAL]
+        grids.append(result.grid)
+        if len(grids) == 1:
+            assert np.array_equal(result.r[:2], [0, 1])
+            assert np.isnan(result.r[2:]).all()
+            assert result.timestamp.dtype == np.uint64
+            assert np.array_equal(result.timestamp, [0, 1, 0, 0, 0, 0])
+    assert s._module.reads == 3
+    assert s._module.finished_called and not s._module.subscribed
+    # the arrays are allocated once and filled in place
+    assert all(g is grids[0] for g in grids)
+    assert np.array_equal(s.results[SIGNAL].grid, np.linspace(1e3, 6e3, 6))
+    assert np.array_equal(s.results[SIGNAL].r, np.arange(6))
+    assert s.results[SIGNAL].header["flags"][0] == 3
+    assert s.results[SIGNAL].samplecount[0] == 6
+    # arrays without one entry per point are replaced
+    assert np.array_equal(s.results[SIGNAL].settling, [3, 3, 3])
+
+
+def test_stream_timeout():
+    s = streaming_sweeper(samplecount=1000, step=1)
+    with pytest.raises(TimeoutError):
+        for _ in s.stream(interval=0.01, timeout=0.05):
+            pass
+    assert s._module.finished_called
+
+
+def test_stream_to_sink(tmp_path):
+    h5py = pytest.importorskip("h5py")
+    s = streaming_sweeper()
+    with HDF5Sink(tmp_path / "sweep.h5") as sink:
+        for _ in s.stream(interval=0, sink=sink):
+            pass
+    with h5py.File(tmp_path / "sweep.h5", "r") as f:
+        assert f["dev1234/demods/0/sample/r"].shape == (1, 6)
+        assert f["dev1234/demods/0/sample/header/flags"][0, 0] == 3
@@ -275,6 +275,36 @@ def test_set_get_params_channel():
         ch._average_result(1000)
 
 
+class VectorConnectionMock:
+    established = True
+
+    def __init__(self):
+        self.values = []
+
+    def set(self, settings):
+        self.values += settings
+
+    def set_vector(self, settings):
+        self.values += settings
+
+
+def test_int_weights_in_batch():
+    qa = UHFQA("name", "dev2000")
+    qa._controller._connection = VectorConnectionMock()
+    qa._controller._is_established = True
+    qa._controller._is_connected = True
+    qa._controller._normalized_serial = "dev2000"
+    qa._get = lambda command: 100
+    ch = ReadoutChannel(qa, 0)
+    # the weights use the integration length set in the same batch
+    with qa.batch():
+        qa._set("qas/0/integration/length", 200)
+        ch._set_int_weights()
+    weights = dict(qa._controller._connection.values)
+    real = weights["/dev2000/qas/0/integration/weights/0/real"]
+    assert np.count_nonzero(real[:200]) > 100 and not real[200:].any()
+
+
 @given(single_value=st.floats(-2, 2))
 def test_int_weights_envelope_single_value(single_value):
     ch = ReadoutChannel(UHFQA("name", "dev2000"), 0)
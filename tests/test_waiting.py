@@ -0,0 +1,105 @@
+# Copyright (C) 2020 Zurich Instruments
+#
+# This software may be modified and distributed under the terms
+# of the MIT license. See the LICENSE file for details.
+
+import time
+
+import pytest
+
+from .context import WaitResult, ZIConnection, connection_logger, poll_until
+
+connection_logger.disable_logging()
+
+
+class Details:
+    host = "localhost"
+    port = 8004
+    api = 6
+
+
+class Counter:
+    def __init__(self, done_after):
+        self.calls = 0
+        self.done_after = done_after
+
+    def __call__(self):
+        self.calls += 1
+        return self.calls >= self.done_after
+
+
+def test_wait_result():
+    assert WaitResult(True, 0.1, 2)
+    assert not WaitResult(False, 0.1, 2)
+    assert WaitResult(True, 0.1).polls == 0
+
+
+def test_poll_until():
+    result = poll_until(Counter(1), timeout=1)
+    assert result.success
+    assert result.polls == 1
+    condition = Counter(5)
+    result = poll_until(condition, timeout=1, initial_interval=0.001)
+    assert result.success
+    assert result.polls == condition.calls == 5
+    # the intervals 1, 2, 4 and 8 ms add up to 15 ms
+    assert result.elapsed < 0.5
+    result = poll_until(Counter(3), timeout=None, initial_interval=0.001)
+    assert result.success
+
+
+def test_poll_until_timeout():
+    start = time.monotonic()
+    result = poll_until(lambda: False, timeout=0.05, max_interval=0.01)
+    assert not result.success
+    assert result.elapsed >= 0.05
+    assert time.monotonic() - start < 1
+    # with the interval capped at 10 ms, at least 5 polls are made
+    assert result.polls >= 5
+    result = poll_until(lambda: False, timeout=0)
+    assert not result.success
+    assert result.polls == 1
+
+
+class ServerMock:
+    def __init__(self, done_after):
+        self.gets = []
+        self.done_after = done_after
+
+    def get(self, node_string, **kwargs):
+        self.gets.append(node_string)
+        enable = 0 if len(self.gets) >= self.done_after else 1
+        return {
+            "/dev1234/awgs/0/enable": {"value": [enable]},
+            "/dev1234/awgs/1/enable": {"value": [0]},
+        }
+
+
+def test_connection_wait_for():
+    connection = ZIConnection(Details())
+    with pytest.raises(connection_logger.ToolkitConnectionError):
+        connection.wait_for({"/dev1234/awgs/0/enable": 0})
+    connection._daq = ServerMock(done_after=3)
+    result = connection.wait_for(
+        {"/DEV1234/awgs/0/enable": 0, "/dev1234/awgs/1/enable": lambda v: v == 0},
+        timeout=1,
+    )
+    assert result.success
+    assert result.polls == 3
+    # all nodes are requested with a single get per poll
+    assert (
+        connection._daq.gets == ["/dev1234/awgs/0/enable, /dev1234/awgs/1/enable"] * 3
+    )
+    result = connection.wait_for({"/dev1234/awgs/1/enable": 1}, timeout=0.02)
+    assert not result.success
+    assert result.polls > 1
+
+
+def test_connection_wait_for_missing_node():
+    connection = ZIConnection(Details())
+    connection._daq = ServerMock(done_after=1)
+    result = connection.wait_for({"/dev1234/awgs/2/enable": 0}, timeout=0.01)
+    assert not result.success
+    connection._daq.get = lambda *args, **kwargs: {}
+    with pytest.raises(connection_logger.ToolkitConnectionError):
+        connection.wait_for({"/dev1234/awgs/0/enable": 0}, timeout=0.01)
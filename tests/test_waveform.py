@@ -3,10 +3,19 @@
 # This software may be modified and distributed under the terms
 # of the MIT license. See the LICENSE file for details.
 
+import weakref
+
 from hypothesis import given, assume, strategies as st
 import numpy as np
 
-from .context import Waveform, waveform_logger
+from .context import (
+    Waveform,
+    SHFWaveform,
+    pack_waveforms,
+    open_waveform,
+    WaveformLibrary,
+    waveform_logger,
+)
 
 waveform_logger.disable_logging()
 
@@ -64,3 +73,107 @@ class TestWaveform:
         w = Waveform(np.zeros(8000), np.zeros(8000))
         w.replace_data(np.ones(8000), np.ones(8000))
         assert np.array_equal(w.data, np.ones(16000) * (2 ** 15 - 1))
+
+    def test_chunked_scaling(self):
+        wave = np.linspace(-2, 2, 200001)
+        w = Waveform(wave, wave[:1000] / 4, align_start=False)
+        expected = np.zeros((2, w.buffer_length))
+        expected[0, w.buffer_length - len(wave) :] = wave / 2
+        expected[1, w.buffer_length - 1000 :] = wave[:1000] / 4
+        expected = (expected.reshape((-2,), order="F") * (2 ** 15 - 1)).astype(
+            "int16"
+        )
+        assert np.array_equal(w.data, expected)
+
+    def test_pack_waveforms(self):
+        waveforms = [Waveform(np.ones(32 * i), -np.ones(16)) for i in range(1, 5)]
+        waveforms[0].data
+        buffer = pack_waveforms(waveforms)
+        assert len(buffer) == 2 * sum(w.buffer_length for w in waveforms[1:])
+        for i, w in enumerate(waveforms):
+            assert (w.data.base is buffer) == (i > 0)
+            expected = Waveform(np.ones(32 * (i + 1)), -np.ones(16)).data
+            assert np.array_equal(w.data, expected)
+        # replaced waveforms are packed again
+        waveforms[2].replace_data(np.zeros(96), np.zeros(96))
+        buffer = pack_waveforms(waveforms)
+        assert len(buffer) == 2 * waveforms[2].buffer_length
+        assert not waveforms[2].data.any()
+        assert len(pack_waveforms([])) == 0
+
+    def test_checksum_without_data(self):
+        for align_start in [True, False]:
+            for l1, l2 in [(0, 0), (5, 300), (70000, 7), (100003, 140000)]:
+                wave1, wave2 = 3 * np.sin(np.arange(l1)), np.cos(np.arange(l2))
+                w = Waveform(wave1, wave2, align_start=align_start)
+                expected = Waveform(wave1, wave2, align_start=align_start)
+                expected.data
+                assert w.checksum == expected.checksum
+                assert w._data is None
+
+    def test_file_sources(self, tmp_path):
+        wave1 = np.linspace(-3, 3, 100003)
+        wave2 = (np.sin(np.linspace(0, 100, 70000)) * 30000).astype(np.int16)
+        np.save(tmp_path / "wave1.npy", wave1)
+        wave2.tofile(tmp_path / "wave2.bin")
+        assert isinstance(open_waveform(tmp_path / "wave1.npy"), np.memmap)
+        source = open_waveform(str(tmp_path / "wave2.bin"))
+        assert isinstance(source, np.memmap)
+        assert np.array_equal(source, wave2)
+        expected = Waveform(wave1, wave2)
+        w = Waveform(tmp_path / "wave1.npy", str(tmp_path / "wave2.bin"))
+        assert w.buffer_length == expected.buffer_length
+        assert np.array_equal(w.data, expected.data)
+        mmap = np.memmap(tmp_path / "wave2.bin", dtype=np.int16, mode="r")
+        w.replace_data(mmap, tmp_path / "wave1.npy")
+        assert np.array_equal(w.data, Waveform(wave2, wave1).data)
+        assert open_waveform(wave1) is wave1
+
+    def test_shf_file_sources(self, tmp_path):
+        wave = np.exp(1j * np.linspace(0, 100, 200001)) * 2
+        np.save(tmp_path / "wave.npy", wave)
+        for align_start in [False, True]:
+            w = SHFWaveform(tmp_path / "wave.npy", align_start=align_start)
+            expected = np.zeros(w.buffer_length, dtype=complex)
+            if align_start:
+                expected[: len(wave)] = wave / 2
+            else:
+                expected[w.buffer_length - len(wave) :] = wave / 2
+            assert np.allclose(w.data, expected)
+        w.replace_data([0.5, -0.5])
+        assert np.array_equal(w.data, [0.5, -0.5, 0, 0])
+
+    def test_waveform_library(self):
+        library = WaveformLibrary()
+        w1 = library.add(Waveform(np.ones(64), np.zeros(64)))
+        w2 = library.add(Waveform(np.ones(64), np.zeros(64), delay=1e-6))
+        w3 = library.add(Waveform(np.zeros(64), np.ones(64)))
+        assert w1.data is w2.data and w1.data is not w3.data
+        assert w2.delay == 1e-6
+        assert len(library) == 2
+        assert library.hits == 1 and library.misses == 2
+        assert library.saved_bytes == library.nbytes // 2 == 256
+        # waveforms of different types do not share data
+        w4 = library.add(SHFWaveform(np.ones(64)))
+        assert len(library) == 3
+        # the own copy of a shared waveform is released
+        w5 = Waveform(np.ones(64), np.zeros(64))
+        copy = weakref.ref(w5.data)
+        library.add(w5)
+        assert copy() is None and w5.data is w1.data
+        assert library.saved_bytes == 2 * 256
+        # a packed waveform keeps its buffer alive, no bytes are saved
+        w6, w7 = Waveform(np.ones(64), np.zeros(64)), Waveform([], [])
+        pack_waveforms([w6, w7])
+        library.add(w6)
+        assert w6.data is w1.data and library.saved_bytes == 2 * 256
+        # waveforms without data are found without calculating it
+        w8 = Waveform(np.zeros(64), np.ones(64))
+        assert library.find(w8) and w8.data is w3.data
+        assert library.saved_bytes == 3 * 256
+        assert not library.find(Waveform(-np.ones(64), np.ones(64)))
+        # the data is released when no waveform uses it anymore
+        del w1, w2, w5, w6
+        assert len(library) == 2
+        library.clear()
+        assert len(library) == 0 and library.hits == 0